@@ -4,4 +4,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Импорт после настройки Django: модуль бота обращается к моделям
+from bot.webhook import BotLifespanMiddleware  # noqa: E402
+
+application = BotLifespanMiddleware(django_application)
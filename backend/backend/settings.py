@@ -17,6 +17,114 @@ DEBUG = os.getenv('DEBUG') == 'True'
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_FAKE_TOKEN = os.getenv('TELEGRAM_FAKE_TOKEN')
 
+# Бот внутри ASGI-приложения (uvicorn backend.asgi:application):
+# webhook принимается по TELEGRAM_WEBHOOK_PATH и проверяется
+# секретным токеном, который передаётся Telegram в setWebhook
+BOT_RUN_IN_ASGI = os.getenv('BOT_RUN_IN_ASGI', 'False') == 'True'
+TELEGRAM_WEBHOOK_PATH = os.getenv('TELEGRAM_WEBHOOK_PATH', 'telegram/webhook/')
+TELEGRAM_WEBHOOK_SECRET = os.getenv('TELEGRAM_WEBHOOK_SECRET', '')
+
+# Сколько обновлений бот обрабатывает одновременно (обновления одного
+# пользователя всё равно обрабатываются по очереди); 1 — без параллелизма
+BOT_CONCURRENT_UPDATES = int(os.getenv('BOT_CONCURRENT_UPDATES', '16'))
+
+# Сколько секунд обработчики берут настройки пользователя из user_data,
+# не перечитывая их из БД (изменения через бота видны сразу)
+USER_CONTEXT_TTL = int(os.getenv('USER_CONTEXT_TTL', '300'))
+
+# Как часто (в секундах) бот сверяет версию каталога вопросов с БД
+CATALOG_REFRESH_INTERVAL = int(os.getenv('CATALOG_REFRESH_INTERVAL', '30'))
+
+# Рассылка уведомлений: число параллельных отправок, общий лимит
+# сообщений в секунду (воркеры start_bot --workers делят его поровну),
+# интервал между сообщениями в один чат и число повторов при ошибках
+# Telegram
+NOTIFICATION_CONCURRENCY = int(os.getenv('NOTIFICATION_CONCURRENCY', '8'))
+NOTIFICATION_RATE_LIMIT = float(os.getenv('NOTIFICATION_RATE_LIMIT', '25'))
+NOTIFICATION_CHAT_INTERVAL = float(
+    os.getenv('NOTIFICATION_CHAT_INTERVAL', '1')
+)
+NOTIFICATION_MAX_RETRIES = int(os.getenv('NOTIFICATION_MAX_RETRIES', '3'))
+
+# Очередь уведомлений: за сколько минут досылать пропущенное после
+# простоя, как часто и какими пачками забирать строки, аренда строки
+# воркером, число попыток с экспоненциальной задержкой и срок хранения
+# завершённых строк (в днях)
+NOTIFICATION_CATCHUP_MINUTES = int(
+    os.getenv('NOTIFICATION_CATCHUP_MINUTES', '15')
+)
+NOTIFICATION_DELIVERY_INTERVAL = int(
+    os.getenv('NOTIFICATION_DELIVERY_INTERVAL', '5')
+)
+NOTIFICATION_BATCH_SIZE = int(os.getenv('NOTIFICATION_BATCH_SIZE', '200'))
+NOTIFICATION_LEASE_SECONDS = int(
+    os.getenv('NOTIFICATION_LEASE_SECONDS', '120')
+)
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', '5'))
+NOTIFICATION_RETRY_BASE_DELAY = int(
+    os.getenv('NOTIFICATION_RETRY_BASE_DELAY', '30')
+)
+NOTIFICATION_OUTBOX_RETENTION = int(
+    os.getenv('NOTIFICATION_OUTBOX_RETENTION', '7')
+)
+
+# Хранилище незавершённых викторин: database (таблица в основной БД)
+# или sqlite (локальный файл), и интервал пакетной записи в секундах
+QUIZ_SESSION_BACKEND = os.getenv('QUIZ_SESSION_BACKEND', 'database')
+QUIZ_SESSION_SQLITE_PATH = os.getenv(
+    'QUIZ_SESSION_SQLITE_PATH', os.path.join('data', 'quiz_sessions.sqlite3')
+)
+QUIZ_SESSION_FLUSH_INTERVAL = float(
+    os.getenv('QUIZ_SESSION_FLUSH_INTERVAL', '5')
+)
+
+# Выбор вопросов викторины: spaced — интервальное повторение по
+# UserQuestionStatistic, random — случайные вопросы темы
+QUIZ_SELECTION_MODE = os.getenv('QUIZ_SELECTION_MODE', 'spaced')
+
+# Маски показанных вопросов: кэш на SEEN_QUESTIONS_CACHE_SIZE
+# пользователей, запись в БД раз в SEEN_QUESTIONS_FLUSH_INTERVAL секунд
+SEEN_QUESTIONS_CACHE_SIZE = int(
+    os.getenv('SEEN_QUESTIONS_CACHE_SIZE', '10000')
+)
+SEEN_QUESTIONS_FLUSH_INTERVAL = int(
+    os.getenv('SEEN_QUESTIONS_FLUSH_INTERVAL', '30')
+)
+
+# Рейтинги ведутся в памяти и сохраняются в БД раз в
+# LEADERBOARD_CHECKPOINT_INTERVAL секунд
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', '10'))
+LEADERBOARD_CHECKPOINT_INTERVAL = int(
+    os.getenv('LEADERBOARD_CHECKPOINT_INTERVAL', '30')
+)
+
+# Статистика ответов (UserQuestionStatistic) пишется пачками: раз в
+# ANSWER_STATS_FLUSH_INTERVAL мс или после ANSWER_STATS_FLUSH_EVENTS ответов
+ANSWER_STATS_FLUSH_INTERVAL = int(
+    os.getenv('ANSWER_STATS_FLUSH_INTERVAL', '2000')
+)
+ANSWER_STATS_FLUSH_EVENTS = int(os.getenv('ANSWER_STATS_FLUSH_EVENTS', '500'))
+
+# Потоки для запросов бота к БД (database_sync_to_async). У каждого потока
+# своё соединение, поэтому это и число соединений одного процесса бота.
+# Загрузка пула пишется в лог раз в BOT_DB_STATS_INTERVAL секунд
+BOT_DB_THREADS = int(os.getenv('BOT_DB_THREADS', '8'))
+BOT_DB_STATS_INTERVAL = int(os.getenv('BOT_DB_STATS_INTERVAL', '60'))
+
+# Метрики Prometheus: представление /metrics (работает, только если задан
+# METRICS_TOKEN, и требует его) и отдельный порт процесса start_bot
+# на BOT_METRICS_HOST (0 — выключен). BOT_LOG_LEVEL — уровень логов start_bot
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+BOT_METRICS_PORT = int(os.getenv('BOT_METRICS_PORT', '0'))
+BOT_METRICS_HOST = os.getenv('BOT_METRICS_HOST', '127.0.0.1')
+BOT_LOG_LEVEL = os.getenv('BOT_LOG_LEVEL', 'WARNING')
+
+# Таблица похожих вопросов для подбора вариантов ответа (build_distractors)
+DISTRACTOR_NEIGHBOURS_PATH = os.getenv(
+    'DISTRACTOR_NEIGHBOURS_PATH',
+    os.path.join('data', 'distractor_neighbours.npz'),
+)
+
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
 
 CSRF_TRUSTED_ORIGINS = os.getenv('CSRF_TRUSTED_ORIGINS', '').split(',')
@@ -67,6 +175,18 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Постоянные соединения с БД: каждый поток держит своё соединение
+# DB_CONN_MAX_AGE секунд (0 — новое соединение на каждый запрос,
+# None — без ограничения) и проверяет его перед повторным использованием.
+# Процессы с ботом: uvicorn (сервис wsgi в docker compose: админка и
+# webhook с ботом в одном ASGI-процессе) или start_bot --workers (сервис
+# bot, у каждого воркера свой пул BOT_DB_THREADS). Переиспользуются
+# в основном соединения пула потоков бота: запросы админки под ASGI
+# Django выполняет каждый раз в новом потоке
+DB_CONN_MAX_AGE = os.getenv('DB_CONN_MAX_AGE', '300')
+DB_CONN_MAX_AGE = None if DB_CONN_MAX_AGE == 'None' else int(DB_CONN_MAX_AGE)
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -75,6 +195,8 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', 'postgres'),
         'HOST': os.getenv('POSTGRES_HOST', 'localhost'),
         'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
     }
 }
 
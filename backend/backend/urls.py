@@ -1,6 +1,10 @@
+from bot.views import metrics, telegram_webhook
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path(settings.TELEGRAM_WEBHOOK_PATH, telegram_webhook, name='webhook'),
+    path('metrics', metrics, name='metrics'),
 ]
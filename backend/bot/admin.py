@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import CustomUser, Question, Tag
+from .models import CustomUser, NotificationOutbox, Question, Tag
 
 
 @admin.register(CustomUser)
@@ -42,3 +42,19 @@ class QuestionAdmin(admin.ModelAdmin):
     autocomplete_fields = ('tags',)
     search_fields = ('name',)
     list_filter = ('tags',)
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        'chat_id',
+        'scheduled_for',
+        'status',
+        'attempts',
+        'delivered_at',
+        'last_error',
+    )
+    search_fields = ('chat_id',)
+    list_filter = ('status',)
+    empty_value_display = 'Не задано'
+    list_per_page = 50
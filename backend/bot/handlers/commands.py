@@ -4,9 +4,14 @@
 
 import logging
 
+from django.utils import timezone
 from telegram import KeyboardButton, ReplyKeyboardMarkup, Update
 from telegram.ext import CallbackContext, ContextTypes
 
+from bot.models import UserStatsRollup
+from bot.services.db_executor import database_sync_to_async
+from bot.services.quiz_stats import current_streak
+
 from .handlers import handle_quiz_start
 from .keyboards import menu_keyboard
 
@@ -67,3 +72,47 @@ async def quiz_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info('Запуск quiz_command')
 
     await handle_quiz_start(update, context)
+
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обработчик команды /stats"""
+
+    logger.info('Запуск stats_command')
+
+    if update.message is None or update.effective_user is None:
+        return
+
+    rollup = await database_sync_to_async(
+        UserStatsRollup.objects.filter(user_id=update.effective_user.id).first
+    )()
+    if rollup is None or not rollup.quizzes:
+        await update.message.reply_text(
+            'Статистики пока нет — пройдите викторину до конца!'
+        )
+        return
+
+    lines = [
+        '📊 Ваша статистика',
+        '',
+        f'Викторин завершено: {rollup.quizzes}',
+        f'Точность: {format_accuracy(rollup.correct, rollup.questions)}',
+        f'Серия: {current_streak(rollup, timezone.localdate())} дн. '
+        f'(лучшая: {rollup.best_streak})',
+        '',
+        'По темам:',
+    ]
+    for tag_slug, (quizzes, questions, correct) in sorted(
+        rollup.by_tag.items()
+    ):
+        lines.append(
+            f'• {tag_slug}: {format_accuracy(correct, questions)}, '
+            f'викторин: {quizzes}'
+        )
+    await update.message.reply_text('\n'.join(lines))
+
+
+def format_accuracy(correct: int, questions: int) -> str:
+    """Точность в процентах вида '75% (30 из 40)'."""
+
+    percent = round(100 * correct / questions) if questions else 0
+    return f'{percent}% ({correct} из {questions})'
@@ -1,69 +1,67 @@
 """Логика работы с контекстом"""
 
 import logging
+from time import monotonic
 from typing import List, Optional, Union
 
+from django.conf import settings
 from telegram import CallbackQuery, Update
 from telegram.ext import ContextTypes
 
+from bot.handlers import db_helpers
 from bot.models import Question
+from bot.services.quiz_sessions import SESSION_KEY, QuizSession
 
 logger = logging.getLogger(__name__)
 
+USER_CONTEXT_KEY = 'user_context'
 
-def get_next_question(
-    context: ContextTypes.DEFAULT_TYPE,
-) -> Union[Question, None]:
-    """
-    Получает вопрос, удаляет его из списка и
-    возвращает оставшееся количество вопросов.
-    """
 
-    logger.info(
-        'Получает вопрос, удаляет его из списка и '
-        'возвращает оставшееся количество вопросов.'
-    )
+def get_quiz_session(
+    context: ContextTypes.DEFAULT_TYPE,
+) -> Optional[QuizSession]:
+    """Возвращает текущую викторину из user_data."""
 
     if context.user_data is None:
         return None
+    return context.user_data.get(SESSION_KEY)
+
 
-    questions = context.user_data.get('quiz_questions', [])
+def is_quiz_active(context: ContextTypes.DEFAULT_TYPE) -> bool:
+    """Есть ли у пользователя незавершённая викторина."""
 
-    if questions:
-        next_question = questions.pop(0)
-        context.user_data['quiz_questions'] = questions
-        return next_question
-    return None
+    session = get_quiz_session(context)
+    return session is not None and not session.is_finished
 
 
 async def prepare_quiz_context(
-    context: ContextTypes.DEFAULT_TYPE, questions: List[Question]
-) -> None:
-    """Сохраняет данные викторины в user_data."""
+    context: ContextTypes.DEFAULT_TYPE,
+    questions: List[Question],
+    tag_slug: str,
+) -> Optional[QuizSession]:
+    """Сохраняет новую викторину в user_data."""
 
     logger.info('Сохраняет данные викторины в user_data.')
 
     if context.user_data is None:
         return None
 
-    context.user_data['quiz_questions'] = questions
-    context.user_data['used_names'] = [q.name for q in questions]
+    session = QuizSession((q.id for q in questions), tag_slug)
+    context.user_data[SESSION_KEY] = session
+    return session
 
 
 async def get_next_question_from_context(
     context: ContextTypes.DEFAULT_TYPE,
 ) -> Union[Question, None]:
-    """Извлекает следующий вопрос из контекста."""
+    """Переходит к следующему вопросу викторины и возвращает его."""
 
     logger.info('Получение следующего вопроса из контекста.')
 
-    if context.user_data is None:
+    session = get_quiz_session(context)
+    if session is None:
         return None
-
-    next_question = get_next_question(context)
-    if next_question:
-        context.user_data['current_question'] = next_question
-    return next_question
+    return session.advance()
 
 
 def get_callback_query(update: Update) -> Optional[CallbackQuery]:
@@ -75,3 +73,43 @@ def get_callback_query(update: Update) -> Optional[CallbackQuery]:
     if query is None:
         logger.warning('Callback_query отсутствует в update.')
     return query
+
+
+async def get_user_context(
+    context: ContextTypes.DEFAULT_TYPE, user_id: int, refresh: bool = False
+) -> db_helpers.UserContext:
+    """
+    Возвращает пользователя и его настройки из user_data.
+    Загружает их из БД, если их там нет, они старше USER_CONTEXT_TTL
+    секунд или запрошено обновление. Пока идёт викторина, срок не
+    проверяется: контекст, загруженный при её начале (refresh=True),
+    действует до конца викторины.
+    """
+
+    logger.info(f'Получение контекста пользователя {user_id}.')
+
+    user_data = context.user_data
+    if user_data is not None and not refresh:
+        cached = user_data.get(USER_CONTEXT_KEY)
+        if (
+            cached is not None
+            and cached.user_id == user_id
+            and (
+                is_quiz_active(context)
+                or monotonic() - cached.loaded_at < settings.USER_CONTEXT_TTL
+            )
+        ):
+            return cached
+
+    user_context = await db_helpers.load_user_context(user_id)
+    remember_user_context(context, user_context)
+    return user_context
+
+
+def remember_user_context(
+    context: ContextTypes.DEFAULT_TYPE, user_context: db_helpers.UserContext
+) -> None:
+    """Сохраняет контекст пользователя в user_data."""
+
+    if context.user_data is not None:
+        context.user_data[USER_CONTEXT_KEY] = user_context
@@ -1,13 +1,18 @@
 """Функции работы с БД"""
 
 import logging
-from typing import List, Tuple, Union
+from dataclasses import dataclass, field
+from datetime import time
+from time import monotonic
+from typing import Dict, List, Optional
 
-from asgiref.sync import sync_to_async
-from django.core.exceptions import ObjectDoesNotExist
+from django.conf import settings as django_settings
 
-from bot.handlers import utils
 from bot.models import CustomUser, Question, Tag, UserSettings
+from bot.services import spaced_repetition
+from bot.services.catalog import get_catalog
+from bot.services.db_executor import database_sync_to_async
+from bot.services.seen_questions import get_seen_questions
 
 logger = logging.getLogger(__name__)
 
@@ -17,92 +22,154 @@ DEFAULT_SETTINGS_USER = {
 }
 
 
-async def get_user_from_db(user_id: int) -> CustomUser | None:
-    """Получает пользователя из базы данных."""
+@dataclass(slots=True)
+class UserContext:
+    """
+    Поля пользователя и его настроек, нужные обработчикам, загруженные
+    одним запросом. Хранится в user_data (см. context_helpers) и
+    обновляется при изменении настроек; модели Django в нём не хранятся.
+    """
 
-    logger.info(f'Получение пользователя с id {user_id} из бд.')
+    user_id: int
+    # Первичный ключ CustomUser; None — пользователь не зарегистрирован
+    user_pk: Optional[int] = None
+    has_settings: bool = False
+    difficulty: str = DEFAULT_SETTINGS_USER['difficulty']
+    tag_slug: str = DEFAULT_SETTINGS_USER['tag']
+    tag_name: Optional[str] = None
+    notification: bool = False
+    notification_time: Optional[time] = None
+    loaded_at: float = field(default_factory=monotonic)
+
+    @property
+    def is_registered(self) -> bool:
+        return self.user_pk is not None
+
+    def apply_settings(self, settings: UserSettings) -> None:
+        """Копирует поля настроек (тема должна быть уже загружена)."""
+
+        tag = settings.tag
+        self.has_settings = True
+        self.difficulty = (
+            settings.difficulty or DEFAULT_SETTINGS_USER['difficulty']
+        )
+        self.tag_slug = tag.slug if tag else DEFAULT_SETTINGS_USER['tag']
+        self.tag_name = tag.name if tag else None
+        self.notification = settings.notification
+        self.notification_time = settings.notification_time
 
-    try:
-        return await sync_to_async(CustomUser.objects.get)(user_id=user_id)
-    except ObjectDoesNotExist:
-        logger.warning(f'Пользователь с id {user_id} в бд не найден.')
-        return None
-    except Exception as e:
-        logger.error(f'Ошибка при получении пользователя: {e}')
-        return None
 
+async def load_user_context(user_id: int) -> UserContext:
+    """
+    Загружает пользователя, его настройки и тему одним запросом
+    по Telegram ID, в том числе когда настроек ещё нет.
+    """
 
-async def get_or_create_user_settings(user: CustomUser) -> UserSettings:
-    """Получает или создаёт объект UserSettings для пользователя."""
+    logger.info(f'Загрузка пользователя {user_id} и его настроек из БД.')
 
-    logger.info(
-        f'Получение или создание настроек пользователя {user.id} из бд.'
+    user_context = await database_sync_to_async(fetch_user_context)(user_id)
+    if not user_context.is_registered:
+        logger.warning(f'Пользователь с id {user_id} в бд не найден.')
+    return user_context
+
+
+def fetch_user_context(user_id: int) -> UserContext:
+    user = (
+        CustomUser.objects.select_related('settings__tag')
+        .filter(user_id=user_id)
+        .first()
     )
+    if user is None:
+        return UserContext(user_id)
+    user_context = UserContext(user_id, user_pk=user.pk)
+    try:
+        user_context.apply_settings(user.settings)
+    except UserSettings.DoesNotExist:
+        pass
+    return user_context
 
-    settings, created = await sync_to_async(
-        UserSettings.objects.get_or_create
-    )(user=user)
+
+def save_user_settings(user_context: UserContext, fields: Dict) -> None:
+    """
+    Записывает поля настроек (создавая настройки при отсутствии)
+    и переносит результат в user_context.
+    """
+
+    settings, created = UserSettings.objects.update_or_create(
+        user_id=user_context.user_id, defaults=fields
+    )
     if created:
         logger.info(
-            f'Создан новый объект UserSettings для пользователя {user.id}.'
+            'Создан новый объект UserSettings для пользователя '
+            f'{user_context.user_id}.'
         )
-    return settings
+    user_context.apply_settings(settings)
 
 
-async def update_user_topic(settings: UserSettings, tag_name: str) -> bool:
-    """Обновляет тему в настройках пользователя."""
+async def update_user_settings(user_context: UserContext, **fields) -> None:
+    """Обновляет настройки пользователя в БД и в user_context."""
 
     logger.info(
-        f'Обновление темы в настройках пользователя {settings.user.id}.'
+        f'Обновление настроек пользователя {user_context.user_id}: '
+        f'{", ".join(fields) or "создание"}.'
     )
 
-    try:
-        tag = await sync_to_async(Tag.objects.get)(name=tag_name)
-        settings.tag = tag
-        await sync_to_async(settings.save)()
-        return True
-    except ObjectDoesNotExist:
-        logger.error(f'Тема "{tag_name}" отсутствует в базе данных.')
-        return False
+    await database_sync_to_async(save_user_settings)(user_context, fields)
 
 
-async def get_user_settings(
-    user_id: int,
-) -> Tuple[Union[UserSettings, dict], bool]:
-    """
-    Возвращает настройки пользователя.
-    Если пользователя нет в БД или в UserSettings,
-    возвращает глобальные настройки.
-    """
-
-    logger.info(f'Получение настроек пользователя с ID {user_id} из БД')
+def save_user_topic(user_context: UserContext, tag_name: str) -> bool:
+    tag = Tag.objects.filter(name=tag_name).first()
+    if tag is None:
+        return False
+    save_user_settings(user_context, {'tag': tag})
+    return True
 
-    try:
-        user = await CustomUser.objects.aget(user_id=user_id)
-        logger.info(f'Пользователь найден: {user.user_id}')
 
-    except CustomUser.DoesNotExist:
-        logger.warning(f'Пользователь с ID {user_id} не найден')
-        return DEFAULT_SETTINGS_USER, False
+async def update_user_topic(user_context: UserContext, tag_name: str) -> bool:
+    """Обновляет тему в настройках пользователя."""
 
-    try:
-        settings = await UserSettings.objects.select_related('tag').aget(
-            user=user
-        )
-        logger.info(f'Настройки для пользователя с ID {user_id} найдены')
-        return settings, True
+    logger.info(
+        f'Обновление темы в настройках пользователя {user_context.user_id}.'
+    )
 
-    except UserSettings.DoesNotExist:
-        logger.info(f'Настройки для пользователя с ID {user_id} не найдены')
-        return DEFAULT_SETTINGS_USER, False
+    if await database_sync_to_async(save_user_topic)(user_context, tag_name):
+        return True
+    logger.error(f'Тема "{tag_name}" отсутствует в базе данных.')
+    return False
 
 
-async def get_random_questions_by_tag(
-    count: int, tag_slug: str
+async def get_quiz_questions(
+    count: int, user_context: UserContext
 ) -> List[Question]:
-    """Получает случайные вопросы по указанному тегу."""
-
-    logger.info(f'Получение случайных вопросов по тегу {tag_slug}.')
+    """
+    Выбирает вопросы викторины по теме пользователя среди тех, что он
+    ещё не видел. В режиме spaced зарегистрированному пользователю
+    сначала попадаются вопросы, которые пора повторить.
+    """
 
-    queryset = Question.objects.filter(tags__slug=tag_slug)
-    return await utils.get_random_questions(queryset, count)
+    tag_slug = user_context.tag_slug
+    catalog = get_catalog()
+    await catalog.aensure_loaded()
+
+    due_ids: List[int] = []
+    if (
+        django_settings.QUIZ_SELECTION_MODE == 'spaced'
+        and user_context.is_registered
+    ):
+        logger.info(f'Выбор вопросов для повторения по тегу {tag_slug}.')
+        due_ids = await database_sync_to_async(
+            spaced_repetition.due_question_ids
+        )(user_context.user_pk, tag_slug, count)
+
+    logger.info(f'Выбор невиденных вопросов по тегу {tag_slug}.')
+    new_ids = await get_seen_questions().sample(
+        user_context.user_id,
+        catalog.question_ids(tag_slug),
+        count - len(due_ids),
+        exclude=due_ids,
+    )
+    return [
+        question
+        for question in map(catalog.get, due_ids + new_ids)
+        if question is not None
+    ]
@@ -5,8 +5,7 @@
 
 import logging
 
-from asgiref.sync import sync_to_async
-from telegram import Message, Update
+from telegram import CallbackQuery, Message, Update, User
 from telegram.ext import ContextTypes
 
 from bot.handlers import (
@@ -18,7 +17,13 @@ from bot.handlers import (
     quiz_helpers,
     utils,
 )
-from bot.models import CustomUser, UserSettings
+from bot.handlers.router import get_payload
+from bot.models import CustomUser
+from bot.services.answer_buttons import decode_answer
+from bot.services.answer_statistics import get_answer_statistics
+from bot.services.db_executor import database_sync_to_async
+from bot.services.leaderboard import get_leaderboards
+from bot.services.seen_questions import get_seen_questions
 
 from .keyboards import (
     complexity_keyboard,
@@ -29,6 +34,8 @@ from .keyboards import (
 
 logger = logging.getLogger(__name__)
 
+STALE_ANSWER_TEXT = 'Этот вопрос уже неактуален.'
+
 
 async def handle_config(
     update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -41,26 +48,26 @@ async def handle_config(
     if not query:
         return
 
-    user_id = query.from_user.id
-    settings, has_settings = await db_helpers.get_user_settings(user_id)
+    user_context = await context_helpers.get_user_context(
+        context, query.from_user.id, refresh=True
+    )
     keyboard = config_keyboard
 
-    if not has_settings:
+    if not user_context.has_settings:
         text = 'У вас пока нет сохраненных настроек.'
     else:
-        if isinstance(settings, UserSettings):
-            text = (
-                '📌 <b>Ваши настройки</b>\n\n'
-                '⚙️ <b>Сложность:</b> '
-                f'{settings.difficulty or "Не настроено"}\n'
-                '🎯 <b>Тема:</b> '
-                f'{settings.tag or "Не настроено"}\n'
-                '🔔 <b>Оповещение:</b> '
-                f'{"ВКЛ" if settings.notification else "ВЫКЛ"}\n'
-                '⏰ <b>Время оповещений:</b> '
-                f'{settings.notification_time.strftime("%H:%M")}\n\n'
-                '📢❗🚨 <b>Внимание: время по UTC</b> 📢❗🚨'
-            )
+        text = (
+            '📌 <b>Ваши настройки</b>\n\n'
+            '⚙️ <b>Сложность:</b> '
+            f'{user_context.difficulty}\n'
+            '🎯 <b>Тема:</b> '
+            f'{user_context.tag_name or "Не настроено"}\n'
+            '🔔 <b>Оповещение:</b> '
+            f'{"ВКЛ" if user_context.notification else "ВЫКЛ"}\n'
+            '⏰ <b>Время оповещений:</b> '
+            f'{user_context.notification_time.strftime("%H:%M")}\n\n'
+            '📢❗🚨 <b>Внимание: время по UTC</b> 📢❗🚨'
+        )
 
     await query.answer()
     await query.edit_message_text(
@@ -116,8 +123,8 @@ async def handle_topic_choice(
     await query.answer()
     tg_user = query.from_user
 
-    user = await db_helpers.get_user_from_db(tg_user.id)
-    if not user:
+    user_context = await context_helpers.get_user_context(context, tg_user.id)
+    if not user_context.is_registered:
         await utils.send_response_message(
             query, 'Вы не зарегистрированы.\nПожалуйста, пройдите регистрацию.'
         )
@@ -130,8 +137,9 @@ async def handle_topic_choice(
         )
         return
 
-    settings = await db_helpers.get_or_create_user_settings(user)
-    topic_updated = await db_helpers.update_user_topic(settings, chosen_topic)
+    topic_updated = await db_helpers.update_user_topic(
+        user_context, chosen_topic
+    )
 
     if not topic_updated:
         await utils.send_response_message(
@@ -176,12 +184,12 @@ async def handle_quiz_start(
         await update.message.reply_text('Не удалось определить пользователя.')
         return
 
-    user_id = update.effective_user.id
-    user_settings, has_personal_settings = await db_helpers.get_user_settings(
-        user_id
+    # Новая викторина — перечитываем настройки один раз на всю сессию
+    user_context = await context_helpers.get_user_context(
+        context, update.effective_user.id, refresh=True
     )
 
-    if not has_personal_settings:
+    if not user_context.has_settings:
         await update.message.reply_text(
             '❗ Вы можете настроить бота для себя!\n\n'
             'Используйте кнопку в меню:\n'
@@ -189,27 +197,14 @@ async def handle_quiz_start(
             'Для настройки бота необходимо:\n'
             '⚠️ "Зарегистрироваться" ⚠️'
         )
-        tag_slug = db_helpers.DEFAULT_SETTINGS_USER['tag']
+    tag_slug = user_context.tag_slug
 
-    else:
-        if isinstance(user_settings, UserSettings):
-            tag_slug = user_settings.tag.slug
-        else:
-            logger.warning(
-                f'Настройки пользователя с ID {user_id}'
-                f' некорректны: {user_settings}'
-            )
-            await update.message.reply_text('Ошибка при получении настроек.')
-            tag_slug = db_helpers.DEFAULT_SETTINGS_USER['tag']
-
-    random_questions = await db_helpers.get_random_questions_by_tag(
-        10, tag_slug=tag_slug
-    )
-    if not random_questions:
+    questions = await db_helpers.get_quiz_questions(10, user_context)
+    if not questions:
         await messages.send_no_questions_message(update)
         return
 
-    await context_helpers.prepare_quiz_context(context, random_questions)
+    await context_helpers.prepare_quiz_context(context, questions, tag_slug)
 
     next_question = await context_helpers.get_next_question_from_context(
         context
@@ -232,24 +227,40 @@ async def handle_question_answer(
     if not query:
         return
 
-    await query.answer()
-
     if context.user_data is None:
         logger.warning('context.user_data отсутствует.')
+        await query.answer()
         await query.edit_message_text('Ошибка: нет данных пользователя.')
         return
 
-    current_question = context.user_data.get('current_question')
+    # callback_data вида 'a:<кнопка>', см. bot.services.answer_buttons
+    button = decode_answer(get_payload(query.data))
+    session = context_helpers.get_quiz_session(context)
+    if button is None or session is None or not session.is_current(button):
+        logger.info(f'Ответ кнопкой старого вопроса: {query.data!r}.')
+        await query.answer(STALE_ANSWER_TEXT)
+        return
+
+    await query.answer()
+
+    current_question = session.current_question()
     if not current_question:
         await query.edit_message_text('Вопрос не найден.')
         return
 
-    user_answer = query.data  # Ответ пользователя из callback_data
+    is_correct = button.option == session.correct_option
+    user_answer = get_option_text(query, button.option)
 
-    if user_answer == current_question.name:
-        context.user_data['correct_answers'] = (
-            context.user_data.get('correct_answers', 0) + 1
-        )
+    if not session.record_answer(is_correct):
+        logger.info('Повторный ответ на тот же вопрос не засчитан.')
+        return
+    get_answer_statistics().record(
+        query.from_user.id, current_question.id, is_correct
+    )
+    get_seen_questions().mark(query.from_user.id, current_question.id)
+
+    if is_correct:
+        record_correct_answer(query.from_user, session.tag_slug)
         text = (
             '✅ Правильно! Отличная работа!\n\n'
             f'Название функции: {current_question.name}\n\n'
@@ -269,6 +280,27 @@ async def handle_question_answer(
     await handle_next_step(update, context)
 
 
+def record_correct_answer(user: User, tag_slug: str) -> None:
+    """
+    Начисляет очко в рейтингах за правильный ответ. Только в памяти:
+    рейтинги загружаются при запуске бота.
+    """
+
+    get_leaderboards().record_correct(
+        user.id, user.username or user.first_name, tag_slug
+    )
+
+
+def get_option_text(query: CallbackQuery, option: int) -> str:
+    """Текст варианта ответа option на клавиатуре сообщения."""
+
+    message = query.message
+    markup = message.reply_markup if isinstance(message, Message) else None
+    if markup is None or option >= len(markup.inline_keyboard):
+        return ''
+    return markup.inline_keyboard[option][0].text
+
+
 async def handle_next_step(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> None:
@@ -279,17 +311,10 @@ async def handle_next_step(
     if context.user_data is None:
         return None
 
-    if context.user_data and 'quiz_questions' in context.user_data:
-        next_question = (
-            context.user_data['quiz_questions'].pop(0)
-            if context.user_data['quiz_questions']
-            else None
-        )
-    else:
-        next_question = None
-
+    next_question = await context_helpers.get_next_question_from_context(
+        context
+    )
     if next_question:
-        context.user_data['current_question'] = next_question
         await quiz_helpers.ask_next_question(update, context)
     else:
         await quiz_helpers.finish_quiz(update, context)
@@ -339,9 +364,9 @@ async def handle_registration(
     telegram_id = update.effective_user.id
     username = update.effective_user.username
 
-    user, created = await sync_to_async(CustomUser.objects.get_or_create)(
-        user_id=telegram_id
-    )
+    user, created = await database_sync_to_async(
+        CustomUser.objects.get_or_create
+    )(user_id=telegram_id)
 
     if not isinstance(update.callback_query.message, Message):
         logger.warning('callback_query.message не является объектом Message.')
@@ -349,7 +374,10 @@ async def handle_registration(
 
     if created:
         user.username = username
-        await sync_to_async(user.save)()
+        await database_sync_to_async(user.save)()
+        context_helpers.remember_user_context(
+            context, db_helpers.UserContext(telegram_id, user_pk=user.pk)
+        )
         await update.callback_query.message.reply_text('Вы зарегистрированы!')
     else:
         await update.callback_query.message.reply_text(
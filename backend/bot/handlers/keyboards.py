@@ -21,6 +21,7 @@ menu_keyboard = InlineKeyboardMarkup(
                 'Зарегистрироваться', callback_data='registration'
             )
         ],
+        [InlineKeyboardButton('Рейтинг', callback_data='top:global')],
     ]
 )
 
@@ -91,3 +92,14 @@ notification_time_keyboard = InlineKeyboardMarkup(
         ]
     ]
 )
+
+# Клавиатура для переключения рейтингов
+leaderboard_keyboard = InlineKeyboardMarkup(
+    [
+        [
+            InlineKeyboardButton('Общий', callback_data='top:global'),
+            InlineKeyboardButton('По теме', callback_data='top:tag'),
+            InlineKeyboardButton('За неделю', callback_data='top:week'),
+        ],
+    ]
+)
@@ -0,0 +1,74 @@
+"""Обработчики рейтингов пользователей"""
+
+import logging
+
+from django.utils import timezone
+from telegram import Update
+from telegram.ext import ContextTypes
+
+from bot.handlers import context_helpers
+from bot.handlers.keyboards import leaderboard_keyboard
+from bot.handlers.router import get_payload
+from bot.services.leaderboard import (
+    GLOBAL_BOARD,
+    get_leaderboards,
+    tag_board,
+    week_board,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def handle_leaderboard(
+    update: Update, context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    """
+    Показывает рейтинг и место пользователя в нём.
+    callback_data: 'top:global', 'top:tag' или 'top:week'
+    """
+
+    logger.info('Запуск handle_leaderboard')
+
+    query = context_helpers.get_callback_query(update)
+    if not query:
+        return
+
+    await query.answer()
+
+    user_id = query.from_user.id
+    kind = get_payload(query.data)
+    if kind == 'tag':
+        user_context = await context_helpers.get_user_context(context, user_id)
+        board = tag_board(user_context.tag_slug)
+        title = f'🏆 Рейтинг по теме «{user_context.tag_slug}»'
+    elif kind == 'week':
+        board = week_board(timezone.now())
+        title = '🏆 Рейтинг за неделю'
+    else:
+        board = GLOBAL_BOARD
+        title = '🏆 Общий рейтинг'
+
+    leaderboards = get_leaderboards()
+    await leaderboards.aensure_loaded()
+    leaderboard = leaderboards.get(board)
+
+    lines = [title, '']
+    top = leaderboard.top()
+    if not top:
+        lines.append('Пока никто не набрал очков.')
+    for place, (top_user_id, score) in enumerate(top, start=1):
+        lines.append(f'{place}. {leaderboards.name(top_user_id)} — {score}')
+
+    rank = leaderboard.rank(user_id)
+    lines.append('')
+    if rank is None:
+        lines.append('Ответьте правильно на вопрос, чтобы попасть в рейтинг.')
+    else:
+        lines.append(
+            f'Ваше место: {rank} из {len(leaderboard)} '
+            f'(очков: {leaderboard.score(user_id)})'
+        )
+
+    await query.edit_message_text(
+        '\n'.join(lines), reply_markup=leaderboard_keyboard
+    )
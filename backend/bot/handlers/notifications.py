@@ -2,7 +2,6 @@ import logging
 from datetime import datetime
 from typing import Optional
 
-from asgiref.sync import sync_to_async
 from telegram import Message, Update
 from telegram.ext import ContextTypes
 
@@ -24,32 +23,32 @@ async def handle_notification_toggle(
 
     await query.answer()
 
-    user_id = query.from_user.id
-    user = await db_helpers.get_user_from_db(user_id)
+    user_context = await context_helpers.get_user_context(
+        context, query.from_user.id
+    )
 
-    if not user:
+    if not user_context.is_registered:
         await utils.send_response_message(
             query, 'Вы не зарегистрированы.\nПожалуйста, пройдите регистрацию.'
         )
         return
 
-    settings = await db_helpers.get_or_create_user_settings(user)
-
+    fields = {}
     if query.data == 'notifications_on':
-        settings.notification = True
+        fields['notification'] = True
         await query.edit_message_text(
             text='🔔 Уведомления включены!',
             reply_markup=keyboards.notification_time_keyboard,
         )
 
     elif query.data == 'notifications_off':
-        settings.notification = False
+        fields['notification'] = False
         await query.edit_message_text(
             text='🔕 Уведомления отключены.',
             reply_markup=keyboards.config_keyboard,
         )
 
-    await sync_to_async(settings.save)()
+    await db_helpers.update_user_settings(user_context, **fields)
     await query.answer()
 
 
@@ -93,20 +92,20 @@ async def handle_notification_time_input(
     if message is None or message.text is None or message.from_user is None:
         return
 
-    user_id: int = message.from_user.id
-    user = await db_helpers.get_user_from_db(user_id)
-    if not user:
+    user_context = await context_helpers.get_user_context(
+        context, message.from_user.id
+    )
+    if not user_context.is_registered:
         await message.reply_text(
             'Вы не зарегистрированы.\nПожалуйста, пройдите регистрацию.'
         )
         return
 
-    settings = await db_helpers.get_or_create_user_settings(user)
-
     try:
         notification_time = datetime.strptime(message.text, '%H:%M').time()
-        settings.notification_time = notification_time
-        await sync_to_async(settings.save)()
+        await db_helpers.update_user_settings(
+            user_context, notification_time=notification_time
+        )
 
         await message.reply_text(
             'Время уведомлений установлено на '
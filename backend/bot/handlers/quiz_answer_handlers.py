@@ -3,7 +3,9 @@ import logging
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from bot.handlers import handlers
+from bot.handlers import context_helpers, handlers
+from bot.services.answer_statistics import get_answer_statistics
+from bot.services.seen_questions import get_seen_questions
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +28,8 @@ async def handle_text_answer(
         logger.warning('update.message отсутствует.')
         return
 
-    current_question = context.user_data.get('current_question')
+    session = context_helpers.get_quiz_session(context)
+    current_question = session.current_question() if session else None
     if not current_question:
         await update.message.reply_text('Вопрос не найден.')
         return
@@ -36,11 +39,24 @@ async def handle_text_answer(
         return
 
     user_answer = update.message.text.strip()
+    is_correct = user_answer == current_question.name
 
-    if user_answer == current_question.name:
-        context.user_data['correct_answers'] = (
-            context.user_data.get('correct_answers', 0) + 1
+    if not session.record_answer(is_correct):
+        logger.info('Повторный ответ на тот же вопрос не засчитан.')
+        return
+    if update.effective_user is not None:
+        get_answer_statistics().record(
+            update.effective_user.id, current_question.id, is_correct
+        )
+        get_seen_questions().mark(
+            update.effective_user.id, current_question.id
         )
+        if is_correct:
+            handlers.record_correct_answer(
+                update.effective_user, session.tag_slug
+            )
+
+    if is_correct:
         text = (
             '✅ Правильно! Отличная работа!\n\n'
             f'Название функции: {current_question.name}\n\n'
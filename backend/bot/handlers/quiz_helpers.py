@@ -10,33 +10,59 @@ from telegram import (
 )
 from telegram.ext import ContextTypes
 
-from bot.handlers import db_helpers, utils
+from bot.handlers import context_helpers, db_helpers
+from bot.handlers.router import ANSWER_PREFIX, make_callback_data
 from bot.handlers.static_data import STICKERS
+from bot.services.answer_buttons import encode_answer
+from bot.services.catalog import get_catalog
+from bot.services.db_executor import database_sync_to_async
+from bot.services.quiz_sessions import QuizSession
+from bot.services.quiz_stats import record_quiz_result
 
 logger = logging.getLogger(__name__)
 
 
 async def get_incorrect_answers(
-    current_question, all_names: List[str], num_answers: int
+    current_question, tag_slug: str, num_answers: int
 ) -> List[str]:
-    """Возвращает случайные неправильные ответы для текущего вопроса."""
+    """
+    Возвращает случайные неправильные ответы для текущего вопроса
+    из той же темы, что и вопрос.
+    """
 
     logger.info(
         'Возвращает случайные неправильные ответы для текущего вопроса.'
     )
 
-    return random.sample(all_names, k=min(num_answers, len(all_names)))
+    catalog = get_catalog()
+    await catalog.aensure_loaded()
+    return catalog.distractors.sample(
+        tag_slug, current_question.name, num_answers, current_question.id
+    )
 
 
-async def create_keyboard(options: List[str]) -> InlineKeyboardMarkup:
-    """Создает клавиатуру для выбора ответа."""
+async def create_keyboard(
+    options: List[str], session: QuizSession
+) -> InlineKeyboardMarkup:
+    """
+    Создает клавиатуру для выбора ответа. В callback_data кнопок
+    передаётся номер варианта (см. bot.services.answer_buttons).
+    """
 
     logger.info('Создание клавиатуры для выбора ответа.')
 
     return InlineKeyboardMarkup(
         [
-            [InlineKeyboardButton(option, callback_data=option)]
-            for option in options
+            [
+                InlineKeyboardButton(
+                    option,
+                    callback_data=make_callback_data(
+                        ANSWER_PREFIX,
+                        encode_answer(session.answer_button(index)),
+                    ),
+                )
+            ]
+            for index, option in enumerate(options)
         ]
         + [
             [
@@ -101,6 +127,36 @@ async def send_hard_question_message(
         )
 
 
+async def send_easy_question(
+    update: Update, context: ContextTypes.DEFAULT_TYPE, current_question
+) -> None:
+    """Отправляет вопрос режима Easy с вариантами ответа."""
+
+    logger.info('Отправка вопроса в режиме Easy.')
+
+    session = context_helpers.get_quiz_session(context)
+    if session is None:
+        return
+
+    incorrect_answers = await get_incorrect_answers(
+        current_question, session.tag_slug, 3
+    )
+    if len(incorrect_answers) < 3:
+        logger.warning(
+            f'Недостаточно неправильных вариантов для вопроса {
+                current_question.id
+            }.'
+        )
+    # Собираем правильный и неправильные варианты, перемешиваем
+    options = [current_question.name] + incorrect_answers
+    random.shuffle(options)
+    session.correct_option = options.index(current_question.name)
+    keyboard = await create_keyboard(options, session)
+    await send_question_message(
+        update, current_question, session.remaining, keyboard
+    )
+
+
 async def ask_next_question(
     update: Update, context: ContextTypes.DEFAULT_TYPE
 ) -> None:
@@ -117,7 +173,8 @@ async def ask_next_question(
         logger.warning('context.user_data отсутствует.')
         return
 
-    current_question = context.user_data.get('current_question')
+    session = context_helpers.get_quiz_session(context)
+    current_question = session.current_question() if session else None
     if not current_question:
         logger.warning('Попытка задать вопрос, но вопрос не найден.')
         if update.message:
@@ -130,37 +187,22 @@ async def ask_next_question(
         logger.warning('update.effective_user отсутствует.')
         return
 
-    user_id = update.effective_user.id
-    user_settings, _ = await db_helpers.get_user_settings(user_id)
-
-    if isinstance(user_settings, dict):
-        difficulty = user_settings.get('difficulty', 'easy')
+    # Настройки читаются из user_data: в БД за ними ходим
+    # не чаще одного раза за викторину
+    user_context = await context_helpers.get_user_context(
+        context, update.effective_user.id
+    )
+    if user_context.has_settings:
+        difficulty = user_context.difficulty
     else:
-        difficulty = user_settings.difficulty if user_settings else 'easy'
+        difficulty = context.user_data.get(
+            'difficulty', db_helpers.DEFAULT_SETTINGS_USER['difficulty']
+        )
 
     if difficulty == 'easy':
-        all_names = await utils.get_all_names_except(current_question.id)
-        num_incorrect_answers = min(3, len(all_names))
-        if num_incorrect_answers < 3:
-            logger.warning(
-                f'Недостаточно неправильных вариантов для вопроса {
-                    current_question.id
-                }.'
-            )
-        incorrect_answers = await get_incorrect_answers(
-            current_question, all_names, num_incorrect_answers
-        )
-        # Собираем правильный и неправильные варианты, перемешиваем
-        options = [current_question.name] + incorrect_answers
-        random.shuffle(options)
-        keyboard = await create_keyboard(options)
-        remaining_questions = len(context.user_data.get('quiz_questions', []))
-        await send_question_message(
-            update, current_question, remaining_questions, keyboard
-        )
+        await send_easy_question(update, context, current_question)
     elif difficulty == 'hard':
         logger.info(f'Режим викторины: {difficulty} в обработке.')
-        remaining_questions = len(context.user_data.get('quiz_questions', []))
 
         keyboard = InlineKeyboardMarkup(
             [
@@ -172,7 +214,7 @@ async def ask_next_question(
             ]
         )
         await send_hard_question_message(
-            update, current_question, remaining_questions, keyboard
+            update, current_question, session.remaining, keyboard
         )
 
     else:
@@ -180,24 +222,7 @@ async def ask_next_question(
             f'Неизвестный режим: {difficulty}. Используем режим Easy.'
         )
         # Если режим неизвестен – используем логику Easy
-        all_names = await utils.get_all_names_except(current_question.id)
-        num_incorrect_answers = min(3, len(all_names))
-        if num_incorrect_answers < 3:
-            logger.warning(
-                f'Недостаточно неправильных вариантов для вопроса {
-                    current_question.id
-                }.'
-            )
-        incorrect_answers = await get_incorrect_answers(
-            current_question, all_names, num_incorrect_answers
-        )
-        options = [current_question.name] + incorrect_answers
-        random.shuffle(options)
-        keyboard = await create_keyboard(options)
-        remaining_questions = len(context.user_data.get('quiz_questions', []))
-        await send_question_message(
-            update, current_question, remaining_questions, keyboard
-        )
+        await send_easy_question(update, context, current_question)
 
 
 async def finish_quiz(
@@ -214,7 +239,16 @@ async def finish_quiz(
         logger.warning('context.user_data отсутствует.')
         return
 
-    correct_answers = context.user_data.get('correct_answers', 0)
+    session = context_helpers.get_quiz_session(context)
+    correct_answers = session.correct if session else 0
+
+    if session is not None and update.effective_user is not None:
+        await database_sync_to_async(record_quiz_result)(
+            update.effective_user.id,
+            session.tag_slug,
+            session.answers.bit_count(),
+            correct_answers,
+        )
 
     message = update.message or (
         update.callback_query.message if update.callback_query else None
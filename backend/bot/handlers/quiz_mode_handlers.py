@@ -1,10 +1,9 @@
 import logging
 
-from asgiref.sync import sync_to_async
 from telegram import Update
 from telegram.ext import ContextTypes
 
-from bot.handlers import db_helpers, keyboards
+from bot.handlers import context_helpers, db_helpers, keyboards
 
 logger = logging.getLogger(__name__)
 
@@ -35,20 +34,16 @@ async def handle_quiz_mode_selection(
         await query.edit_message_text('Неизвестный режим.')
         return
 
-    user_id = query.from_user.id
-    user_settings, has_settings = await db_helpers.get_user_settings(user_id)
-
-    # if not has_settings:
-    #     await query.edit_message_text(
-    #         'Ошибка: настройки пользователя не найдены.'
-    #     )
-    #     return
+    user_context = await context_helpers.get_user_context(
+        context, query.from_user.id
+    )
 
-    if isinstance(user_settings, dict):
-        user_settings['difficulty'] = new_mode
-    else:
-        user_settings.difficulty = new_mode
-        await sync_to_async(user_settings.save)()
+    # user_context — тот же объект, что в кэше user_data, поэтому
+    # изменение сразу видно следующим обработчикам
+    if user_context.has_settings:
+        await db_helpers.update_user_settings(
+            user_context, difficulty=new_mode
+        )
 
     if context.user_data is not None:
         context.user_data['difficulty'] = new_mode
@@ -0,0 +1,111 @@
+"""
+Маршрутизация callback-запросов inline-кнопок.
+
+Вместо цепочки CallbackQueryHandler с регулярными выражениями, которые
+проверяются по очереди для каждого нажатия, все callback-запросы
+принимает один обработчик и выбирает функцию поиском в словаре.
+
+Формат callback_data:
+    '<ключ>'             — кнопки меню ('conf', 'notify', ...);
+    '<префикс>:<данные>' — кнопки с параметром (ответы викторины).
+
+Неизвестные данные (например, кнопки из старых версий бота) не
+передаются ни одному обработчику: пользователю показывается
+уведомление, а запрос записывается в лог.
+"""
+
+import logging
+from typing import Any, Callable, Coroutine, Dict, Optional
+
+from telegram import Update
+from telegram.ext import ContextTypes
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[
+    [Update, ContextTypes.DEFAULT_TYPE], Coroutine[Any, Any, None]
+]
+
+SEPARATOR = ':'
+
+# Префикс кнопок с вариантами ответа викторины
+ANSWER_PREFIX = 'a'
+# Префикс кнопок рейтингов: 'top:global', 'top:tag', 'top:week'
+LEADERBOARD_PREFIX = 'top'
+
+UNKNOWN_CALLBACK_TEXT = 'Кнопка устарела, откройте меню заново.'
+
+
+def make_callback_data(prefix: str, payload: str) -> str:
+    """Собирает callback_data вида '<префикс>:<данные>'."""
+
+    return f'{prefix}{SEPARATOR}{payload}'
+
+
+def get_payload(data: str) -> str:
+    """Возвращает данные после префикса callback_data."""
+
+    return data.partition(SEPARATOR)[2]
+
+
+class CallbackRouter:
+    """Выбирает обработчик callback-запроса по ключу или префиксу."""
+
+    def __init__(
+        self, wrap: Optional[Callable[[Callback], Callback]] = None
+    ) -> None:
+        # wrap применяется к каждому обработчику при регистрации
+        self._wrap = wrap
+        self._exact: Dict[str, Callback] = {}
+        self._prefixed: Dict[str, Callback] = {}
+
+    def add(self, key: str, callback: Callback) -> None:
+        """Регистрирует обработчик для callback_data, равного key."""
+
+        self._check_free(key, self._exact)
+        self._exact[key] = self._wrapped(callback)
+
+    def add_prefix(self, prefix: str, callback: Callback) -> None:
+        """Регистрирует обработчик для callback_data '<prefix>:...'."""
+
+        if SEPARATOR in prefix:
+            raise ValueError(f'Префикс не может содержать {SEPARATOR!r}')
+        self._check_free(prefix, self._prefixed)
+        self._prefixed[prefix] = self._wrapped(callback)
+
+    def _wrapped(self, callback: Callback) -> Callback:
+        return self._wrap(callback) if self._wrap else callback
+
+    @staticmethod
+    def _check_free(key: str, routes: Dict[str, Callback]) -> None:
+        if key in routes:
+            raise ValueError(f'Маршрут {key!r} уже зарегистрирован')
+
+    def resolve(self, data: Optional[str]) -> Optional[Callback]:
+        """Возвращает обработчик для callback_data или None."""
+
+        if not data:
+            return None
+        callback = self._exact.get(data)
+        if callback is None:
+            prefix, separator, _ = data.partition(SEPARATOR)
+            if separator:
+                callback = self._prefixed.get(prefix)
+        return callback
+
+    async def dispatch(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        """Обработчик для CallbackQueryHandler без pattern."""
+
+        query = update.callback_query
+        if query is None:
+            return
+
+        callback = self.resolve(query.data)
+        if callback is None:
+            logger.warning(f'Неизвестный callback_data: {query.data!r}')
+            await query.answer(UNKNOWN_CALLBACK_TEXT)
+            return
+
+        await callback(update, context)
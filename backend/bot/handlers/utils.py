@@ -4,17 +4,20 @@
 """
 
 import logging
-import random
 from datetime import datetime, timezone
 
-from asgiref.sync import sync_to_async
 from telegram import (
     CallbackQuery,
     Message,
 )
 from telegram.ext import CallbackContext
 
-from bot.models import Question, UserSettings
+from bot.services.db_executor import database_sync_to_async
+from bot.services.notification_outbox import (
+    deliver_notifications,
+    purge_notifications,
+    schedule_due_notifications,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -24,74 +27,35 @@ TOPIC_MAPPING = {
 }
 
 
+def seconds_to_next_minute(moment: datetime | None = None) -> float:
+    """Сколько секунд осталось до начала следующей минуты."""
+
+    moment = moment or datetime.now(timezone.utc)
+    return 60 - moment.second - moment.microsecond / 1_000_000
+
+
 async def daily_task(context: CallbackContext) -> None:
     """
-    Ежедневная задача, отправляющая напоминание пользователям
-    с включенными уведомлениями.
+    Ежедневная задача, планирующая напоминания пользователям
+    с включенными уведомлениями. Запускается раз в минуту и ставит
+    в очередь NotificationOutbox тех, чьё время уведомления приходится
+    на текущую (или пропущенную) минуту. Отправкой занимается
+    deliver_notifications.
     """
 
     logger.info('Запуск daily_task')
 
-    users_with_notifications = await sync_to_async(
-        lambda: list(
-            UserSettings.objects.filter(notification=True).select_related(
-                'user'
-            )
-        )
-    )()
-
-    for settings in users_with_notifications:
-        user = settings.user
-        notification_time = settings.notification_time
-
-        now_utc = datetime.now(timezone.utc).time()
-        if (
-            now_utc.hour == notification_time.hour
-            and now_utc.minute == notification_time.minute
-        ):
-            try:
-                await context.bot.send_message(
-                    chat_id=user.user_id, text='Не забудь повторить теорию!'
-                )
-                logger.info(
-                    f'Уведомление отправлено пользователю {user.user_id}.'
-                )
-            except Exception as e:
-                logger.error(
-                    'Ошибка при отправке уведомления'
-                    f' пользователю {user.user_id}: {e}'
-                )
-
-
-@sync_to_async
-def get_random_questions(queryset, count: int) -> list:
-    """Получение случайных вопросов из QuerySet."""
-
-    logger.info(f'Получение {count} случайных вопросов из QuerySet.')
-
-    ids = list(queryset.values_list('id', flat=True))
-    selected_ids = random.sample(ids, min(count, len(ids)))
-    return list(queryset.filter(id__in=selected_ids))
-
-
-@sync_to_async
-def get_all_names_except(excluded_ids: list | int) -> list:
-    """Получение всех значений поля name, исключая переданные id."""
-
-    logger.info('Получение всех значений поля name, исключая переданные id.')
-
-    # Преобразуем одиночное значение в список
-    if isinstance(excluded_ids, int):
-        excluded_ids = [excluded_ids]
-
-    if not isinstance(excluded_ids, (list, int)):
-        raise ValueError('excluded_ids должен быть int или list[int]')
-
-    return list(
-        Question.objects.exclude(id__in=excluded_ids).values_list(
-            'name', flat=True
-        )
-    )
+    now_utc = datetime.now(timezone.utc)
+    created = await database_sync_to_async(schedule_due_notifications)(now_utc)
+    if created:
+        logger.info(f'В очередь добавлено уведомлений: {created}.')
+        # Не ждём следующего запуска задачи отправки
+        context.job_queue.run_once(deliver_notifications, 0)
+
+    if now_utc.minute == 0:
+        deleted = await database_sync_to_async(purge_notifications)(now_utc)
+        if deleted:
+            logger.info(f'Из очереди удалено старых уведомлений: {deleted}.')
 
 
 async def get_chosen_topic(query: CallbackQuery) -> str | None:
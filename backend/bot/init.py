@@ -1,14 +1,265 @@
 import logging
+from typing import Optional, Tuple
 
 from django.conf import settings
-from telegram.ext import ApplicationBuilder
+from telegram.ext import (
+    Application,
+    ApplicationBuilder,
+    CallbackQueryHandler,
+    CommandHandler,
+    MessageHandler,
+    filters,
+)
+
+from bot.handlers import (
+    commands,
+    handlers,
+    leaderboard,
+    notifications,
+    quiz_mode_handlers,
+    utils,
+)
+from bot.handlers.router import (
+    ANSWER_PREFIX,
+    LEADERBOARD_PREFIX,
+    CallbackRouter,
+)
+from bot.services.answer_statistics import (
+    flush_answer_statistics,
+    get_answer_statistics,
+)
+from bot.services.catalog import refresh_catalog
+from bot.services.db_executor import log_db_executor_stats
+from bot.services.leaderboard import (
+    checkpoint_leaderboards,
+    get_leaderboards,
+)
+from bot.services.metrics import (
+    InstrumentedRequest,
+    instrument_handler,
+    start_metrics_server,
+)
+from bot.services.notification_outbox import (
+    WORKERS_KEY,
+    deliver_notifications,
+)
+from bot.services.quiz_sessions import QuizSessionPersistence
+from bot.services.seen_questions import (
+    flush_seen_questions,
+    get_seen_questions,
+)
+from bot.services.update_processor import PerUserUpdateProcessor
 
 logger = logging.getLogger(__name__)
 
 
-def get_bot_application():
-    """Создает и возвращает экземпляр Telegram Bot Application."""
+async def flush_on_shutdown(application: Application) -> None:
+    """
+    Дописывает статистику ответов, показанные вопросы и рейтинги
+    при остановке бота.
+    """
+
+    await get_answer_statistics().flush()
+    await get_seen_questions().flush()
+    await get_leaderboards().checkpoint()
+
+
+async def prepare_bot(application: Application) -> None:
+    """
+    Подготовка start_bot перед приёмом обновлений: загрузка рейтингов
+    (ответ на вопрос не ждёт их загрузки из БД) и порт метрик
+    BOT_METRICS_PORT.
+    """
+
+    await get_leaderboards().aensure_loaded()
+    if settings.BOT_METRICS_PORT:
+        await start_metrics_server(
+            settings.BOT_METRICS_PORT, settings.BOT_METRICS_HOST
+        )
+
+
+def get_bot_application(shard: Optional[Tuple[int, int]] = None):
+    """
+    Создает и возвращает экземпляр Telegram Bot Application.
+    shard — (номер воркера, число воркеров) в режиме нескольких процессов.
+    """
 
     logger.info('Создание экземпляра Telegram Bot Application')
 
-    return ApplicationBuilder().token(settings.TELEGRAM_TOKEN).build()
+    builder = (
+        ApplicationBuilder()
+        .token(settings.TELEGRAM_TOKEN)
+        # Вызовы Bot API учитываются в метриках; размер пула соединений
+        # как у запроса, который ApplicationBuilder создаёт по умолчанию
+        .request(InstrumentedRequest(connection_pool_size=256))
+        .persistence(QuizSessionPersistence.from_settings(shard))
+        .post_shutdown(flush_on_shutdown)
+    )
+    if shard is None:
+        # post_init вызывается только в run_polling/run_webhook (start_bot);
+        # воркеры и ASGI-процесс готовятся сами (bot.supervisor, bot.webhook)
+        builder.post_init(prepare_bot)
+    if settings.BOT_CONCURRENT_UPDATES > 1:
+        builder.concurrent_updates(
+            PerUserUpdateProcessor(settings.BOT_CONCURRENT_UPDATES)
+        )
+    return builder.build()
+
+
+def register_handlers(application: Application) -> None:
+    """
+    Добавляет обработчики команд, сообщений и callback запросов.
+    Каждый обработчик обёрнут сбором метрик (instrument_handler).
+    """
+
+    # Обработчики команд
+    application.add_handler(
+        CommandHandler('start', instrument_handler(commands.start))
+    )
+    application.add_handler(
+        CommandHandler('stats', instrument_handler(commands.stats_command))
+    )
+
+    # Обработчики Reply кнопок
+    application.add_handler(
+        MessageHandler(
+            filters.TEXT & filters.Regex('^Меню$'),
+            instrument_handler(commands.menu_command),
+        )
+    )
+    application.add_handler(
+        MessageHandler(
+            filters.TEXT & filters.Regex('^Викторина$'),
+            instrument_handler(commands.quiz_command),
+        )
+    )
+    application.add_handler(
+        MessageHandler(
+            filters.TEXT & filters.Regex('^Бросить кубик$'),
+            instrument_handler(commands.roll_dice_command),
+        )
+    )
+
+    # Обработчики текстовых сообщений
+    application.add_handler(
+        MessageHandler(
+            filters.TEXT & ~filters.COMMAND,
+            instrument_handler(handlers.handle_user_input),
+        )
+    )
+
+    # Все callback запросы проходят через один маршрутизатор
+    application.add_handler(
+        CallbackQueryHandler(build_callback_router().dispatch)
+    )
+
+
+def build_callback_router() -> CallbackRouter:
+    """Создает маршрутизатор callback запросов inline-кнопок."""
+
+    router = CallbackRouter(wrap=instrument_handler)
+    router.add('conf', handlers.handle_config)
+    router.add('complexity', handlers.handle_complexity)
+    router.add('topic', handlers.handle_topic_selection)
+    router.add('notify', handlers.handle_notifications_settings)
+    router.add('question', handlers.handle_quiz_start)
+    router.add('registration', handlers.handle_registration)
+    router.add('end', handlers.handle_end)
+    router.add('func', handlers.handle_topic_choice)
+    router.add('expressions', handlers.handle_topic_choice)
+    router.add('notifications_on', notifications.handle_notification_toggle)
+    router.add('notifications_off', notifications.handle_notification_toggle)
+    router.add(
+        'set_notification_time', notifications.handle_set_notification_time
+    )
+    router.add('quiz_mode_easy', quiz_mode_handlers.handle_quiz_mode_selection)
+    router.add('quiz_mode_hard', quiz_mode_handlers.handle_quiz_mode_selection)
+    router.add_prefix(ANSWER_PREFIX, handlers.handle_question_answer)
+    router.add_prefix(LEADERBOARD_PREFIX, leaderboard.handle_leaderboard)
+
+    # Заглушка для функций, которые еще не реализованы
+    router.add('not_implemented', handlers.handle_generic_callback)
+    return router
+
+
+def schedule_jobs(application: Application, daily: bool = True) -> None:
+    """
+    Планирует периодические задачи бота. daily=False — без daily_task:
+    очередь уведомлений заполняет только один из воркеров, а отправляют
+    из неё все.
+    """
+
+    # Настройка очереди заданий
+    job_queue = application.job_queue
+
+    if daily:
+        # Планирование ежедневной задачи
+        job_queue.run_repeating(
+            utils.daily_task,
+            interval=60,
+            first=utils.seconds_to_next_minute(),
+            name='daily_task',
+        )
+
+    # Отправка уведомлений из очереди (NotificationOutbox); строки
+    # разбираются под блокировкой, так что воркеры не отправят одно
+    # уведомление дважды
+    job_queue.run_repeating(
+        deliver_notifications,
+        interval=settings.NOTIFICATION_DELIVERY_INTERVAL,
+        first=settings.NOTIFICATION_DELIVERY_INTERVAL,
+        name='deliver_notifications',
+    )
+
+    # Запись накопленной статистики ответов
+    job_queue.run_repeating(
+        flush_answer_statistics,
+        interval=settings.ANSWER_STATS_FLUSH_INTERVAL / 1000,
+        first=settings.ANSWER_STATS_FLUSH_INTERVAL / 1000,
+        name='flush_answer_statistics',
+    )
+
+    # Запись масок показанных вопросов
+    job_queue.run_repeating(
+        flush_seen_questions,
+        interval=settings.SEEN_QUESTIONS_FLUSH_INTERVAL,
+        first=settings.SEEN_QUESTIONS_FLUSH_INTERVAL,
+        name='flush_seen_questions',
+    )
+
+    # Сохранение рейтингов и подхват изменений других процессов
+    job_queue.run_repeating(
+        checkpoint_leaderboards,
+        interval=settings.LEADERBOARD_CHECKPOINT_INTERVAL,
+        first=settings.LEADERBOARD_CHECKPOINT_INTERVAL,
+        name='checkpoint_leaderboards',
+    )
+
+    # Подхват изменений каталога вопросов, сделанных в других процессах
+    job_queue.run_repeating(
+        refresh_catalog,
+        interval=settings.CATALOG_REFRESH_INTERVAL,
+        first=settings.CATALOG_REFRESH_INTERVAL,
+        name='refresh_catalog',
+    )
+
+    # Загрузка пула потоков БД: видно, упирается ли бот в соединения
+    job_queue.run_repeating(
+        log_db_executor_stats,
+        interval=settings.BOT_DB_STATS_INTERVAL,
+        first=settings.BOT_DB_STATS_INTERVAL,
+        name='log_db_executor_stats',
+    )
+
+
+def build_application(
+    shard: Optional[Tuple[int, int]] = None,
+) -> Application:
+    """Создает Application с обработчиками и задачами."""
+
+    application = get_bot_application(shard)
+    register_handlers(application)
+    if shard is not None:
+        application.bot_data[WORKERS_KEY] = shard[1]
+    schedule_jobs(application, daily=shard is None or shard[0] == 0)
+    return application
@@ -0,0 +1,117 @@
+"""
+Бенчмарк выбора обработчика callback-запроса: прежняя цепочка
+CallbackQueryHandler с регулярными выражениями против CallbackRouter.
+
+Замеряется только выбор обработчика (check_update и поиск маршрута),
+сами обработчики не вызываются.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from telegram import Update
+from telegram.ext import CallbackQueryHandler
+
+from bot.handlers.router import ANSWER_PREFIX, make_callback_data
+from bot.init import build_callback_router
+from bot.services.answer_buttons import AnswerButton, encode_answer
+
+# Паттерны прежней регистрации в порядке проверки
+LEGACY_PATTERNS = [
+    '^conf$',
+    '^complexity$',
+    '^topic$',
+    '^notify$',
+    '^question$',
+    '^registration$',
+    '^end$',
+    '^(func|expressions)$',
+    '^(notifications_on|notifications_off)$',
+    '^set_notification_time$',
+    '^quiz_mode_',
+    '^(?!not_implemented).*',
+    'not_implemented',
+]
+
+# Нажатия кнопок: большая часть — ответы на вопросы викторины
+SAMPLE_DATA = [
+    *(
+        make_callback_data(ANSWER_PREFIX, encode_answer(AnswerButton(1, 1, 0)))
+        for _ in range(8)
+    ),
+    'end',
+    'conf',
+    'notifications_on',
+    'not_implemented',
+]
+
+
+async def noop(update, context) -> None:
+    return None
+
+
+def make_update(update_id: int, data: str) -> Update:
+    user = {'id': 1, 'is_bot': False, 'first_name': 'Тест'}
+    return Update.de_json(
+        {
+            'update_id': update_id,
+            'callback_query': {
+                'id': str(update_id),
+                'from': user,
+                'chat_instance': '1',
+                'data': data,
+            },
+        },
+        None,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает стоимость выбора обработчика callback-запроса.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20_000,
+            help='Сколько раз прогнать набор нажатий.',
+        )
+
+    def handle(self, *args, **options):
+        updates = [
+            make_update(index, data) for index, data in enumerate(SAMPLE_DATA)
+        ]
+        iterations = options['iterations']
+        total = iterations * len(updates)
+
+        legacy = [
+            CallbackQueryHandler(noop, pattern=pattern)
+            for pattern in LEGACY_PATTERNS
+        ]
+
+        def legacy_dispatch(update):
+            # Application проверяет обработчики группы по очереди
+            for handler in legacy:
+                if handler.check_update(update):
+                    return handler.callback
+            return None
+
+        router = build_callback_router()
+        entry = CallbackQueryHandler(router.dispatch)
+
+        def router_dispatch(update):
+            if entry.check_update(update):
+                return router.resolve(update.callback_query.data)
+            return None
+
+        self.stdout.write(f'{"способ":>12} {"мкс/обновление":>16}')
+        for name, dispatch in (
+            ('регулярки', legacy_dispatch),
+            ('словарь', router_dispatch),
+        ):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                for update in updates:
+                    dispatch(update)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'{name:>12} {elapsed * 1e6 / total:>16.3f}')
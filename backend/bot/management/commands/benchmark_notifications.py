@@ -0,0 +1,130 @@
+"""
+Бенчмарк выборки получателей уведомлений: полный проход по всем
+пользователям с уведомлениями против выборки по минуте через индекс.
+
+Тестовые данные создаются внутри транзакции и откатываются в конце.
+"""
+
+import time as time_module
+from datetime import datetime, time, timedelta, timezone
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from bot.models import CustomUser, UserSettings
+from bot.services.notification_outbox import get_due_chat_ids_queryset
+
+# Telegram ID тестовых пользователей начинаются с этого значения
+FAKE_USER_ID_OFFSET = 9_000_000_000
+MINUTES_PER_DAY = 24 * 60
+
+
+class Rollback(Exception):
+    """Откатывает транзакцию с тестовыми данными."""
+
+
+def legacy_due_chat_ids(moment: datetime) -> list:
+    """Прежний алгоритм daily_task: все строки в память, фильтр в Python."""
+
+    now = moment.time()
+    return [
+        settings.user.user_id
+        for settings in UserSettings.objects.filter(
+            notification=True
+        ).select_related('user')
+        if settings.notification_time.hour == now.hour
+        and settings.notification_time.minute == now.minute
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает стоимость одного тика рассылки уведомлений '
+        'при разном числе пользователей.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1_000, 10_000, 100_000],
+            help='Количество пользователей с уведомлениями.',
+        )
+        parser.add_argument(
+            '--ticks',
+            type=int,
+            default=10,
+            help='Сколько тиков (минут) замерять для каждого размера.',
+        )
+        parser.add_argument(
+            '--skip-legacy',
+            action='store_true',
+            help='Не замерять прежний алгоритм (он медленный).',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"пользователей":>14} {"получателей":>12} '
+            f'{"полный проход, мс":>18} {"по индексу, мс":>15}'
+        )
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    self.populate(size)
+                    self.report(size, options['ticks'], options)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def populate(self, size: int) -> None:
+        """Создаёт пользователей с равномерно распределённым временем."""
+
+        batch_size = 5_000
+        for start in range(0, size, batch_size):
+            stop = min(start + batch_size, size)
+            users = CustomUser.objects.bulk_create(
+                CustomUser(user_id=FAKE_USER_ID_OFFSET + index)
+                for index in range(start, stop)
+            )
+            UserSettings.objects.bulk_create(
+                UserSettings(
+                    user=user,
+                    tag=None,
+                    notification=True,
+                    notification_time=time(
+                        (index % MINUTES_PER_DAY) // 60, index % 60
+                    ),
+                )
+                for index, user in zip(range(start, stop), users)
+            )
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {UserSettings._meta.db_table}')
+
+    def report(self, size: int, ticks: int, options) -> None:
+        """Замеряет среднее время тика для обоих алгоритмов."""
+
+        moments = [
+            datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=i)
+            for i in range(ticks)
+        ]
+
+        started = time_module.perf_counter()
+        recipients = 0
+        for moment in moments:
+            recipients += len(list(get_due_chat_ids_queryset(moment)))
+        indexed_ms = (time_module.perf_counter() - started) * 1000 / ticks
+
+        legacy = '—'
+        if not options['skip_legacy']:
+            started = time_module.perf_counter()
+            for moment in moments:
+                legacy_due_chat_ids(moment)
+            legacy_ms = (time_module.perf_counter() - started) * 1000 / ticks
+            legacy = f'{legacy_ms:.2f}'
+
+        self.stdout.write(
+            f'{size:>14} {recipients // ticks:>12} '
+            f'{legacy:>18} {indexed_ms:>15.2f}'
+        )
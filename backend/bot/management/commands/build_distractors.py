@@ -0,0 +1,92 @@
+"""
+Офлайн-построение таблицы похожих вопросов для подбора вариантов ответа.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from bot.models import Question
+from bot.services.catalog import bump_catalog_version
+from bot.services.similarity import (
+    DEFAULT_DIM,
+    DEFAULT_TOP_K,
+    NeighbourTable,
+    QuestionText,
+    build_neighbour_table,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит таблицу похожих вопросов (TF-IDF по символьным n-граммам) '
+        'для подбора правдоподобных неправильных ответов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=settings.DISTRACTOR_NEIGHBOURS_PATH,
+            help='Файл таблицы соседей (.npz).',
+        )
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=DEFAULT_TOP_K,
+            help='Сколько соседей хранить для каждого вопроса.',
+        )
+        parser.add_argument(
+            '--dim',
+            type=int,
+            default=DEFAULT_DIM,
+            help='Размерность хешированного пространства n-грамм.',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать таблицу целиком, а не только изменения.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        started = time.perf_counter()
+
+        questions = [
+            QuestionText(question_id, name, description, syntax or '')
+            for question_id, name, description, syntax in (
+                Question.objects.values_list(
+                    'id', 'name', 'description', 'syntax'
+                )
+            )
+        ]
+        if not questions:
+            self.stderr.write(self.style.WARNING('Вопросов в базе нет.'))
+            return
+
+        previous = None if options['full'] else NeighbourTable.load(path)
+        table, stats = build_neighbour_table(
+            questions,
+            previous=previous,
+            k=options['top_k'],
+            dim=options['dim'],
+            full=options['full'],
+        )
+
+        if not stats.full and not stats.changed and not stats.removed:
+            self.stdout.write('Изменений нет, таблица актуальна.')
+            return
+
+        table.save(path)
+        bump_catalog_version()
+
+        elapsed = time.perf_counter() - started
+        mode = 'полная' if stats.full else 'инкрементальная'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Таблица соседей сохранена в {path} ({mode} сборка): '
+                f'вопросов {stats.total}, изменено {stats.changed}, '
+                f'удалено {stats.removed}, пересчитано строк '
+                f'{stats.recomputed}, {elapsed:.2f} с.'
+            )
+        )
@@ -0,0 +1,145 @@
+"""
+Локальный нагрузочный тест режима нескольких воркеров.
+
+Синтетические обновления Telegram в виде тел запросов webhook подаются
+в Supervisor.feed — тот же путь, что у родителя start_bot --workers N:
+разбор JSON, выбор воркера, передача в очередь. Каждый воркер собирает
+Update, клавиатуру ответа и выполняет work-ms миллисекунд вычислений
+вместо обработчика. Сеть и БД не используются, поэтому тест показывает
+масштабирование CPU-части обработки. Рядом с пропускной способностью
+выводится загрузка родителя (процессорное время на разбор и передачу
+в очереди к длительности замера): при загрузке около 100% узким местом
+становится родитель, а не воркеры.
+"""
+
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+
+from bot.supervisor import Supervisor, mp_context
+
+USERS = 10_000
+
+
+def make_update(update_id: int, user_id: int) -> dict:
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id),
+            'chat_instance': str(user_id),
+            'data': 'func_0',
+            'from': {'id': user_id, 'is_bot': False, 'first_name': 'Тест'},
+        },
+    }
+
+
+def loadtest_worker(
+    index: int, workers: int, queue, results, work_ms: float
+) -> None:
+    """Воркер нагрузочного теста: обрабатывает обновления до None."""
+
+    results.put('ready')
+    processed = 0
+    while True:
+        data = queue.get()
+        if data is None:
+            break
+        update = Update.de_json(data, None)
+        keyboard = InlineKeyboardMarkup(
+            [
+                [InlineKeyboardButton(f'func_{i}', callback_data=f'a:{i}')]
+                for i in range(4)
+            ]
+        )
+        keyboard.to_json()
+        deadline = time.perf_counter() + work_ms / 1000
+        while time.perf_counter() < deadline:
+            pass
+        processed += update.update_id > 0
+    results.put(processed)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет пропускную способность обработки обновлений '
+        'при разном числе процессов-воркеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            nargs='+',
+            default=[1, 2, 4],
+            help='Число воркеров для каждого замера.',
+        )
+        parser.add_argument(
+            '--updates',
+            type=int,
+            default=5_000,
+            help='Число обновлений в замере.',
+        )
+        parser.add_argument(
+            '--work-ms',
+            type=float,
+            default=1.0,
+            help='Время работы обработчика на одно обновление, мс.',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        bodies = [
+            json.dumps(
+                make_update(index + 1, rng.randrange(1, USERS))
+            ).encode()
+            for index in range(options['updates'])
+        ]
+
+        self.stdout.write(
+            f'{"воркеров":>9} {"обновлений/с":>13} {"ускорение":>10} '
+            f'{"родитель":>9} {"мкс/обн.":>9}'
+        )
+        baseline = None
+        for workers in options['workers']:
+            rate, parent_cpu, elapsed = self.measure(
+                bodies, workers, options['work_ms']
+            )
+            baseline = baseline or rate
+            self.stdout.write(
+                f'{workers:>9} {rate:>13.0f} {rate / baseline:>9.2f}x '
+                f'{parent_cpu / elapsed:>8.0%} '
+                f'{parent_cpu / len(bodies) * 1e6:>9.1f}'
+            )
+
+    def measure(self, bodies, workers: int, work_ms: float):
+        """
+        Прогоняет обновления через workers процессов. Возвращает RPS,
+        процессорное время родителя и длительность замера.
+        """
+
+        results = mp_context.Queue()
+        supervisor = Supervisor(
+            workers, target=loadtest_worker, args=(results, work_ms)
+        )
+        supervisor.start()
+        for _ in range(workers):
+            results.get()
+
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        for body in bodies:
+            supervisor.feed(body)
+        for queue in supervisor.queues:
+            queue.put(None)
+        processed = sum(results.get() for _ in range(workers))
+        elapsed = time.perf_counter() - started
+        # Включает поток, передающий данные в очереди multiprocessing
+        parent_cpu = time.process_time() - cpu_started
+
+        for process in supervisor.processes:
+            process.join()
+        assert processed == len(bodies)
+        return len(bodies) / elapsed, parent_cpu, elapsed
@@ -0,0 +1,21 @@
+"""Пересчёт сводной статистики пользователей из истории викторин."""
+
+from django.core.management.base import BaseCommand
+
+from bot.services.quiz_stats import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает UserStatsRollup по истории QuizResult.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Размер пачки при чтении истории и записи сводок.',
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_rollups(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Пересчитано сводок: {count}.'))
@@ -0,0 +1,44 @@
+"""
+Регистрация webhook в Telegram для режима, в котором бот работает
+внутри ASGI-приложения (BOT_RUN_IN_ASGI).
+"""
+
+import asyncio
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from dotenv import load_dotenv
+from telegram import Bot
+
+load_dotenv()
+
+
+class Command(BaseCommand):
+    help = 'Регистрирует WEBHOOK_URL с секретным токеном в Telegram.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--drop-pending',
+            action='store_true',
+            help='Отбросить обновления, накопившиеся до регистрации.',
+        )
+
+    def handle(self, *args, **options):
+        webhook_url = os.getenv('WEBHOOK_URL')
+        if not webhook_url:
+            raise CommandError('WEBHOOK_URL не установлен!')
+        if not settings.TELEGRAM_WEBHOOK_SECRET:
+            raise CommandError('TELEGRAM_WEBHOOK_SECRET не установлен!')
+
+        async def set_webhook() -> bool:
+            async with Bot(settings.TELEGRAM_TOKEN) as bot:
+                return await bot.set_webhook(
+                    webhook_url,
+                    secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+                    drop_pending_updates=options['drop_pending'],
+                )
+
+        if not asyncio.run(set_webhook()):
+            raise CommandError('Ошибка при установке Webhook!')
+        self.stdout.write(f'Webhook успешно установлен: {webhook_url}')
@@ -0,0 +1,97 @@
+"""
+Синхронизация вопросов с CSV-файлом.
+
+Заменяет populate_questions и populate_questions_prod: путь к файлу
+передаётся аргументом, существующие вопросы обновляются, если
+изменились описание, синтаксис или теги.
+"""
+
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bot.services.question_sync import QuestionSync
+
+# Сколько имён выводить в отчёте для каждого вида изменения
+REPORT_LIMIT = 20
+
+
+class Command(BaseCommand):
+    help = 'Синхронизирует таблицу Question с CSV-файлом вопросов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default=os.path.join('data', 'questions.csv'),
+            help='Путь к CSV-файлу (по умолчанию data/questions.csv).',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Удалить вопросы, которых нет в файле.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк CSV записывать за раз.',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Выполнить синхронизацию и откатить её, показав отчёт.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден!')
+
+        sync = QuestionSync(
+            batch_size=options['batch_size'],
+            prune=options['prune'],
+            dry_run=options['dry_run'],
+        )
+        with open(path, mode='r', encoding='utf-8', newline='') as file:
+            report = sync.run(file)
+
+        for row in report.invalid:
+            self.stderr.write(
+                self.style.WARNING(
+                    f'Пропуск строки: {row} (отсутствует обязательное поле)'
+                )
+            )
+        for tag_name in sorted(report.missing_tags):
+            self.stderr.write(
+                self.style.WARNING(f'Тег "{tag_name}" не найден. Пропуск.')
+            )
+
+        for sign, names in (
+            ('+', report.created),
+            ('~', report.updated),
+            ('-', report.deleted),
+        ):
+            for name in names[:REPORT_LIMIT]:
+                self.stdout.write(f'{sign} {name}')
+            if len(names) > REPORT_LIMIT:
+                self.stdout.write(f'{sign} … ещё {len(names) - REPORT_LIMIT}')
+
+        self.stdout.write(
+            f'Строк: {report.rows}, добавлено: {len(report.created)}, '
+            f'обновлено: {len(report.updated)}, '
+            f'удалено: {len(report.deleted)}, '
+            f'без изменений: {report.unchanged}.'
+        )
+        if options['dry_run']:
+            self.stdout.write(
+                self.style.WARNING('Пробный запуск: изменения отменены.')
+            )
+        elif report.changed:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    'Синхронизация завершена, каталог обновлён.'
+                )
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS('Изменений нет.'))
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.9 on 2026-10-18 12:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0009_catalogversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usersettings',
+            index=models.Index(condition=models.Q(('notification', True)), fields=['notification_time'], name='usersettings_notify_time_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.0.9 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0010_usersettings_notify_time_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationScheduleState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_minute', models.DateTimeField(blank=True, null=True, verbose_name='Последняя минута')),
+            ],
+            options={
+                'verbose_name': 'Состояние планировщика уведомлений',
+                'verbose_name_plural': 'Состояние планировщика уведомлений',
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.BigIntegerField(verbose_name='Telegram ID')),
+                ('scheduled_for', models.DateTimeField(verbose_name='Минута отправки')),
+                ('text', models.TextField(verbose_name='Текст')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('sending', 'Отправляется'), ('delivered', 'Доставлено'), ('failed', 'Ошибка')], default='pending', max_length=16, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('next_attempt_at', models.DateTimeField(verbose_name='Следующая попытка')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='Захвачено до')),
+                ('delivered_at', models.DateTimeField(blank=True, null=True, verbose_name='Доставлено')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Последняя ошибка')),
+            ],
+            options={
+                'verbose_name': 'Уведомление в очереди',
+                'verbose_name_plural': 'Очередь уведомлений',
+                'indexes': [models.Index(condition=models.Q(('status__in', ['pending', 'sending'])), fields=['next_attempt_at'], name='outbox_due_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='notificationoutbox',
+            constraint=models.UniqueConstraint(fields=('chat_id', 'scheduled_for'), name='unique_chat_minute'),
+        ),
+    ]
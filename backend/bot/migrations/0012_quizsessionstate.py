@@ -0,0 +1,28 @@
+# Generated by Django 5.0.9 on 2026-10-18 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0011_notificationoutbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizSessionState',
+            fields=[
+                ('user_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Telegram ID')),
+                ('question_ids', models.BinaryField(verbose_name='ID вопросов')),
+                ('position', models.PositiveSmallIntegerField(default=0, verbose_name='Позиция')),
+                ('correct', models.PositiveSmallIntegerField(default=0, verbose_name='Правильных ответов')),
+                ('tag_slug', models.CharField(blank=True, default='', max_length=32, verbose_name='Тема')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Состояние викторины',
+                'verbose_name_plural': 'Состояния викторин',
+            },
+        ),
+    ]
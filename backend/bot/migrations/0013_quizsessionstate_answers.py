@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0012_quizsessionstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsessionstate',
+            name='answers',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Маска отвеченных вопросов'),
+        ),
+    ]
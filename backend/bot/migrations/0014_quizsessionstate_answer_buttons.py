@@ -0,0 +1,23 @@
+# Generated by Django 5.0.9 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0013_quizsessionstate_answers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizsessionstate',
+            name='correct_option',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Номер правильного варианта'),
+        ),
+        migrations.AddField(
+            model_name='quizsessionstate',
+            name='session_id',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='ID викторины'),
+        ),
+    ]
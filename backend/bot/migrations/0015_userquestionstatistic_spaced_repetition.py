@@ -0,0 +1,37 @@
+# Generated by Django 5.0.9 on 2026-10-18 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0014_quizsessionstate_answer_buttons'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userquestionstatistic',
+            name='due_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Повторить после'),
+        ),
+        migrations.AddField(
+            model_name='userquestionstatistic',
+            name='ease_factor',
+            field=models.FloatField(default=2.5, verbose_name='Коэффициент лёгкости'),
+        ),
+        migrations.AddField(
+            model_name='userquestionstatistic',
+            name='interval',
+            field=models.PositiveIntegerField(default=0, verbose_name='Интервал повторения (дней)'),
+        ),
+        migrations.AddField(
+            model_name='userquestionstatistic',
+            name='repetitions',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Успешных повторений подряд'),
+        ),
+        migrations.AddIndex(
+            model_name='userquestionstatistic',
+            index=models.Index(fields=['user', 'due_at'], name='stat_user_due_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.9 on 2026-10-18 12:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0015_userquestionstatistic_spaced_repetition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=64, verbose_name='Рейтинг')),
+                ('user_id', models.BigIntegerField(verbose_name='Telegram ID')),
+                ('name', models.CharField(blank=True, default='', max_length=150, verbose_name='Имя')),
+                ('score', models.PositiveIntegerField(default=0, verbose_name='Очки')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Очки в рейтинге',
+                'verbose_name_plural': 'Очки в рейтингах',
+                'indexes': [models.Index(fields=['updated_at'], name='leaderboard_updated_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardscore',
+            constraint=models.UniqueConstraint(fields=('board', 'user_id'), name='unique_board_user'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.9 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0016_leaderboardscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStatsRollup',
+            fields=[
+                ('user_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Telegram ID')),
+                ('quizzes', models.PositiveIntegerField(default=0, verbose_name='Викторин завершено')),
+                ('questions', models.PositiveIntegerField(default=0, verbose_name='Ответов')),
+                ('correct', models.PositiveIntegerField(default=0, verbose_name='Правильных ответов')),
+                ('streak', models.PositiveIntegerField(default=0, verbose_name='Дней подряд')),
+                ('best_streak', models.PositiveIntegerField(default=0, verbose_name='Лучшая серия')),
+                ('last_quiz_date', models.DateField(blank=True, null=True, verbose_name='Дата последней викторины')),
+                ('by_tag', models.JSONField(default=dict, verbose_name='По темам')),
+            ],
+            options={
+                'verbose_name': 'Сводная статистика',
+                'verbose_name_plural': 'Сводная статистика',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.BigIntegerField(verbose_name='Telegram ID')),
+                ('tag_slug', models.CharField(max_length=32, verbose_name='Тема')),
+                ('total', models.PositiveSmallIntegerField(verbose_name='Ответов')),
+                ('correct', models.PositiveSmallIntegerField(verbose_name='Правильных ответов')),
+                ('finished_at', models.DateTimeField(verbose_name='Завершена')),
+            ],
+            options={
+                'verbose_name': 'Результат викторины',
+                'verbose_name_plural': 'Результаты викторин',
+                'indexes': [models.Index(fields=['user_id', 'finished_at'], name='quizresult_user_finished_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.9 on 2026-10-18 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0017_quiz_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=32, verbose_name='Хеш содержимого'),
+        ),
+    ]
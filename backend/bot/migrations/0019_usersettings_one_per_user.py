@@ -0,0 +1,103 @@
+"""
+UserSettings: одна строка на пользователя с первичным ключом по
+Telegram ID (CustomUser.user_id).
+
+Таблица пересоздаётся: старый внешний ключ хранил CustomUser.id, новый
+хранит Telegram ID. Из нескольких строк одного пользователя остаётся
+самая ранняя — её и загружали обработчики бота.
+"""
+
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def copy_settings(apps, schema_editor):
+    OldSettings = apps.get_model('bot', 'UserSettings')
+    NewSettings = apps.get_model('bot', 'UserSettingsNew')
+
+    seen = set()
+    batch = []
+    rows = OldSettings.objects.order_by('user_id', 'id').values(
+        'user__user_id',
+        'tag_id',
+        'difficulty',
+        'notification',
+        'notification_time',
+    )
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        telegram_id = row.pop('user__user_id')
+        if telegram_id in seen:
+            continue
+        seen.add(telegram_id)
+        batch.append(NewSettings(user_id=telegram_id, **row))
+        if len(batch) >= BATCH_SIZE:
+            NewSettings.objects.bulk_create(batch)
+            batch = []
+    NewSettings.objects.bulk_create(batch)
+
+
+def copy_settings_back(apps, schema_editor):
+    CustomUser = apps.get_model('bot', 'CustomUser')
+    OldSettings = apps.get_model('bot', 'UserSettings')
+    NewSettings = apps.get_model('bot', 'UserSettingsNew')
+
+    user_pks = dict(CustomUser.objects.values_list('user_id', 'id'))
+    OldSettings.objects.bulk_create(
+        (
+            OldSettings(
+                user_id=user_pks[row.pop('user_id')],
+                **row,
+            )
+            for row in NewSettings.objects.values(
+                'user_id',
+                'tag_id',
+                'difficulty',
+                'notification',
+                'notification_time',
+            ).iterator(chunk_size=BATCH_SIZE)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0018_question_content_hash'),
+    ]
+
+    operations = [
+        # Имя индекса должно освободиться до создания новой таблицы
+        migrations.RemoveIndex(
+            model_name='usersettings',
+            name='usersettings_notify_time_idx',
+        ),
+        migrations.CreateModel(
+            name='UserSettingsNew',
+            fields=[
+                ('user', models.OneToOneField(db_column='user_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='settings', serialize=False, to=settings.AUTH_USER_MODEL, to_field='user_id')),
+                ('tag', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='bot.tag', verbose_name='Тема')),
+                ('difficulty', models.CharField(blank=True, default='easy', max_length=20, null=True, verbose_name='Уровень сложности')),
+                ('notification', models.BooleanField(default=False, verbose_name='Состояние уведомлений')),
+                ('notification_time', models.TimeField(blank=True, default=datetime.time(7, 0), verbose_name='Время уведомлений')),
+            ],
+            options={
+                'verbose_name': 'Настройки',
+                'verbose_name_plural': 'Настройки',
+                'indexes': [models.Index(condition=models.Q(('notification', True)), fields=['notification_time'], name='usersettings_notify_time_idx')],
+            },
+        ),
+        migrations.RunPython(copy_settings, copy_settings_back),
+        migrations.DeleteModel(
+            name='UserSettings',
+        ),
+        migrations.RenameModel(
+            old_name='UserSettingsNew',
+            new_name='UserSettings',
+        ),
+    ]
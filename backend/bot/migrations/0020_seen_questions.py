@@ -0,0 +1,25 @@
+# Generated by Django 5.0.9 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bot', '0019_usersettings_one_per_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeenQuestions',
+            fields=[
+                ('user_id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='Telegram ID')),
+                ('bits', models.BinaryField(default=b'', verbose_name='Маска вопросов')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Обновлено')),
+            ],
+            options={
+                'verbose_name': 'Показанные вопросы',
+                'verbose_name_plural': 'Показанные вопросы',
+            },
+        ),
+    ]
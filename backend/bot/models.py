@@ -56,6 +56,10 @@ class Question(models.Model):
     tags = models.ManyToManyField(
         Tag, related_name='questions_python', verbose_name='Теги'
     )
+    # Хеш описания, синтаксиса и тегов из файла вопросов (sync_questions)
+    content_hash = models.CharField(
+        max_length=32, blank=True, default='', verbose_name='Хеш содержимого'
+    )
 
     class Meta:
         verbose_name = 'Вопрос'
@@ -66,15 +70,21 @@ class Question(models.Model):
 
 
 class UserSettings(models.Model):
-    user = models.ForeignKey(
-        CustomUser, on_delete=models.CASCADE, related_name='settings'
+    # Одна строка на пользователя с ключом по Telegram ID: настройки
+    # загружаются по id из обновления, без запроса CustomUser
+    user = models.OneToOneField(
+        CustomUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        to_field='user_id',
+        db_column='user_id',
+        related_name='settings',
     )
     tag = models.ForeignKey(
         Tag,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
-        default=1,
         verbose_name='Тема',
     )
     difficulty = models.CharField(
@@ -94,9 +104,12 @@ class UserSettings(models.Model):
     class Meta:
         verbose_name = 'Настройки'
         verbose_name_plural = 'Настройки'
-        constraints = [
-            models.UniqueConstraint(
-                fields=['user', 'tag'], name='unique_user_tag'
+        indexes = [
+            # Выборка получателей уведомлений за конкретную минуту
+            models.Index(
+                fields=['notification_time'],
+                condition=models.Q(notification=True),
+                name='usersettings_notify_time_idx',
             )
         ]
 
@@ -115,6 +128,19 @@ class UserQuestionStatistic(models.Model):
     correct_attempts = models.IntegerField(default=0)
     last_attempt = models.DateTimeField(null=True, blank=True)
     rating = models.FloatField(default=0)
+    # Интервальное повторение (bot.services.spaced_repetition)
+    ease_factor = models.FloatField(
+        default=2.5, verbose_name='Коэффициент лёгкости'
+    )
+    interval = models.PositiveIntegerField(
+        default=0, verbose_name='Интервал повторения (дней)'
+    )
+    repetitions = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Успешных повторений подряд'
+    )
+    due_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Повторить после'
+    )
 
     class Meta:
         constraints = [
@@ -122,8 +148,253 @@ class UserQuestionStatistic(models.Model):
                 fields=['user', 'question'], name='unique_user_question'
             )
         ]
+        indexes = [
+            # Вопросы пользователя, которые пора повторить
+            models.Index(fields=['user', 'due_at'], name='stat_user_due_idx')
+        ]
 
     def __str__(self):
         return (
             f'Статистика пользователя {self.user} по вопросу {self.question}'
         )
+
+
+class CatalogVersion(models.Model):
+    """
+    Версия каталога вопросов. Хранится одной строкой и увеличивается
+    при любом изменении вопросов или тегов, чтобы процессы бота
+    перезагружали свой кэш каталога.
+    """
+
+    version = models.PositiveBigIntegerField(default=0, verbose_name='Версия')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменено')
+
+    class Meta:
+        verbose_name = 'Версия каталога'
+        verbose_name_plural = 'Версия каталога'
+
+    def __str__(self):
+        return f'Версия каталога {self.version}'
+
+
+class NotificationOutbox(models.Model):
+    """
+    Очередь уведомлений к отправке. Планировщик добавляет строки на каждую
+    минуту, воркеры бота забирают их пачками через SELECT ... FOR UPDATE
+    SKIP LOCKED, поэтому воркеров может быть несколько.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        SENDING = 'sending', 'Отправляется'
+        DELIVERED = 'delivered', 'Доставлено'
+        FAILED = 'failed', 'Ошибка'
+
+    chat_id = models.BigIntegerField(verbose_name='Telegram ID')
+    scheduled_for = models.DateTimeField(verbose_name='Минута отправки')
+    text = models.TextField(verbose_name='Текст')
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Попыток'
+    )
+    next_attempt_at = models.DateTimeField(verbose_name='Следующая попытка')
+    locked_until = models.DateTimeField(
+        null=True, blank=True, verbose_name='Захвачено до'
+    )
+    delivered_at = models.DateTimeField(
+        null=True, blank=True, verbose_name='Доставлено'
+    )
+    last_error = models.TextField(
+        blank=True, default='', verbose_name='Последняя ошибка'
+    )
+
+    class Meta:
+        verbose_name = 'Уведомление в очереди'
+        verbose_name_plural = 'Очередь уведомлений'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['chat_id', 'scheduled_for'], name='unique_chat_minute'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                condition=models.Q(status__in=['pending', 'sending']),
+                name='outbox_due_idx',
+            )
+        ]
+
+    def __str__(self):
+        return f'Уведомление {self.chat_id} на {self.scheduled_for}'
+
+
+class NotificationScheduleState(models.Model):
+    """
+    Последняя минута, за которую планировщик уже поставил уведомления
+    в очередь. Одна строка, блокируется на время планирования.
+    """
+
+    last_minute = models.DateTimeField(
+        null=True, blank=True, verbose_name='Последняя минута'
+    )
+
+    class Meta:
+        verbose_name = 'Состояние планировщика уведомлений'
+        verbose_name_plural = 'Состояние планировщика уведомлений'
+
+    def __str__(self):
+        return f'Уведомления запланированы до {self.last_minute}'
+
+
+class QuizSessionState(models.Model):
+    """
+    Незавершённая викторина пользователя: id вопросов, позиция, счёт
+    и маска отвеченных вопросов. Сами вопросы берутся из каталога.
+    """
+
+    user_id = models.BigIntegerField(
+        primary_key=True, verbose_name='Telegram ID'
+    )
+    question_ids = models.BinaryField(verbose_name='ID вопросов')
+    position = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Позиция'
+    )
+    correct = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Правильных ответов'
+    )
+    answers = models.PositiveBigIntegerField(
+        default=0, verbose_name='Маска отвеченных вопросов'
+    )
+    tag_slug = models.CharField(
+        max_length=32, blank=True, default='', verbose_name='Тема'
+    )
+    session_id = models.PositiveBigIntegerField(
+        default=0, verbose_name='ID викторины'
+    )
+    correct_option = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Номер правильного варианта'
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Обновлено')
+
+    class Meta:
+        verbose_name = 'Состояние викторины'
+        verbose_name_plural = 'Состояния викторин'
+
+    def __str__(self):
+        return f'Викторина {self.user_id}: вопрос {self.position}'
+
+
+class LeaderboardScore(models.Model):
+    """
+    Очки пользователя в рейтинге. Счётчики ведёт бот в памяти
+    (bot.services.leaderboard) и периодически сохраняет сюда.
+    """
+
+    board = models.CharField(max_length=64, verbose_name='Рейтинг')
+    user_id = models.BigIntegerField(verbose_name='Telegram ID')
+    name = models.CharField(
+        max_length=150, blank=True, default='', verbose_name='Имя'
+    )
+    score = models.PositiveIntegerField(default=0, verbose_name='Очки')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Обновлено')
+
+    class Meta:
+        verbose_name = 'Очки в рейтинге'
+        verbose_name_plural = 'Очки в рейтингах'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['board', 'user_id'], name='unique_board_user'
+            )
+        ]
+        indexes = [
+            # Подтягивание изменений других процессов
+            models.Index(fields=['updated_at'], name='leaderboard_updated_idx')
+        ]
+
+    def __str__(self):
+        return f'{self.board}: {self.user_id} — {self.score}'
+
+
+class QuizResult(models.Model):
+    """Результат завершённой викторины."""
+
+    user_id = models.BigIntegerField(verbose_name='Telegram ID')
+    tag_slug = models.CharField(max_length=32, verbose_name='Тема')
+    total = models.PositiveSmallIntegerField(verbose_name='Ответов')
+    correct = models.PositiveSmallIntegerField(
+        verbose_name='Правильных ответов'
+    )
+    finished_at = models.DateTimeField(verbose_name='Завершена')
+
+    class Meta:
+        verbose_name = 'Результат викторины'
+        verbose_name_plural = 'Результаты викторин'
+        indexes = [
+            models.Index(
+                fields=['user_id', 'finished_at'],
+                name='quizresult_user_finished_idx',
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.correct} из {self.total}'
+
+
+class UserStatsRollup(models.Model):
+    """
+    Сводная статистика пользователя: общие счётчики, серия дней
+    подряд и счётчики по темам (by_tag: slug -> [викторин, ответов,
+    правильных]). Обновляется при завершении викторины.
+    """
+
+    user_id = models.BigIntegerField(
+        primary_key=True, verbose_name='Telegram ID'
+    )
+    quizzes = models.PositiveIntegerField(
+        default=0, verbose_name='Викторин завершено'
+    )
+    questions = models.PositiveIntegerField(default=0, verbose_name='Ответов')
+    correct = models.PositiveIntegerField(
+        default=0, verbose_name='Правильных ответов'
+    )
+    streak = models.PositiveIntegerField(default=0, verbose_name='Дней подряд')
+    best_streak = models.PositiveIntegerField(
+        default=0, verbose_name='Лучшая серия'
+    )
+    last_quiz_date = models.DateField(
+        null=True, blank=True, verbose_name='Дата последней викторины'
+    )
+    by_tag = models.JSONField(default=dict, verbose_name='По темам')
+
+    class Meta:
+        verbose_name = 'Сводная статистика'
+        verbose_name_plural = 'Сводная статистика'
+
+    def __str__(self):
+        return f'Статистика {self.user_id}'
+
+
+class SeenQuestions(models.Model):
+    """
+    Вопросы, на которые пользователь уже отвечал: битовая маска, где
+    бит номер id вопроса установлен (младший бит байта — первый).
+    Ведётся ботом в памяти (bot.services.seen_questions).
+    """
+
+    user_id = models.BigIntegerField(
+        primary_key=True, verbose_name='Telegram ID'
+    )
+    bits = models.BinaryField(default=b'', verbose_name='Маска вопросов')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Обновлено')
+
+    class Meta:
+        verbose_name = 'Показанные вопросы'
+        verbose_name_plural = 'Показанные вопросы'
+
+    def __str__(self):
+        return f'Показанные вопросы {self.user_id}'
@@ -0,0 +1,65 @@
+"""
+Компактные callback_data для кнопок с вариантами ответа.
+
+Кнопка хранит не текст варианта (название функции может быть длиннее
+64 байт — предела Telegram для callback_data), а тройку
+(id викторины, id вопроса, номер варианта), упакованную struct,
+с усечённой HMAC-подписью на SECRET_KEY. Всё вместе кодируется
+base64url без выравнивания: 26 символов при любой длине вариантов.
+
+Подпись не даёт подобрать callback_data вручную, а id викторины
+и вопроса позволяют отличить кнопку текущего вопроса от кнопок
+старых сообщений.
+"""
+
+import base64
+import hmac
+import struct
+from typing import NamedTuple, Optional
+
+from django.utils.crypto import salted_hmac
+
+# id викторины, id вопроса, номер варианта
+ANSWER_FORMAT = struct.Struct('>IQB')
+SIGNATURE_SIZE = 6
+KEY_SALT = 'bot.services.answer_buttons'
+
+
+class AnswerButton(NamedTuple):
+    """Содержимое кнопки с вариантом ответа."""
+
+    session_id: int
+    question_id: int
+    option: int
+
+
+def _sign(body: bytes) -> bytes:
+    return salted_hmac(KEY_SALT, body, algorithm='sha256').digest()[
+        :SIGNATURE_SIZE
+    ]
+
+
+def encode_answer(button: AnswerButton) -> str:
+    """Упаковывает кнопку в строку для callback_data."""
+
+    body = ANSWER_FORMAT.pack(*button)
+    raw = base64.urlsafe_b64encode(body + _sign(body))
+    return raw.rstrip(b'=').decode('ascii')
+
+
+def decode_answer(payload: str) -> Optional[AnswerButton]:
+    """
+    Распаковывает кнопку из callback_data. None — данные повреждены,
+    подпись не совпала или кнопка создана в другом формате.
+    """
+
+    try:
+        raw = base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4))
+    except ValueError:
+        return None
+    if len(raw) != ANSWER_FORMAT.size + SIGNATURE_SIZE:
+        return None
+    body, signature = raw[: ANSWER_FORMAT.size], raw[ANSWER_FORMAT.size :]
+    if not hmac.compare_digest(signature, _sign(body)):
+        return None
+    return AnswerButton(*ANSWER_FORMAT.unpack(body))
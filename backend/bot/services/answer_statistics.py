@@ -0,0 +1,195 @@
+"""
+Отложенная запись статистики ответов (UserQuestionStatistic).
+
+Обработчики ответа не ходят в БД: record() только обновляет счётчики
+в памяти процесса. Накопленное пишется пачкой — раз в
+ANSWER_STATS_FLUSH_INTERVAL миллисекунд (задача flush_answer_statistics),
+при накоплении ANSWER_STATS_FLUSH_EVENTS ответов и при остановке бота.
+
+Одна запись — один upsert bulk_create(update_conflicts=True) по
+unique_user_question. Счётчики складываются с сохранёнными под
+select_for_update, а срок повторения (bot.services.spaced_repetition)
+пересчитывается шагом SM-2 на каждый накопленный ответ по порядку —
+так же, как если бы ответы писались по одному. Обновления одного
+пользователя обрабатывает один процесс (см. bot.supervisor), поэтому
+вставки новых строк не пересекаются.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from telegram.ext import CallbackContext
+
+from bot.models import CustomUser, UserQuestionStatistic
+from bot.services.catalog import get_catalog
+from bot.services.db_executor import database_sync_to_async
+from bot.services.spaced_repetition import ReviewState, review_answer
+
+logger = logging.getLogger(__name__)
+
+# (Telegram ID, id вопроса) -> ответы по порядку: (время, верен ли)
+Pending = Dict[Tuple[int, int], List[Tuple[datetime, bool]]]
+
+
+def save_statistics(pending: Pending) -> int:
+    """Прибавляет накопленные счётчики к UserQuestionStatistic."""
+
+    users = dict(
+        CustomUser.objects.filter(
+            user_id__in={user_id for user_id, _ in pending}
+        ).values_list('user_id', 'id')
+    )
+    catalog = get_catalog()
+    deltas = {
+        (users[user_id], question_id): answers
+        for (user_id, question_id), answers in pending.items()
+        # Незарегистрированные пользователи и удалённые вопросы
+        if user_id in users and catalog.get(question_id) is not None
+    }
+    if not deltas:
+        return 0
+
+    with transaction.atomic():
+        saved = {
+            (user_id, question_id): (
+                attempts,
+                correct_attempts,
+                ReviewState(ease_factor, interval, repetitions),
+            )
+            for (
+                user_id,
+                question_id,
+                attempts,
+                correct_attempts,
+                ease_factor,
+                interval,
+                repetitions,
+            ) in UserQuestionStatistic.objects.select_for_update()
+            .filter(
+                user_id__in={user_id for user_id, _ in deltas},
+                question_id__in={question_id for _, question_id in deltas},
+            )
+            .values_list(
+                'user_id',
+                'question_id',
+                'attempts',
+                'correct_attempts',
+                'ease_factor',
+                'interval',
+                'repetitions',
+            )
+        }
+        rows = []
+        for key, answers in deltas.items():
+            attempts, correct_attempts, state = saved.get(
+                key, (0, 0, ReviewState())
+            )
+            for answered_at, is_correct in answers:
+                state, due_at = review_answer(state, is_correct, answered_at)
+                attempts += 1
+                correct_attempts += is_correct
+            rows.append(
+                UserQuestionStatistic(
+                    user_id=key[0],
+                    question_id=key[1],
+                    attempts=attempts,
+                    correct_attempts=correct_attempts,
+                    last_attempt=answered_at,
+                    ease_factor=state.ease_factor,
+                    interval=state.interval,
+                    repetitions=state.repetitions,
+                    due_at=due_at,
+                )
+            )
+        UserQuestionStatistic.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user', 'question'],
+            update_fields=[
+                'attempts',
+                'correct_attempts',
+                'last_attempt',
+                'ease_factor',
+                'interval',
+                'repetitions',
+                'due_at',
+            ],
+        )
+    return len(rows)
+
+
+class AnswerStatisticsBuffer:
+    """Накапливает ответы пользователей и пишет их пачками."""
+
+    def __init__(self, max_events: int) -> None:
+        self.max_events = max_events
+        self._pending: Pending = {}
+        self._events = 0
+        self._lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def record(
+        self,
+        user_id: int,
+        question_id: int,
+        is_correct: bool,
+        now: Optional[datetime] = None,
+    ) -> None:
+        """Учитывает ответ; при переполнении запускает запись."""
+
+        answer = (now or timezone.now(), is_correct)
+        self._pending.setdefault((user_id, question_id), []).append(answer)
+        self._events += 1
+        if self._events >= self.max_events and (
+            self._flush_task is None or self._flush_task.done()
+        ):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self) -> int:
+        """Пишет накопленное в БД, возвращает число строк."""
+
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            self._events = 0
+            if not pending:
+                return 0
+            try:
+                saved = await database_sync_to_async(save_statistics)(pending)
+            except Exception as e:
+                logger.error(f'Не удалось сохранить статистику ответов: {e}')
+                # Вернём ответы, чтобы записать их в следующий раз; они
+                # старше записанных за время неудачной попытки
+                for key, answers in pending.items():
+                    answers.extend(self._pending.get(key, ()))
+                    self._pending[key] = answers
+                return 0
+        logger.debug(f'Сохранена статистика по {saved} вопросам.')
+        return saved
+
+
+answer_statistics: Optional[AnswerStatisticsBuffer] = None
+
+
+def get_answer_statistics() -> AnswerStatisticsBuffer:
+    """Возвращает буфер статистики ответов текущего процесса."""
+
+    global answer_statistics
+    if answer_statistics is None:
+        answer_statistics = AnswerStatisticsBuffer(
+            settings.ANSWER_STATS_FLUSH_EVENTS
+        )
+    return answer_statistics
+
+
+async def flush_answer_statistics(context: CallbackContext) -> None:
+    """Задача job_queue: периодическая запись статистики ответов."""
+
+    await get_answer_statistics().flush()
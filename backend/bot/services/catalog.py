@@ -0,0 +1,225 @@
+"""
+Кэш каталога вопросов в памяти процесса.
+
+Каталог один раз загружает все вопросы с тегами и дальше обслуживает
+старт викторины без обращений к БД. Любое изменение вопросов или тегов
+увеличивает версию каталога (см. bot.signals), после чего каталог
+перезагружается при следующем обращении.
+"""
+
+import logging
+import random
+import threading
+from array import array
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, NamedTuple, Optional
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from telegram.ext import CallbackContext
+
+from bot.models import CatalogVersion, Question
+from bot.services.db_executor import database_sync_to_async
+from bot.services.distractors import DistractorIndex
+from bot.services.similarity import NeighbourTable
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_PK = 1
+
+
+class CatalogSnapshot(NamedTuple):
+    """Неизменяемый снимок каталога, подменяется целиком при загрузке."""
+
+    questions: Dict[int, Question]
+    tag_question_ids: Dict[str, array]
+    distractors: DistractorIndex
+
+
+def get_stored_version() -> int:
+    """Возвращает версию каталога, сохранённую в БД."""
+
+    catalog_version, _ = CatalogVersion.objects.get_or_create(
+        pk=CATALOG_VERSION_PK
+    )
+    return catalog_version.version
+
+
+def bump_stored_version() -> None:
+    """Увеличивает версию каталога в БД."""
+
+    updated = CatalogVersion.objects.filter(pk=CATALOG_VERSION_PK).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+    if not updated:
+        CatalogVersion.objects.get_or_create(
+            pk=CATALOG_VERSION_PK, defaults={'version': 1}
+        )
+
+
+class QuestionCatalog:
+    """Все вопросы с тегами, загруженные в память процесса."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._snapshot = CatalogSnapshot({}, {}, DistractorIndex({}))
+        # Локальная версия растёт при каждой инвалидации,
+        # загруженная — версия, с которой был построен снимок.
+        self.version = 0
+        self._loaded_version: Optional[int] = None
+        self._stored_version: Optional[int] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        """Актуален ли загруженный снимок."""
+
+        return self._loaded_version == self.version
+
+    def invalidate(self) -> None:
+        """Помечает каталог устаревшим."""
+
+        logger.info('Инвалидация каталога вопросов.')
+        self.version += 1
+
+    def load(self) -> None:
+        """Загружает все вопросы и их теги из БД."""
+
+        version = self.version
+        stored_version = get_stored_version()
+
+        questions = {
+            question.id: question
+            for question in Question.objects.only(
+                'id', 'name', 'description', 'syntax'
+            )
+        }
+        tag_question_ids: Dict[str, array] = {}
+        links = Question.tags.through.objects.values_list(
+            'tag__slug', 'question_id'
+        ).order_by('question_id')
+        for tag_slug, question_id in links:
+            tag_question_ids.setdefault(tag_slug, array('q')).append(
+                question_id
+            )
+
+        neighbour_table = NeighbourTable.load(
+            settings.DISTRACTOR_NEIGHBOURS_PATH
+        )
+        distractors = DistractorIndex.build(
+            {question_id: q.name for question_id, q in questions.items()},
+            tag_question_ids,
+            {
+                question_id: neighbour_table.neighbours_of(question_id)
+                for question_id in questions
+            }
+            if neighbour_table
+            else None,
+        )
+
+        self._snapshot = CatalogSnapshot(
+            questions, tag_question_ids, distractors
+        )
+        self._stored_version = stored_version
+        self._loaded_version = version
+        logger.info(
+            f'Каталог вопросов загружен: {len(questions)} вопросов, '
+            f'{len(tag_question_ids)} тегов, версия {stored_version}.'
+        )
+
+    def ensure_loaded(self) -> None:
+        """Перезагружает каталог, если он устарел."""
+
+        if self.is_fresh:
+            return
+        with self._lock:
+            if not self.is_fresh:
+                self.load()
+
+    async def aensure_loaded(self) -> None:
+        """Асинхронная версия ensure_loaded. Без запросов, если кэш свежий."""
+
+        if not self.is_fresh:
+            await database_sync_to_async(self.ensure_loaded)()
+
+    def check_stored_version(self) -> None:
+        """
+        Сверяет загруженную версию с версией в БД.
+        Нужна процессам, в которых изменения делаются не через сигналы
+        (например, админка работает в отдельном процессе).
+        """
+
+        if get_stored_version() != self._stored_version:
+            self.invalidate()
+
+    def get(self, question_id: int) -> Optional[Question]:
+        """Возвращает вопрос по id."""
+
+        return self._snapshot.questions.get(question_id)
+
+    def question_ids(self, tag_slug: str) -> array:
+        """Возвращает id вопросов указанного тега."""
+
+        return self._snapshot.tag_question_ids.get(tag_slug, array('q'))
+
+    @property
+    def distractors(self) -> DistractorIndex:
+        """Индекс неправильных вариантов ответа текущей версии каталога."""
+
+        return self._snapshot.distractors
+
+    def sample(self, tag_slug: str, count: int) -> List[Question]:
+        """Возвращает случайные вопросы указанного тега."""
+
+        snapshot = self._snapshot
+        ids = snapshot.tag_question_ids.get(tag_slug)
+        if not ids:
+            return []
+        selected_ids = random.sample(ids, min(count, len(ids)))
+        return [
+            snapshot.questions[question_id] for question_id in selected_ids
+        ]
+
+
+catalog = QuestionCatalog()
+
+
+def get_catalog() -> QuestionCatalog:
+    """Возвращает каталог вопросов текущего процесса."""
+
+    return catalog
+
+
+# Пока True, сигналы моделей не планируют увеличение версии каталога
+# (см. bot.signals): массовые изменения увеличивают её сами, один раз
+bumps_suppressed: ContextVar[bool] = ContextVar(
+    'catalog_bumps_suppressed', default=False
+)
+
+
+@contextmanager
+def catalog_bumps_suppressed():
+    """Отключает увеличение версии каталога из сигналов моделей."""
+
+    token = bumps_suppressed.set(True)
+    try:
+        yield
+    finally:
+        bumps_suppressed.reset(token)
+
+
+def bump_catalog_version() -> None:
+    """Помечает каталог устаревшим в этом процессе и в БД."""
+
+    catalog.invalidate()
+    bump_stored_version()
+
+
+async def refresh_catalog(context: CallbackContext) -> None:
+    """Задача бота: подхватывает изменения каталога из других процессов."""
+
+    logger.info('Проверка версии каталога вопросов.')
+
+    await database_sync_to_async(catalog.check_stored_version)()
+    await catalog.aensure_loaded()
@@ -0,0 +1,201 @@
+"""
+Отдельный пул потоков для обращений бота к БД.
+
+sync_to_async по умолчанию (thread_sensitive=True) выполняет весь
+синхронный код в одном общем потоке, поэтому запросы всех
+пользователей шли к БД строго по одному. database_sync_to_async
+выполняет функцию в пуле из BOT_DB_THREADS потоков. У каждого потока
+своё соединение Django, так что потоков и соединений с БД одинаковое
+число: max_connections Postgres должен покрывать BOT_DB_THREADS
+на каждый процесс бота.
+
+Как в channels.db.database_sync_to_async, до и после вызова
+закрываются устаревшие соединения (с учётом CONN_MAX_AGE).
+
+Пул считает, сколько задач ждут свободного потока и сколько они
+ждали. Задача log_db_executor_stats периодически пишет это в лог:
+растущая очередь означает, что узкое место — число соединений с БД.
+Там же число соединений, открытых потоками пула: с постоянными
+соединениями (DB_CONN_MAX_AGE) оно близко к числу потоков, а рост
+вместе с числом задач значит, что соединения не переиспользуются.
+Те же показатели отдаются в /metrics (bot.services.metrics).
+"""
+
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from telegram.ext import CallbackContext
+
+from bot.services.metrics import Gauge, count_query
+
+logger = logging.getLogger(__name__)
+
+THREAD_NAME_PREFIX = 'bot-db'
+
+
+class DatabaseExecutorStats(NamedTuple):
+    """Показатели пула потоков БД."""
+
+    threads: int
+    # Сейчас: выполняются и ждут свободного потока
+    active: int
+    queued: int
+    # С запуска процесса
+    completed: int
+    peak_queued: int
+    wait_seconds: float
+    connections: int
+
+    @property
+    def average_wait(self) -> float:
+        """Среднее ожидание свободного потока, секунд."""
+
+        return self.wait_seconds / self.completed if self.completed else 0.0
+
+
+class DatabaseExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor, считающий очередь и время ожидания задач."""
+
+    def __init__(self, max_workers: int) -> None:
+        super().__init__(max_workers, thread_name_prefix=THREAD_NAME_PREFIX)
+        self._stats_lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._completed = 0
+        self._peak_queued = 0
+        self._wait_seconds = 0.0
+        self._connections = 0
+
+    def submit(self, fn, /, *args, **kwargs):
+        enqueued_at = time.perf_counter()
+        with self._stats_lock:
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+
+        def run():
+            started_at = time.perf_counter()
+            with self._stats_lock:
+                self._queued -= 1
+                self._active += 1
+                self._wait_seconds += started_at - enqueued_at
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._stats_lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        return super().submit(run)
+
+    def count_connection(self) -> None:
+        with self._stats_lock:
+            self._connections += 1
+
+    def stats(self) -> DatabaseExecutorStats:
+        with self._stats_lock:
+            return DatabaseExecutorStats(
+                threads=self._max_workers,
+                active=self._active,
+                queued=self._queued,
+                completed=self._completed,
+                peak_queued=self._peak_queued,
+                wait_seconds=self._wait_seconds,
+                connections=self._connections,
+            )
+
+
+db_executor: Optional[DatabaseExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_db_executor() -> DatabaseExecutor:
+    """Возвращает пул потоков БД текущего процесса."""
+
+    global db_executor
+    if db_executor is None:
+        with _executor_lock:
+            if db_executor is None:
+                db_executor = DatabaseExecutor(settings.BOT_DB_THREADS)
+    return db_executor
+
+
+def database_sync_to_async(func):
+    """sync_to_async, выполняющий функцию в пуле потоков БД."""
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            with connection.execute_wrapper(count_query):
+                return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(
+        run, thread_sensitive=False, executor=get_db_executor()
+    )
+
+
+def count_connection(sender, connection, **kwargs) -> None:
+    """Считает соединения с БД, открытые потоками пула."""
+
+    executor = db_executor
+    if executor is not None and threading.current_thread().name.startswith(
+        THREAD_NAME_PREFIX
+    ):
+        executor.count_connection()
+
+
+connection_created.connect(count_connection)
+
+
+def read_stat(field: str):
+    # Пул не создаётся ради запроса метрик
+    return lambda: (
+        getattr(db_executor.stats(), field)
+        if db_executor is not None
+        else None
+    )
+
+
+Gauge('bot_db_threads', 'Потоков в пуле БД.', read_stat('threads'))
+Gauge('bot_db_active', 'Задач, выполняемых пулом БД.', read_stat('active'))
+Gauge(
+    'bot_db_queued',
+    'Задач, ожидающих свободного потока БД.',
+    read_stat('queued'),
+)
+Gauge(
+    'bot_db_wait_seconds_total',
+    'Суммарное ожидание свободного потока БД.',
+    read_stat('wait_seconds'),
+)
+Gauge(
+    'bot_db_connections_opened_total',
+    'Соединений с БД, открытых потоками пула.',
+    read_stat('connections'),
+)
+
+
+async def log_db_executor_stats(context: CallbackContext) -> None:
+    """Задача бота: пишет в лог загрузку пула потоков БД."""
+
+    stats = get_db_executor().stats()
+    message = (
+        f'Пул БД: потоков {stats.threads}, выполняется {stats.active}, '
+        f'в очереди {stats.queued} (максимум {stats.peak_queued}), '
+        f'среднее ожидание {stats.average_wait * 1000:.1f} мс, '
+        f'открыто соединений {stats.connections}.'
+    )
+    if stats.queued:
+        logger.warning(message)
+    else:
+        logger.info(message)
@@ -0,0 +1,149 @@
+"""
+Индекс неправильных вариантов ответа (дистракторов) для режима Easy.
+
+Строится один раз на версию каталога вопросов: для каждого тега хранится
+кортеж названий вопросов, из которого варианты выбираются без обращения
+к БД. Если есть таблица похожих вопросов (см. bot.services.similarity),
+в первую очередь предлагаются похожие вопросы той же темы.
+"""
+
+import logging
+import random
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ключ общего пула названий всех вопросов каталога
+ALL_TAGS = ''
+# Из скольких самых похожих вопросов случайно выбираются варианты
+NEIGHBOUR_CANDIDATES_FACTOR = 2
+
+
+class DistractorIndex:
+    """Пулы названий вопросов по тегам."""
+
+    def __init__(
+        self,
+        pools: Dict[str, Tuple[str, ...]],
+        names: Optional[Dict[int, str]] = None,
+        tag_members: Optional[Dict[str, FrozenSet[int]]] = None,
+        neighbours: Optional[Dict[int, Tuple[int, ...]]] = None,
+    ) -> None:
+        self._pools = pools
+        self._names = names or {}
+        self._tag_members = tag_members or {}
+        self._neighbours = neighbours or {}
+
+    @classmethod
+    def build(
+        cls,
+        names: Mapping[int, str],
+        tag_question_ids: Mapping[str, Iterable[int]],
+        neighbours: Optional[Mapping[int, Iterable[int]]] = None,
+    ) -> 'DistractorIndex':
+        """
+        Строит индекс по названиям вопросов, id вопросов тегов
+        и (необязательно) спискам похожих вопросов.
+        """
+
+        pools = {
+            tag_slug: tuple(names[question_id] for question_id in ids)
+            for tag_slug, ids in tag_question_ids.items()
+        }
+        pools[ALL_TAGS] = tuple(names.values())
+        tag_members = {
+            tag_slug: frozenset(ids)
+            for tag_slug, ids in tag_question_ids.items()
+        }
+        return cls(
+            pools,
+            dict(names),
+            tag_members,
+            {
+                question_id: tuple(ids)
+                for question_id, ids in (neighbours or {}).items()
+            },
+        )
+
+    def sample(
+        self,
+        tag_slug: str,
+        correct_name: str,
+        k: int,
+        question_id: Optional[int] = None,
+    ) -> List[str]:
+        """
+        Возвращает до k различных названий из пула тега, кроме правильного.
+        Сначала берёт похожие вопросы той же темы, затем случайные из темы.
+        Если в теме не хватает вопросов, добирает варианты из общего пула.
+        """
+
+        chosen = self._sample_neighbours(
+            tag_slug, correct_name, k, question_id
+        )
+        if len(chosen) < k:
+            chosen += self._sample_from(
+                self._pools.get(tag_slug, ()),
+                {correct_name, *chosen},
+                k - len(chosen),
+            )
+        if len(chosen) < k:
+            logger.warning(
+                f'В теме {tag_slug} недостаточно вариантов ответа, '
+                'используется общий пул.'
+            )
+            chosen += self._sample_from(
+                self._pools.get(ALL_TAGS, ()),
+                {correct_name, *chosen},
+                k - len(chosen),
+            )
+        return chosen
+
+    def _sample_neighbours(
+        self,
+        tag_slug: str,
+        correct_name: str,
+        k: int,
+        question_id: Optional[int],
+    ) -> List[str]:
+        """Случайные варианты среди самых похожих вопросов той же темы."""
+
+        if question_id is None or k <= 0:
+            return []
+
+        members = self._tag_members.get(tag_slug, frozenset())
+        limit = k * NEIGHBOUR_CANDIDATES_FACTOR
+        candidates: List[str] = []
+        for neighbour_id in self._neighbours.get(question_id, ()):
+            name = self._names.get(neighbour_id)
+            if neighbour_id in members and name and name != correct_name:
+                candidates.append(name)
+                if len(candidates) == limit:
+                    break
+        return random.sample(candidates, min(k, len(candidates)))
+
+    @staticmethod
+    def _sample_from(
+        pool: Tuple[str, ...], excluded: set, k: int
+    ) -> List[str]:
+        """
+        Выбирает k названий из пула, пропуская исключённые.
+        Для больших пулов — выбор случайных индексов с отбраковкой
+        за O(k), для маленьких — перебор пула.
+        """
+
+        if k <= 0 or not pool:
+            return []
+
+        if len(pool) > 2 * (k + len(excluded)):
+            chosen: List[str] = []
+            seen = set(excluded)
+            while len(chosen) < k:
+                name = pool[random.randrange(len(pool))]
+                if name not in seen:
+                    seen.add(name)
+                    chosen.append(name)
+            return chosen
+
+        candidates = list(dict.fromkeys(n for n in pool if n not in excluded))
+        return random.sample(candidates, min(k, len(candidates)))
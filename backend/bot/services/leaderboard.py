@@ -0,0 +1,300 @@
+"""
+Рейтинги пользователей: общий, по теме и за текущую неделю.
+
+Очки — число правильных ответов. Они не считаются GROUP BY по
+UserQuestionStatistic: обработчик ответа увеличивает счётчики
+в памяти процесса (record_correct), а задача checkpoint_leaderboards
+раз в LEADERBOARD_CHECKPOINT_INTERVAL секунд записывает изменённые
+строки в LeaderboardScore и подтягивает строки, изменённые другими
+процессами (воркеры start_bot --workers N).
+
+Для каждого рейтинга в памяти хранятся:
+- очки пользователей (dict);
+- дерево Фенвика «очки -> число пользователей»: место пользователя —
+  число пользователей с большим счётом плюс один, O(log n);
+- первые LEADERBOARD_SIZE мест в отсортированном списке. Очки только
+  растут, поэтому список обновляется вставкой за O(N).
+"""
+
+import asyncio
+import logging
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from telegram.ext import CallbackContext
+
+from bot.models import LeaderboardScore
+from bot.services.db_executor import database_sync_to_async
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_BOARD = 'global'
+
+# Запас при подтягивании чужих изменений: часы процессов могут
+# расходиться, а повторное применение строки ничего не меняет
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+def tag_board(tag_slug: str) -> str:
+    return f'tag:{tag_slug}'
+
+
+def week_board(moment: datetime) -> str:
+    year, week, _ = timezone.localtime(moment).isocalendar()
+    return f'week:{year}-W{week:02d}'
+
+
+class FenwickTree:
+    """Дерево Фенвика по очкам (с 1), растущее по мере надобности."""
+
+    def __init__(self, size: int = 64) -> None:
+        self._tree = [0] * (size + 1)
+
+    def _grow(self, index: int) -> None:
+        size = len(self._tree) - 1
+        while index > size:
+            # Узлы новой половины, кроме последнего, покрывают только
+            # новые (пустые) позиции, последний — все предыдущие
+            total = self.prefix_sum(size)
+            self._tree.extend([0] * size)
+            size *= 2
+            self._tree[size] = total
+
+    def add(self, index: int, delta: int) -> None:
+        self._grow(index)
+        tree = self._tree
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def prefix_sum(self, index: int) -> int:
+        """Сумма значений с позиций 1..index."""
+
+        tree = self._tree
+        index = min(index, len(tree) - 1)
+        total = 0
+        while index > 0:
+            total += tree[index]
+            index -= index & -index
+        return total
+
+
+class Leaderboard:
+    """Один рейтинг: очки, места и первые size мест."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._scores: Dict[int, int] = {}
+        self._counts = FenwickTree()
+        # (-очки, Telegram ID), по возрастанию — лучшие первыми
+        self._top: List[Tuple[int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def score(self, user_id: int) -> int:
+        return self._scores.get(user_id, 0)
+
+    def update(self, user_id: int, score: int) -> bool:
+        """Повышает очки пользователя до score. Понижение игнорируется."""
+
+        old = self._scores.get(user_id, 0)
+        if score <= old:
+            return False
+        self._scores[user_id] = score
+        if old:
+            self._counts.add(old, -1)
+        self._counts.add(score, 1)
+
+        top = self._top
+        if old:
+            index = bisect_left(top, (-old, user_id))
+            if index < len(top) and top[index] == (-old, user_id):
+                del top[index]
+        entry = (-score, user_id)
+        if len(top) < self.size or entry < top[-1]:
+            insort(top, entry)
+            del top[self.size :]
+        return True
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """Место пользователя (1 — лучший) или None, если очков нет."""
+
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        higher = len(self._scores) - self._counts.prefix_sum(score)
+        return higher + 1
+
+    def top(self) -> List[Tuple[int, int]]:
+        """Первые места: [(Telegram ID, очки)]."""
+
+        return [(user_id, -score) for score, user_id in self._top]
+
+
+class Leaderboards:
+    """Все рейтинги процесса и их синхронизация с LeaderboardScore."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._boards: Dict[str, Leaderboard] = {}
+        self._names: Dict[int, str] = {}
+        self._dirty: Set[Tuple[str, int]] = set()
+        self._loaded = False
+        self._refreshed_at: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+
+    def get(self, board: str) -> Leaderboard:
+        leaderboard = self._boards.get(board)
+        if leaderboard is None:
+            leaderboard = self._boards[board] = Leaderboard(self.size)
+        return leaderboard
+
+    def name(self, user_id: int) -> str:
+        return self._names.get(user_id) or str(user_id)
+
+    def record_correct(
+        self,
+        user_id: int,
+        name: str,
+        tag_slug: str,
+        now: Optional[datetime] = None,
+    ) -> None:
+        """Начисляет очко за правильный ответ во всех рейтингах."""
+
+        if name:
+            self._names[user_id] = name
+        now = now or timezone.now()
+        for board in (GLOBAL_BOARD, tag_board(tag_slug), week_board(now)):
+            leaderboard = self.get(board)
+            leaderboard.update(user_id, leaderboard.score(user_id) + 1)
+            self._dirty.add((board, user_id))
+
+    def merge(self, rows: Iterable[Tuple[str, int, str, int]]) -> None:
+        """Применяет строки LeaderboardScore (очки только растут)."""
+
+        current_week = week_board(timezone.now())
+        for board, user_id, name, score in rows:
+            if board.startswith('week:') and board != current_week:
+                continue
+            if name and user_id not in self._names:
+                self._names[user_id] = name
+            self.get(board).update(user_id, score)
+
+    def load_rows(
+        self, since: Optional[datetime]
+    ) -> List[Tuple[str, int, str, int]]:
+        """Строки текущих рейтингов, изменённые после since."""
+
+        queryset = LeaderboardScore.objects.all()
+        if since is None:
+            queryset = queryset.filter(
+                ~Q(board__startswith='week:')
+                | Q(board=week_board(timezone.now()))
+            )
+        else:
+            queryset = queryset.filter(updated_at__gte=since)
+        return list(queryset.values_list('board', 'user_id', 'name', 'score'))
+
+    async def aensure_loaded(self) -> None:
+        """Загружает рейтинги из БД при первом обращении."""
+
+        if self._loaded:
+            return
+        async with self._lock:
+            if self._loaded:
+                return
+            started = timezone.now()
+            rows = await database_sync_to_async(self.load_rows)(None)
+            # Очки, начисленные до загрузки, добавляются к сохранённым
+            earned = [
+                (board, user_id, self._boards[board].score(user_id))
+                for board, user_id in self._dirty
+                if board in self._boards
+            ]
+            self._boards = {}
+            self.merge(rows)
+            for board, user_id, points in earned:
+                leaderboard = self.get(board)
+                leaderboard.update(
+                    user_id, leaderboard.score(user_id) + points
+                )
+            self._refreshed_at = started
+            self._loaded = True
+            logger.info(f'Рейтинги загружены: {len(self._boards)}.')
+
+    def _dirty_rows(self) -> List[LeaderboardScore]:
+        return [
+            LeaderboardScore(
+                board=board,
+                user_id=user_id,
+                name=self._names.get(user_id, ''),
+                score=self._boards[board].score(user_id),
+            )
+            for board, user_id in self._dirty
+            if board in self._boards
+        ]
+
+    async def checkpoint(self) -> int:
+        """
+        Записывает изменённые очки и подтягивает изменения других
+        процессов. Возвращает число записанных строк.
+        """
+
+        if not self._loaded:
+            return 0
+        async with self._lock:
+            dirty, rows = self._dirty, self._dirty_rows()
+            self._dirty = set()
+            started = timezone.now()
+            try:
+                if rows:
+                    await database_sync_to_async(save_scores)(rows)
+                changed = await database_sync_to_async(self.load_rows)(
+                    self._refreshed_at - REFRESH_OVERLAP
+                )
+            except Exception as e:
+                logger.error(f'Не удалось сохранить рейтинги: {e}')
+                self._dirty |= dirty
+                return 0
+            self.merge(changed)
+            self._refreshed_at = started
+            self._drop_old_weeks(started)
+        return len(rows)
+
+    def _drop_old_weeks(self, now: datetime) -> None:
+        current_week = week_board(now)
+        for board in list(self._boards):
+            if board.startswith('week:') and board != current_week:
+                del self._boards[board]
+
+
+def save_scores(rows: List[LeaderboardScore]) -> None:
+    LeaderboardScore.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['board', 'user_id'],
+        update_fields=['name', 'score', 'updated_at'],
+    )
+
+
+leaderboards: Optional[Leaderboards] = None
+
+
+def get_leaderboards() -> Leaderboards:
+    """Возвращает рейтинги текущего процесса."""
+
+    global leaderboards
+    if leaderboards is None:
+        leaderboards = Leaderboards(settings.LEADERBOARD_SIZE)
+    return leaderboards
+
+
+async def checkpoint_leaderboards(context: CallbackContext) -> None:
+    """Задача job_queue: периодическое сохранение рейтингов."""
+
+    await get_leaderboards().checkpoint()
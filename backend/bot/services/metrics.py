@@ -0,0 +1,342 @@
+"""
+Метрики бота в текстовом формате Prometheus.
+
+instrument_handler оборачивает обработчики: время обработки обновления,
+ошибки, а также число и суммарное время запросов к БД за обновление —
+их считает count_query, подключаемый через connection.execute_wrapper
+в потоках БД (bot.services.db_executor). Обработчик, к которому
+относится запрос, передаётся через contextvars: sync_to_async копирует
+контекст в поток, где выполняется запрос. Вызовы Bot API считает
+InstrumentedRequest. Запросы и вызовы вне обработчиков (задачи
+job_queue) получают метку handler="background".
+
+Метрики хранятся в памяти процесса. Их отдаёт представление /metrics
+(ASGI-процесс с ботом) и, если задан BOT_METRICS_PORT, отдельный порт
+процесса start_bot (воркер номер i — порт BOT_METRICS_PORT + i).
+"""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from telegram.ext import ApplicationHandlerStop
+from telegram.request import HTTPXRequest
+
+logger = logging.getLogger(__name__)
+
+BACKGROUND = 'background'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+_lock = threading.Lock()
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    pairs = ','.join(
+        f'{key}="{escape(value)}"' for key, value in labels.items()
+    )
+    return '{' + pairs + '}'
+
+
+class Metric(ABC):
+    """Метрика с набором меток; значения — по кортежу значений меток."""
+
+    kind = ''
+
+    def __init__(
+        self, name: str, documentation: str, labels: Tuple[str, ...] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        registry.append(self)
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        """Строки метрики: (имя, метки, значение)."""
+
+    def render(self) -> List[str]:
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        for name, labels, value in self.samples():
+            lines.append(f'{name}{format_labels(labels)} {value:g}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with _lock:
+            self._values[label_values] = (
+                self._values.get(label_values, 0) + amount
+            )
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> Iterator[Sample]:
+        with _lock:
+            values = list(self._values.items())
+        for label_values, value in sorted(values):
+            yield self.name, dict(zip(self.labels, label_values)), value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Tuple[float, ...], **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.buckets = buckets
+        # По значениям меток: [счётчики корзин..., сумма, количество]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with _lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [0] * (
+                    len(self.buckets) + 2
+                )
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def count(self, *label_values: str) -> int:
+        entry = self._values.get(label_values)
+        return int(entry[-1]) if entry else 0
+
+    def samples(self) -> Iterator[Sample]:
+        with _lock:
+            values = [
+                (key, list(entry)) for key, entry in self._values.items()
+            ]
+        for label_values, entry in sorted(values):
+            labels = dict(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, entry):
+                cumulative += bucket
+                yield (
+                    f'{self.name}_bucket',
+                    {**labels, 'le': f'{bound:g}'},
+                    cumulative,
+                )
+            yield f'{self.name}_bucket', {**labels, 'le': '+Inf'}, entry[-1]
+            yield f'{self.name}_sum', labels, entry[-2]
+            yield f'{self.name}_count', labels, entry[-1]
+
+
+class Gauge(Metric):
+    """Значение, которое вычисляется при каждом запросе метрик."""
+
+    kind = 'gauge'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], Optional[float]],
+    ) -> None:
+        super().__init__(name, documentation)
+        self.read = read
+
+    def samples(self) -> Iterator[Sample]:
+        value = self.read()
+        if value is not None:
+            yield self.name, {}, value
+
+
+registry: List[Metric] = []
+
+HANDLER_DURATION = Histogram(
+    'bot_handler_duration_seconds',
+    'Время обработки обновления.',
+    ('handler',),
+    buckets=LATENCY_BUCKETS,
+)
+HANDLER_ERRORS = Counter(
+    'bot_handler_errors_total',
+    'Обновления, обработка которых завершилась исключением.',
+    ('handler',),
+)
+UPDATE_DB_QUERIES = Histogram(
+    'bot_update_db_queries',
+    'Число запросов к БД за одно обновление.',
+    ('handler',),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+UPDATE_DB_SECONDS = Histogram(
+    'bot_update_db_seconds',
+    'Суммарное время запросов к БД за одно обновление.',
+    ('handler',),
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter('bot_db_queries_total', 'Запросы к БД.', ('handler',))
+DB_QUERY_SECONDS = Counter(
+    'bot_db_query_seconds_total', 'Время запросов к БД.', ('handler',)
+)
+BOT_API_REQUESTS = Counter(
+    'bot_api_requests_total',
+    'Вызовы Bot API по методу и HTTP-статусу (error — без ответа).',
+    ('handler', 'method', 'status'),
+)
+BOT_API_DURATION = Histogram(
+    'bot_api_request_duration_seconds',
+    'Время вызова Bot API.',
+    ('method',),
+    buckets=LATENCY_BUCKETS,
+)
+
+
+@dataclass
+class UpdateMetrics:
+    """Запросы к БД, сделанные при обработке одного обновления."""
+
+    handler: str
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+current_update: ContextVar[Optional[UpdateMetrics]] = ContextVar(
+    'current_update', default=None
+)
+
+
+def current_handler() -> str:
+    update_metrics = current_update.get()
+    return update_metrics.handler if update_metrics else BACKGROUND
+
+
+def instrument_handler(callback):
+    """Оборачивает обработчик обновлений сбором метрик."""
+
+    name = callback.__name__
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        update_metrics = UpdateMetrics(name)
+        token = current_update.set(update_metrics)
+        started = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except ApplicationHandlerStop:
+            raise
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            current_update.reset(token)
+            HANDLER_DURATION.observe(time.perf_counter() - started, name)
+            UPDATE_DB_QUERIES.observe(update_metrics.queries, name)
+            UPDATE_DB_SECONDS.observe(update_metrics.db_seconds, name)
+
+    return wrapper
+
+
+def count_query(execute, sql, params, many, context):
+    """execute_wrapper: считает запросы к БД и их время."""
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        update_metrics = current_update.get()
+        handler = update_metrics.handler if update_metrics else BACKGROUND
+        DB_QUERIES.inc(handler)
+        DB_QUERY_SECONDS.inc(handler, amount=elapsed)
+        if update_metrics is not None:
+            with _lock:
+                update_metrics.queries += 1
+                update_metrics.db_seconds += elapsed
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest, считающий вызовы Bot API."""
+
+    async def do_request(self, url: str, method: str, *args, **kwargs):
+        api_method = url.rsplit('/', 1)[-1]
+        handler = current_handler()
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            code, payload = await super().do_request(
+                url, method, *args, **kwargs
+            )
+            status = str(code)
+            return code, payload
+        finally:
+            BOT_API_DURATION.observe(time.perf_counter() - started, api_method)
+            BOT_API_REQUESTS.inc(handler, api_method, status)
+
+
+def render() -> str:
+    """Все метрики процесса в текстовом формате Prometheus."""
+
+    lines: List[str] = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+async def handle_metrics_request(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    try:
+        await reader.readuntil(b'\r\n\r\n')
+        body = render().encode()
+        writer.write(
+            b'HTTP/1.1 200 OK\r\n'
+            + f'Content-Type: {CONTENT_TYPE}\r\n'.encode()
+            + f'Content-Length: {len(body)}\r\n'.encode()
+            + b'Connection: close\r\n\r\n'
+            + body
+        )
+        await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        pass
+    except ConnectionError as e:
+        logger.debug(f'Запрос метрик прерван: {e}')
+    finally:
+        writer.close()
+
+
+metrics_server: Optional[asyncio.Server] = None
+
+
+async def start_metrics_server(port: int, host: str = '127.0.0.1') -> None:
+    """
+    Отдаёт метрики по HTTP на отдельном порту процесса. Авторизации нет,
+    поэтому по умолчанию порт слушается только на localhost.
+    """
+
+    global metrics_server
+    metrics_server = await asyncio.start_server(
+        handle_metrics_request, host, port
+    )
+    logger.info(f'Метрики доступны на {host}:{port}.')
@@ -0,0 +1,257 @@
+"""
+Параллельная рассылка уведомлений с учётом лимитов Telegram.
+
+Сообщения отправляются несколькими воркерами одновременно, но не быстрее
+общего лимита бота (token bucket) и не чаще одного сообщения в секунду
+в один чат. На RetryAfter рассылка приостанавливается на указанное
+Telegram время, а сообщение возвращается в очередь.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter
+
+logger = logging.getLogger(__name__)
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    """Время ожидания из RetryAfter в секундах (int или timedelta)."""
+
+    retry_after = error.retry_after
+    if hasattr(retry_after, 'total_seconds'):
+        return retry_after.total_seconds()
+    return float(retry_after)
+
+
+class TokenBucket:
+    """Ограничитель частоты: не больше rate операций в секунду."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float) -> None:
+        """Запрещает выдачу токенов на seconds секунд."""
+
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0
+        self._updated = max(self._updated, self._paused_until)
+
+    async def acquire(self) -> None:
+        """Ждёт, пока не появится свободный токен."""
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class ChatRateLimiter:
+    """Минимальный интервал между сообщениями в один чат."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._next_allowed: Dict[int, float] = {}
+
+    async def acquire(self, chat_id: int) -> None:
+        now = time.monotonic()
+        next_allowed = self._next_allowed.get(chat_id, now)
+        self._next_allowed[chat_id] = max(now, next_allowed) + self.interval
+        if next_allowed > now:
+            await asyncio.sleep(next_allowed - now)
+
+    def forget_expired(self) -> None:
+        """Убирает чаты, в которые уже снова можно писать."""
+
+        now = time.monotonic()
+        self._next_allowed = {
+            chat_id: next_allowed
+            for chat_id, next_allowed in self._next_allowed.items()
+            if next_allowed > now
+        }
+
+
+@dataclass
+class DispatchReport:
+    """
+    Метрики одного запуска рассылки. delivered — чаты, куда сообщение
+    доставлено; rejected — чаты, куда его отправлять бесполезно (бот
+    заблокирован, чат не найден); postponed — чаты, где отправка
+    не удалась по временной причине и её можно повторить позже.
+    """
+
+    sent: int = 0
+    failed: int = 0
+    throttled: int = 0
+    wall_time: float = 0.0
+    delivered: List[int] = field(default_factory=list)
+    rejected: Dict[int, str] = field(default_factory=dict)
+    postponed: Dict[int, str] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        return (
+            f'отправлено {self.sent}, ошибок {self.failed}, '
+            f'ограничений RetryAfter {self.throttled}, '
+            f'время {self.wall_time:.2f} с'
+        )
+
+
+class NotificationDispatcher:
+    """Рассылка одного текста по списку чатов."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        concurrency: int,
+        rate_limit: float,
+        chat_interval: float,
+        max_retries: int,
+    ) -> None:
+        self.bot = bot
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate_limit)
+        self.chat_limiter = ChatRateLimiter(chat_interval)
+
+    @classmethod
+    def from_settings(
+        cls, bot: Bot, workers: int = 1
+    ) -> 'NotificationDispatcher':
+        """
+        Создаёт рассылку с параметрами из настроек Django. workers —
+        число процессов, рассылающих одновременно: лимит Telegram общий
+        для бота, поэтому каждому достаётся его доля.
+        """
+
+        return cls(
+            bot,
+            concurrency=settings.NOTIFICATION_CONCURRENCY,
+            rate_limit=settings.NOTIFICATION_RATE_LIMIT / max(1, workers),
+            chat_interval=settings.NOTIFICATION_CHAT_INTERVAL,
+            max_retries=settings.NOTIFICATION_MAX_RETRIES,
+        )
+
+    async def send_many(
+        self, chat_ids: Iterable[int], text: str
+    ) -> DispatchReport:
+        """Отправляет text во все чаты и возвращает метрики запуска."""
+
+        report = DispatchReport()
+        started = time.monotonic()
+        self.chat_limiter.forget_expired()
+
+        queue: asyncio.Queue[Tuple[int, int]] = asyncio.Queue()
+        for chat_id in chat_ids:
+            queue.put_nowait((chat_id, 0))
+
+        workers = [
+            asyncio.create_task(self._worker(queue, text, report))
+            for _ in range(min(self.concurrency, queue.qsize()))
+        ]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        report.wall_time = time.monotonic() - started
+        return report
+
+    async def _worker(
+        self,
+        queue: 'asyncio.Queue[Tuple[int, int]]',
+        text: str,
+        report: DispatchReport,
+    ) -> None:
+        while True:
+            chat_id, attempt = await queue.get()
+            try:
+                await self._send(queue, chat_id, attempt, text, report)
+            finally:
+                queue.task_done()
+
+    async def _send(
+        self,
+        queue: 'asyncio.Queue[Tuple[int, int]]',
+        chat_id: int,
+        attempt: int,
+        text: str,
+        report: DispatchReport,
+    ) -> None:
+        await self.chat_limiter.acquire(chat_id)
+        await self.bucket.acquire()
+        try:
+            await self.bot.send_message(chat_id=chat_id, text=text)
+            report.sent += 1
+            report.delivered.append(chat_id)
+            logger.info(f'Уведомление отправлено пользователю {chat_id}.')
+        except RetryAfter as e:
+            report.throttled += 1
+            delay = retry_after_seconds(e)
+            logger.warning(
+                f'Telegram ограничил рассылку на {delay} с '
+                f'(чат {chat_id}), сообщение переотправится.'
+            )
+            self.bucket.pause(delay)
+            self._retry(queue, chat_id, attempt, report, str(e))
+        except Forbidden as e:
+            report.failed += 1
+            report.rejected[chat_id] = str(e)
+            logger.info(f'Пользователь {chat_id} заблокировал бота: {e}')
+        except BadRequest as e:
+            report.failed += 1
+            report.rejected[chat_id] = str(e)
+            logger.error(f'Telegram отклонил уведомление {chat_id}: {e}')
+        except NetworkError as e:
+            logger.warning(
+                f'Сетевая ошибка при отправке уведомления {chat_id}: {e}'
+            )
+            self._retry(queue, chat_id, attempt, report, str(e))
+        except Exception as e:
+            report.failed += 1
+            report.postponed[chat_id] = str(e)
+            logger.error(
+                f'Ошибка при отправке уведомления пользователю {chat_id}: {e}'
+            )
+
+    def _retry(
+        self,
+        queue: 'asyncio.Queue[Tuple[int, int]]',
+        chat_id: int,
+        attempt: int,
+        report: DispatchReport,
+        error: str,
+    ) -> None:
+        if attempt < self.max_retries:
+            queue.put_nowait((chat_id, attempt + 1))
+        else:
+            report.failed += 1
+            report.postponed[chat_id] = error
+            logger.error(
+                f'Уведомление пользователю {chat_id} не отправлено '
+                f'после {attempt + 1} попыток.'
+            )
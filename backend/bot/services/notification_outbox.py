@@ -0,0 +1,273 @@
+"""
+Очередь уведомлений (outbox) в БД.
+
+Планирование и отправка разделены: планировщик раз в минуту добавляет
+в NotificationOutbox по строке на каждого получателя, а воркеры забирают
+строки пачками через SELECT ... FOR UPDATE SKIP LOCKED и отправляют их.
+Так несколько процессов бота могут работать одновременно: одну строку
+захватывает только один воркер, уникальный ключ (chat_id, scheduled_for)
+не даёт поставить уведомление дважды, а пропущенные при перезапуске
+минуты досылаются в пределах NOTIFICATION_CATCHUP_MINUTES.
+
+Захват строки ограничен арендой (locked_until): если воркер упал,
+не отметив результат, строку после окончания аренды заберёт другой.
+"""
+
+import logging
+from datetime import datetime, time, timedelta, timezone
+from typing import List, NamedTuple, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q, QuerySet
+from telegram.ext import CallbackContext
+
+from bot.models import (
+    NotificationOutbox,
+    NotificationScheduleState,
+    UserSettings,
+)
+from bot.services.db_executor import database_sync_to_async
+from bot.services.notification_dispatcher import (
+    DispatchReport,
+    NotificationDispatcher,
+)
+
+logger = logging.getLogger(__name__)
+
+REMINDER_TEXT = 'Не забудь повторить теорию!'
+# Ключ рассылки в bot_data (bot_data не сохраняется в БД)
+DISPATCHER_KEY = 'notification_dispatcher'
+# Число процессов, одновременно выполняющих рассылку (start_bot --workers)
+WORKERS_KEY = 'notification_workers'
+
+ACTIVE_STATUSES = (
+    NotificationOutbox.Status.PENDING,
+    NotificationOutbox.Status.SENDING,
+)
+
+
+class ClaimedNotification(NamedTuple):
+    """Захваченная воркером строка очереди."""
+
+    id: int
+    chat_id: int
+    text: str
+    attempts: int
+
+
+def truncate_to_minute(moment: datetime) -> datetime:
+    return moment.replace(second=0, microsecond=0)
+
+
+def get_minute_bounds(moment: datetime) -> Tuple[time, time]:
+    """Возвращает границы минуты для фильтра по notification_time."""
+
+    start = moment.time().replace(second=0, microsecond=0)
+    return start, start.replace(second=59, microsecond=999999)
+
+
+def get_due_chat_ids_queryset(moment: datetime) -> QuerySet:
+    """
+    Запрос Telegram ID пользователей, у которых уведомление назначено
+    на минуту moment. Выборка идёт по частичному индексу notification_time,
+    поэтому не зависит от общего числа пользователей с уведомлениями.
+    """
+
+    start, end = get_minute_bounds(moment)
+    return UserSettings.objects.filter(
+        notification=True, notification_time__range=(start, end)
+    ).values_list('user_id', flat=True)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Экспоненциальная задержка перед повтором: 30 с, 60 с, 120 с..."""
+
+    exponent = max(0, attempts - 1)
+    seconds = settings.NOTIFICATION_RETRY_BASE_DELAY * 2**exponent
+    return timedelta(seconds=min(seconds, 3600))
+
+
+def schedule_due_notifications(now: datetime | None = None) -> int:
+    """
+    Ставит в очередь уведомления за все ещё не запланированные минуты
+    до now включительно и возвращает число добавленных строк.
+
+    Состояние планировщика блокируется на время работы, поэтому
+    планировщики разных процессов не обрабатывают одну минуту дважды.
+    """
+
+    now = truncate_to_minute(now or datetime.now(timezone.utc))
+    catchup = timedelta(minutes=settings.NOTIFICATION_CATCHUP_MINUTES)
+
+    with transaction.atomic():
+        NotificationScheduleState.objects.get_or_create(pk=1)
+        state = NotificationScheduleState.objects.select_for_update().get(pk=1)
+        last_minute = state.last_minute
+        if last_minute is None or last_minute < now - catchup:
+            if last_minute is not None:
+                logger.warning(
+                    f'Уведомления не планировались с {last_minute}, '
+                    f'досылаются только последние {catchup}.'
+                )
+            last_minute = now - catchup
+        if last_minute >= now:
+            return 0
+
+        created = 0
+        minute = last_minute + timedelta(minutes=1)
+        while minute <= now:
+            rows = [
+                NotificationOutbox(
+                    chat_id=chat_id,
+                    scheduled_for=minute,
+                    text=REMINDER_TEXT,
+                    next_attempt_at=minute,
+                )
+                for chat_id in get_due_chat_ids_queryset(minute)
+            ]
+            if rows:
+                NotificationOutbox.objects.bulk_create(
+                    rows, ignore_conflicts=True
+                )
+                created += len(rows)
+            minute += timedelta(minutes=1)
+
+        state.last_minute = now
+        state.save(update_fields=['last_minute'])
+    return created
+
+
+def claim_notifications(
+    batch_size: int, now: datetime | None = None
+) -> List[ClaimedNotification]:
+    """
+    Захватывает до batch_size готовых к отправке строк. Строки,
+    захваченные другими воркерами, пропускаются (SKIP LOCKED).
+    """
+
+    now = now or datetime.now(timezone.utc)
+    lease = timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS)
+
+    with transaction.atomic():
+        rows = list(
+            NotificationOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status__in=ACTIVE_STATUSES, next_attempt_at__lte=now)
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+            .order_by('next_attempt_at')
+            .values_list('id', 'chat_id', 'text', 'attempts')[:batch_size]
+        )
+        if not rows:
+            return []
+        NotificationOutbox.objects.filter(
+            id__in=[row[0] for row in rows]
+        ).update(
+            status=NotificationOutbox.Status.SENDING,
+            locked_until=now + lease,
+            attempts=F('attempts') + 1,
+        )
+    return [
+        ClaimedNotification(id, chat_id, text, attempts + 1)
+        for id, chat_id, text, attempts in rows
+    ]
+
+
+def complete_notifications(
+    claimed: List[ClaimedNotification],
+    report: DispatchReport,
+    now: datetime | None = None,
+) -> None:
+    """Записывает результат отправки захваченных строк."""
+
+    now = now or datetime.now(timezone.utc)
+    delivered = set(report.delivered)
+    delivered_ids = [row.id for row in claimed if row.chat_id in delivered]
+
+    with transaction.atomic():
+        if delivered_ids:
+            NotificationOutbox.objects.filter(id__in=delivered_ids).update(
+                status=NotificationOutbox.Status.DELIVERED,
+                delivered_at=now,
+                locked_until=None,
+                last_error='',
+            )
+        for row in claimed:
+            if row.chat_id in delivered:
+                continue
+            error = report.rejected.get(row.chat_id)
+            if error is None:
+                error = report.postponed.get(row.chat_id, '')
+                gave_up = row.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS
+            else:
+                gave_up = True
+            if gave_up:
+                fields = {'status': NotificationOutbox.Status.FAILED}
+            else:
+                fields = {
+                    'status': NotificationOutbox.Status.PENDING,
+                    'next_attempt_at': now + retry_delay(row.attempts),
+                }
+            NotificationOutbox.objects.filter(id=row.id).update(
+                locked_until=None, last_error=error[:1000], **fields
+            )
+
+
+def purge_notifications(now: datetime | None = None) -> int:
+    """Удаляет завершённые строки старше NOTIFICATION_OUTBOX_RETENTION."""
+
+    now = now or datetime.now(timezone.utc)
+    border = now - timedelta(days=settings.NOTIFICATION_OUTBOX_RETENTION)
+    deleted, _ = (
+        NotificationOutbox.objects.exclude(status__in=ACTIVE_STATUSES)
+        .filter(scheduled_for__lt=border)
+        .delete()
+    )
+    return deleted
+
+
+def get_dispatcher(context: CallbackContext) -> NotificationDispatcher:
+    """
+    Рассылка процесса, общая для всех запусков deliver_notifications:
+    одновременные запуски делят один лимит частоты отправки. Воркеры
+    start_bot --workers N делят между собой общий лимит поровну.
+    """
+
+    dispatcher = context.bot_data.get(DISPATCHER_KEY)
+    if dispatcher is None:
+        dispatcher = context.bot_data[DISPATCHER_KEY] = (
+            NotificationDispatcher.from_settings(
+                context.bot, workers=context.bot_data.get(WORKERS_KEY, 1)
+            )
+        )
+    return dispatcher
+
+
+async def deliver_notifications(context: CallbackContext) -> None:
+    """
+    Задача job_queue: забирает готовые уведомления пачками и отправляет
+    их, пока очередь не опустеет.
+    """
+
+    dispatcher = get_dispatcher(context)
+    batch_size = settings.NOTIFICATION_BATCH_SIZE
+
+    while True:
+        claimed = await database_sync_to_async(claim_notifications)(batch_size)
+        if not claimed:
+            return
+
+        # Одинаковый текст отправляется одним вызовом рассылки
+        by_text: dict = {}
+        for row in claimed:
+            by_text.setdefault(row.text, []).append(row)
+        for text, rows in by_text.items():
+            chat_ids = list(dict.fromkeys(row.chat_id for row in rows))
+            report = await dispatcher.send_many(chat_ids, text)
+            await database_sync_to_async(complete_notifications)(rows, report)
+            if report.failed:
+                logger.warning(f'Отправка из очереди: {report}.')
+            else:
+                logger.info(f'Отправка из очереди: {report}.')
+
+        if len(claimed) < batch_size:
+            return
@@ -0,0 +1,235 @@
+"""
+Синхронизация вопросов с CSV-файлом (name, description, syntax, tags).
+
+Для каждой строки считается хеш содержимого (описание, синтаксис,
+теги) и сравнивается с Question.content_hash. Записываются только
+новые и изменившиеся вопросы; у изменившихся теги заменяются целиком.
+С prune вопросы, которых нет в файле, удаляются.
+
+Файл читается потоком и обрабатывается пачками по batch_size строк
+в одной транзакции. На пачку уходит несколько запросов: хеши уже
+существующих вопросов, upsert bulk_create(update_conflicts=True)
+по name, id новых вопросов, замена связей с тегами. Теги загружаются
+один раз и хранятся в памяти.
+
+Версия каталога увеличивается один раз и только если что-то
+изменилось, поэтому запущенные боты перезагружают каталог лишь
+при реальных изменениях. В режиме dry_run синхронизация выполняется
+целиком, а транзакция откатывается: отчёт точный, но БД не меняется.
+"""
+
+import csv
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO
+
+from django.db import transaction
+
+from bot.models import Question, Tag
+from bot.services.catalog import (
+    bump_catalog_version,
+    catalog_bumps_suppressed,
+)
+
+logger = logging.getLogger(__name__)
+
+QuestionTag = Question.tags.through
+
+
+@dataclass
+class QuestionRow:
+    """Строка CSV с вопросом."""
+
+    name: str
+    description: str
+    syntax: str
+    tags: List[str]
+
+    def content_hash(self, tag_ids: Iterable[int]) -> str:
+        """
+        Хеш содержимого. Теги входят найденными id: тег, которого ещё
+        нет в БД, не попадает в хеш, и после его создания строка
+        считается изменившейся.
+        """
+
+        content = '\x1f'.join(
+            [self.description, self.syntax, *map(str, sorted(tag_ids))]
+        )
+        return hashlib.blake2b(
+            content.encode('utf-8'), digest_size=16
+        ).hexdigest()
+
+
+@dataclass
+class SyncReport:
+    """Итоги синхронизации: имена вопросов по виду изменения."""
+
+    rows: int = 0
+    created: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    invalid: List[Dict[str, str]] = field(default_factory=list)
+    missing_tags: Set[str] = field(default_factory=set)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.created or self.updated or self.deleted)
+
+
+def read_rows(file: TextIO, report: SyncReport) -> Iterator[QuestionRow]:
+    """Читает строки CSV; строки без обязательных полей — в report."""
+
+    for row in csv.DictReader(file):
+        name = (row.get('name') or '').strip()
+        description = row.get('description')
+        if not name or not description:
+            report.invalid.append(row)
+            continue
+        report.rows += 1
+        yield QuestionRow(
+            name=name,
+            description=description,
+            syntax=row.get('syntax') or '',
+            tags=[
+                tag_name.strip()
+                for tag_name in (row.get('tags') or '').split(',')
+                if tag_name.strip()
+            ],
+        )
+
+
+def batched(rows: Iterable[QuestionRow], size: int):
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class QuestionSync:
+    """Синхронизирует таблицу Question с файлом вопросов."""
+
+    def __init__(
+        self,
+        batch_size: int = 1000,
+        prune: bool = False,
+        dry_run: bool = False,
+    ) -> None:
+        self.batch_size = batch_size
+        self.prune = prune
+        self.dry_run = dry_run
+        self._tags: Optional[Dict[str, int]] = None
+
+    def run(self, file: TextIO) -> SyncReport:
+        report = SyncReport()
+        names: Set[str] = set()
+        # Сигналы удаления вопросов не увеличивают версию каталога
+        # на каждый вопрос: это делается один раз в конце
+        with catalog_bumps_suppressed(), transaction.atomic():
+            self._tags = dict(Tag.objects.values_list('name', 'id'))
+            for batch in batched(read_rows(file, report), self.batch_size):
+                names.update(row.name for row in batch)
+                self.sync_batch(batch, report)
+            if self.prune:
+                self.delete_missing(names, report)
+            if self.dry_run:
+                transaction.set_rollback(True)
+            elif report.changed:
+                # Версию каталога увеличиваем сами, один раз
+                # на синхронизацию
+                transaction.on_commit(bump_catalog_version)
+        logger.info(
+            f'Синхронизация вопросов: {report.rows} строк, '
+            f'создано {len(report.created)}, '
+            f'обновлено {len(report.updated)}, '
+            f'удалено {len(report.deleted)}.'
+        )
+        return report
+
+    def sync_batch(self, batch: List[QuestionRow], report: SyncReport) -> None:
+        # Повтор имени внутри пачки: побеждает последняя строка
+        rows = {row.name: row for row in batch}
+        saved = {
+            name: (question_id, content_hash)
+            for name, question_id, content_hash in Question.objects.filter(
+                name__in=rows
+            ).values_list('name', 'id', 'content_hash')
+        }
+
+        tag_ids: Dict[str, List[int]] = {}
+        for name, row in rows.items():
+            tag_ids[name] = []
+            for tag_name in row.tags:
+                tag_id = self._tags.get(tag_name)
+                if tag_id is None:
+                    report.missing_tags.add(tag_name)
+                else:
+                    tag_ids[name].append(tag_id)
+
+        changed: Dict[str, str] = {}
+        for name, row in rows.items():
+            content_hash = row.content_hash(tag_ids[name])
+            if name in saved and saved[name][1] == content_hash:
+                report.unchanged += 1
+                continue
+            changed[name] = content_hash
+            if name in saved:
+                report.updated.append(name)
+            else:
+                report.created.append(name)
+        if not changed:
+            return
+
+        Question.objects.bulk_create(
+            [
+                Question(
+                    name=name,
+                    description=rows[name].description,
+                    syntax=rows[name].syntax,
+                    content_hash=content_hash,
+                )
+                for name, content_hash in changed.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['name'],
+            update_fields=['description', 'syntax', 'content_hash'],
+        )
+        ids = {name: question_id for name, (question_id, _) in saved.items()}
+        new_names = [name for name in changed if name not in ids]
+        if new_names:
+            ids.update(
+                Question.objects.filter(name__in=new_names).values_list(
+                    'name', 'id'
+                )
+            )
+
+        # Теги изменившихся вопросов заменяются целиком
+        updated_ids = [ids[name] for name in changed if name in saved]
+        if updated_ids:
+            QuestionTag.objects.filter(question_id__in=updated_ids).delete()
+        links = [
+            QuestionTag(question_id=ids[name], tag_id=tag_id)
+            for name in changed
+            for tag_id in tag_ids[name]
+        ]
+        QuestionTag.objects.bulk_create(links, ignore_conflicts=True)
+
+    def delete_missing(self, names: Set[str], report: SyncReport) -> None:
+        """Удаляет вопросы, которых нет в файле."""
+
+        missing = {
+            question_id: name
+            for question_id, name in Question.objects.values_list(
+                'id', 'name'
+            ).iterator()
+            if name not in names
+        }
+        if not missing:
+            return
+        ids = list(missing)
+        for start in range(0, len(ids), self.batch_size):
+            Question.objects.filter(
+                id__in=ids[start : start + self.batch_size]
+            ).delete()
+        report.deleted.extend(sorted(missing.values()))
@@ -0,0 +1,549 @@
+"""
+Сохранение незавершённых викторин между перезапусками бота.
+
+QuizSessionPersistence подключается к Application как persistence
+python-telegram-bot и сохраняет из user_data только викторину
+(QuizSession): id вопросов, позицию, счёт, маску ответов, тему,
+id викторины и номер правильного варианта на кнопках.
+Тексты вопросов не сохраняются — они берутся из каталога.
+
+Хранилище подключаемое (QUIZ_SESSION_BACKEND):
+- database — таблица QuizSessionState в основной БД (Postgres);
+- sqlite — локальный файл SQLite для разработки без Postgres.
+
+Запись идёт пачкой раз в QUIZ_SESSION_FLUSH_INTERVAL секунд: PTB копит
+изменённых пользователей и передаёт их разом, неизменившиеся записи
+не пишутся, а все изменения за интервал уходят одним запросом.
+"""
+
+import asyncio
+import logging
+import os
+import secrets
+import sqlite3
+from array import array
+from contextlib import closing
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from telegram.ext import BasePersistence, PersistenceInput
+
+from bot.models import Question, QuizSessionState
+from bot.services.answer_buttons import AnswerButton
+from bot.services.catalog import get_catalog
+from bot.services.db_executor import database_sync_to_async
+from bot.services.sharding import shard_for
+
+logger = logging.getLogger(__name__)
+
+SESSION_KEY = 'quiz_session'
+
+
+class QuizSessionRecord(NamedTuple):
+    """Компактное состояние викторины одного пользователя."""
+
+    question_ids: Tuple[int, ...]
+    position: int
+    correct: int
+    answers: int
+    tag_slug: str
+    session_id: int = 0
+    correct_option: int = 0
+
+    def pack_ids(self) -> bytes:
+        return array('q', self.question_ids).tobytes()
+
+    @staticmethod
+    def unpack_ids(data: bytes) -> Tuple[int, ...]:
+        ids = array('q')
+        ids.frombytes(bytes(data))
+        return tuple(ids)
+
+
+class QuizSession:
+    """
+    Викторина одного пользователя.
+
+    Хранит только id вопросов (array), курсор, число правильных ответов
+    и битовую маску отвеченных вопросов; текст вопросов берётся из общего
+    каталога по требованию. Курсор указывает на следующий вопрос, текущим
+    считается вопрос перед курсором, поэтому переход к следующему — O(1).
+
+    session_id — случайный id викторины, который попадает в кнопки
+    ответов; correct_option — номер правильного варианта на кнопках
+    текущего вопроса.
+    """
+
+    __slots__ = (
+        'question_ids',
+        'cursor',
+        'correct',
+        'answers',
+        'tag_slug',
+        'session_id',
+        'correct_option',
+    )
+
+    def __init__(
+        self,
+        question_ids: Iterable[int],
+        tag_slug: str,
+        cursor: int = 0,
+        correct: int = 0,
+        answers: int = 0,
+        session_id: Optional[int] = None,
+        correct_option: int = 0,
+    ) -> None:
+        self.question_ids = array('q', question_ids)
+        self.tag_slug = tag_slug
+        self.cursor = cursor
+        self.correct = correct
+        self.answers = answers
+        if session_id is None:
+            session_id = secrets.randbits(32)
+        self.session_id = session_id
+        self.correct_option = correct_option
+
+    def __len__(self) -> int:
+        return len(self.question_ids)
+
+    @property
+    def remaining(self) -> int:
+        """Сколько вопросов осталось после текущего."""
+
+        return len(self.question_ids) - self.cursor
+
+    @property
+    def current_id(self) -> Optional[int]:
+        """id текущего вопроса или None, если викторина не начата."""
+
+        if self.cursor == 0:
+            return None
+        return self.question_ids[self.cursor - 1]
+
+    def current_question(self) -> Optional[Question]:
+        """Текущий вопрос из каталога."""
+
+        current_id = self.current_id
+        if current_id is None:
+            return None
+        return get_catalog().get(current_id)
+
+    def advance(self) -> Optional[Question]:
+        """
+        Переходит к следующему вопросу и возвращает его. Вопросы,
+        удалённые из каталога, пропускаются. None — вопросы кончились.
+        """
+
+        while self.cursor < len(self.question_ids):
+            self.cursor += 1
+            question = self.current_question()
+            if question is not None:
+                return question
+        return None
+
+    @property
+    def is_answered(self) -> bool:
+        """Дан ли уже ответ на текущий вопрос."""
+
+        return bool(self.answers >> (self.cursor - 1) & 1)
+
+    @property
+    def is_finished(self) -> bool:
+        """Вопросы кончились и на последний показанный дан ответ."""
+
+        return self.remaining == 0 and (self.cursor == 0 or self.is_answered)
+
+    def answer_button(self, option: int) -> AnswerButton:
+        """Кнопка варианта ответа option на текущий вопрос."""
+
+        return AnswerButton(self.session_id, self.current_id, option)
+
+    def is_current(self, button: AnswerButton) -> bool:
+        """Относится ли кнопка к текущему вопросу этой викторины."""
+
+        return (
+            button.session_id == self.session_id
+            and button.question_id == self.current_id
+        )
+
+    def record_answer(self, is_correct: bool) -> bool:
+        """
+        Засчитывает ответ на текущий вопрос. Повторный ответ на тот же
+        вопрос не засчитывается, тогда возвращается False.
+        """
+
+        if self.cursor == 0 or self.is_answered:
+            return False
+        self.answers |= 1 << (self.cursor - 1)
+        if is_correct:
+            self.correct += 1
+        return True
+
+    def to_record(self) -> QuizSessionRecord:
+        return QuizSessionRecord(
+            tuple(self.question_ids),
+            self.cursor,
+            self.correct,
+            self.answers,
+            self.tag_slug,
+            self.session_id,
+            self.correct_option,
+        )
+
+    @classmethod
+    def from_record(cls, record: QuizSessionRecord) -> 'QuizSession':
+        return cls(
+            record.question_ids,
+            record.tag_slug,
+            cursor=record.position,
+            correct=record.correct,
+            answers=record.answers,
+            session_id=record.session_id,
+            correct_option=record.correct_option,
+        )
+
+
+def record_from_user_data(
+    user_data: Dict[str, Any],
+) -> Optional[QuizSessionRecord]:
+    """Извлекает запись викторины из user_data (None — викторины нет)."""
+
+    session = user_data.get(SESSION_KEY)
+    if session is None:
+        return None
+    return session.to_record()
+
+
+def user_data_from_record(record: QuizSessionRecord) -> Dict[str, Any]:
+    """Восстанавливает user_data с викториной по записи."""
+
+    return {SESSION_KEY: QuizSession.from_record(record)}
+
+
+class DatabaseSessionStore:
+    """Хранилище записей в таблице QuizSessionState."""
+
+    def load_all(self) -> Dict[int, QuizSessionRecord]:
+        return {
+            user_id: QuizSessionRecord(
+                QuizSessionRecord.unpack_ids(question_ids),
+                position,
+                correct,
+                answers,
+                tag_slug,
+                session_id,
+                correct_option,
+            )
+            for (
+                user_id,
+                question_ids,
+                position,
+                correct,
+                answers,
+                tag_slug,
+                session_id,
+                correct_option,
+            ) in (
+                QuizSessionState.objects.values_list(
+                    'user_id',
+                    'question_ids',
+                    'position',
+                    'correct',
+                    'answers',
+                    'tag_slug',
+                    'session_id',
+                    'correct_option',
+                ).iterator()
+            )
+        }
+
+    def save_many(
+        self, records: Dict[int, Optional[QuizSessionRecord]]
+    ) -> None:
+        rows = [
+            QuizSessionState(
+                user_id=user_id,
+                question_ids=record.pack_ids(),
+                position=record.position,
+                correct=record.correct,
+                answers=record.answers,
+                tag_slug=record.tag_slug,
+                session_id=record.session_id,
+                correct_option=record.correct_option,
+            )
+            for user_id, record in records.items()
+            if record is not None
+        ]
+        deleted = [
+            user_id for user_id, record in records.items() if record is None
+        ]
+        if rows:
+            QuizSessionState.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['user_id'],
+                update_fields=[
+                    'question_ids',
+                    'position',
+                    'correct',
+                    'answers',
+                    'tag_slug',
+                    'session_id',
+                    'correct_option',
+                    'updated_at',
+                ],
+            )
+        if deleted:
+            QuizSessionState.objects.filter(user_id__in=deleted).delete()
+
+
+class SQLiteSessionStore:
+    """Хранилище записей в локальном файле SQLite."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS quiz_session ('
+                'user_id INTEGER PRIMARY KEY, question_ids BLOB NOT NULL, '
+                'position INTEGER NOT NULL, correct INTEGER NOT NULL, '
+                'answers INTEGER NOT NULL, tag_slug TEXT NOT NULL, '
+                'session_id INTEGER NOT NULL DEFAULT 0, '
+                'correct_option INTEGER NOT NULL DEFAULT 0)'
+            )
+            # Файлы, созданные до появления колонок кнопок ответа
+            columns = {
+                row[1]
+                for row in connection.execute(
+                    'PRAGMA table_info(quiz_session)'
+                )
+            }
+            for column in ('session_id', 'correct_option'):
+                if column not in columns:
+                    connection.execute(
+                        f'ALTER TABLE quiz_session ADD COLUMN {column} '
+                        'INTEGER NOT NULL DEFAULT 0'
+                    )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def load_all(self) -> Dict[int, QuizSessionRecord]:
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                'SELECT user_id, question_ids, position, correct, answers, '
+                'tag_slug, session_id, correct_option FROM quiz_session'
+            ).fetchall()
+        return {
+            user_id: QuizSessionRecord(
+                QuizSessionRecord.unpack_ids(question_ids),
+                position,
+                correct,
+                answers,
+                tag_slug,
+                session_id,
+                correct_option,
+            )
+            for (
+                user_id,
+                question_ids,
+                position,
+                correct,
+                answers,
+                tag_slug,
+                session_id,
+                correct_option,
+            ) in rows
+        }
+
+    def save_many(
+        self, records: Dict[int, Optional[QuizSessionRecord]]
+    ) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                'INSERT INTO quiz_session VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(user_id) DO UPDATE SET '
+                'question_ids = excluded.question_ids, '
+                'position = excluded.position, '
+                'correct = excluded.correct, '
+                'answers = excluded.answers, '
+                'tag_slug = excluded.tag_slug, '
+                'session_id = excluded.session_id, '
+                'correct_option = excluded.correct_option',
+                [
+                    (
+                        user_id,
+                        record.pack_ids(),
+                        record.position,
+                        record.correct,
+                        record.answers,
+                        record.tag_slug,
+                        record.session_id,
+                        record.correct_option,
+                    )
+                    for user_id, record in records.items()
+                    if record is not None
+                ],
+            )
+            connection.executemany(
+                'DELETE FROM quiz_session WHERE user_id = ?',
+                [
+                    (user_id,)
+                    for user_id, record in records.items()
+                    if record is None
+                ],
+            )
+
+
+def get_session_store():
+    """Создаёт хранилище, выбранное в настройках."""
+
+    backend = settings.QUIZ_SESSION_BACKEND
+    if backend == 'database':
+        return DatabaseSessionStore()
+    if backend == 'sqlite':
+        return SQLiteSessionStore(settings.QUIZ_SESSION_SQLITE_PATH)
+    raise ValueError(f'Неизвестное хранилище викторин: {backend}')
+
+
+class QuizSessionPersistence(BasePersistence):
+    """
+    Persistence для Application, сохраняющая только викторины из
+    user_data. Остальные данные (bot_data, chat_data, callback_data,
+    состояния ConversationHandler) не сохраняются.
+    """
+
+    def __init__(
+        self,
+        store,
+        update_interval: float,
+        shard: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        super().__init__(
+            store_data=PersistenceInput(
+                bot_data=False,
+                chat_data=False,
+                user_data=True,
+                callback_data=False,
+            ),
+            update_interval=update_interval,
+        )
+        self.store = store
+        # (номер воркера, число воркеров): воркер загружает только
+        # викторины своих пользователей
+        self.shard = shard
+        self._saved: Dict[int, Optional[QuizSessionRecord]] = {}
+        self._pending: Dict[int, Optional[QuizSessionRecord]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_settings(
+        cls, shard: Optional[Tuple[int, int]] = None
+    ) -> 'QuizSessionPersistence':
+        return cls(
+            get_session_store(),
+            update_interval=settings.QUIZ_SESSION_FLUSH_INTERVAL,
+            shard=shard,
+        )
+
+    async def get_user_data(self) -> Dict[int, Dict[str, Any]]:
+        records = await database_sync_to_async(self.store.load_all)()
+        if self.shard is not None:
+            index, workers = self.shard
+            records = {
+                user_id: record
+                for user_id, record in records.items()
+                if shard_for(user_id, workers) == index
+            }
+        await get_catalog().aensure_loaded()
+        self._saved = dict(records)
+        logger.info(f'Восстановлено незавершённых викторин: {len(records)}.')
+        return {
+            user_id: user_data_from_record(record)
+            for user_id, record in records.items()
+        }
+
+    async def update_user_data(
+        self, user_id: int, data: Dict[str, Any]
+    ) -> None:
+        await self._stage(user_id, record_from_user_data(data))
+
+    async def drop_user_data(self, user_id: int) -> None:
+        await self._stage(user_id, None)
+
+    async def _stage(
+        self, user_id: int, record: Optional[QuizSessionRecord]
+    ) -> None:
+        if self._saved.get(user_id) == record:
+            return
+        self._pending[user_id] = record
+        # PTB вызывает update_user_data для всех пользователей
+        # одновременно, поэтому первый вызов запускает общую запись,
+        # а остальные успевают добавить в неё свои изменения.
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._write_pending())
+        await asyncio.shield(self._flush_task)
+
+    async def _write_pending(self) -> None:
+        await asyncio.sleep(0)
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            await database_sync_to_async(self.store.save_many)(pending)
+        except Exception as e:
+            logger.error(f'Не удалось сохранить викторины: {e}')
+            # Вернём изменения, чтобы записать их в следующий раз
+            self._pending = {**pending, **self._pending}
+            return
+        for user_id, record in pending.items():
+            if record is None:
+                self._saved.pop(user_id, None)
+            else:
+                self._saved[user_id] = record
+        logger.debug(f'Сохранено викторин: {len(pending)}.')
+
+    async def flush(self) -> None:
+        if self._flush_task is not None:
+            await self._flush_task
+        await self._write_pending()
+
+    async def get_chat_data(self) -> Dict[int, Any]:
+        return {}
+
+    async def get_bot_data(self) -> Dict[Any, Any]:
+        return {}
+
+    async def get_callback_data(self) -> None:
+        return None
+
+    async def get_conversations(self, name: str) -> Dict:
+        return {}
+
+    async def update_conversation(self, name: str, key, new_state) -> None:
+        pass
+
+    async def update_chat_data(self, chat_id: int, data) -> None:
+        pass
+
+    async def update_bot_data(self, data) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_user_data(self, user_id: int, user_data) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data) -> None:
+        pass
@@ -0,0 +1,145 @@
+"""
+Статистика пользователя для команды /stats.
+
+Каждая завершённая викторина записывается в QuizResult (история)
+и сразу применяется к UserStatsRollup — одной строке на пользователя
+с общими счётчиками, серией дней подряд и счётчиками по темам.
+Команда /stats читает только эту строку по первичному ключу.
+
+Сводки можно пересчитать из истории командой rebuild_stats_rollups.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from bot.models import QuizResult, UserStatsRollup
+
+logger = logging.getLogger(__name__)
+
+
+def apply_result(
+    rollup: UserStatsRollup,
+    tag_slug: str,
+    total: int,
+    correct: int,
+    day: date,
+) -> None:
+    """Добавляет результат викторины к сводке (без сохранения)."""
+
+    rollup.quizzes += 1
+    rollup.questions += total
+    rollup.correct += correct
+
+    tag = rollup.by_tag.setdefault(tag_slug, [0, 0, 0])
+    tag[0] += 1
+    tag[1] += total
+    tag[2] += correct
+
+    if rollup.last_quiz_date == day:
+        pass
+    elif rollup.last_quiz_date == day - timedelta(days=1):
+        rollup.streak += 1
+    else:
+        rollup.streak = 1
+    rollup.best_streak = max(rollup.best_streak, rollup.streak)
+    rollup.last_quiz_date = day
+
+
+def record_quiz_result(
+    user_id: int,
+    tag_slug: str,
+    total: int,
+    correct: int,
+    finished_at: Optional[datetime] = None,
+) -> UserStatsRollup:
+    """Сохраняет результат викторины и обновляет сводку пользователя."""
+
+    finished_at = finished_at or timezone.now()
+    with transaction.atomic():
+        QuizResult.objects.create(
+            user_id=user_id,
+            tag_slug=tag_slug,
+            total=total,
+            correct=correct,
+            finished_at=finished_at,
+        )
+        rollup, _ = UserStatsRollup.objects.select_for_update().get_or_create(
+            user_id=user_id
+        )
+        apply_result(
+            rollup, tag_slug, total, correct, timezone.localdate(finished_at)
+        )
+        rollup.save()
+    return rollup
+
+
+def current_streak(rollup: UserStatsRollup, today: date) -> int:
+    """Серия дней подряд с викторинами на сегодня (0 — прервана)."""
+
+    if rollup.last_quiz_date is None or rollup.last_quiz_date < today - (
+        timedelta(days=1)
+    ):
+        return 0
+    return rollup.streak
+
+
+def lock_rollups() -> None:
+    """
+    Блокирует запись в UserStatsRollup до конца транзакции. Чтение
+    (/stats) не блокируется. Блокировка дожидается транзакций, уже
+    обновивших сводки, поэтому их результаты видны после неё.
+    """
+
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'LOCK TABLE {} IN EXCLUSIVE MODE'.format(
+                connection.ops.quote_name(UserStatsRollup._meta.db_table)
+            )
+        )
+
+
+def rebuild_rollups(batch_size: int = 1000) -> int:
+    """
+    Пересчитывает все сводки из истории QuizResult.
+
+    Чтение истории и запись сводок идут в одной транзакции под
+    блокировкой таблицы сводок: викторина, завершённая во время
+    пересчёта, ждёт его окончания и применяется уже к новой сводке.
+    """
+
+    rollups: Dict[int, UserStatsRollup] = {}
+    with transaction.atomic():
+        lock_rollups()
+        results = (
+            QuizResult.objects.order_by('user_id', 'finished_at')
+            .values_list(
+                'user_id', 'tag_slug', 'total', 'correct', 'finished_at'
+            )
+            .iterator(chunk_size=batch_size)
+        )
+        for user_id, tag_slug, total, correct, finished_at in results:
+            rollup = rollups.get(user_id)
+            if rollup is None:
+                rollup = rollups[user_id] = UserStatsRollup(
+                    user_id=user_id, by_tag={}
+                )
+            apply_result(
+                rollup,
+                tag_slug,
+                total,
+                correct,
+                timezone.localdate(finished_at),
+            )
+
+        UserStatsRollup.objects.all().delete()
+        UserStatsRollup.objects.bulk_create(
+            rollups.values(), batch_size=batch_size
+        )
+    logger.info(f'Пересчитано сводок статистики: {len(rollups)}.')
+    return len(rollups)
@@ -0,0 +1,253 @@
+"""
+Вопросы, которые пользователь уже видел, — чтобы викторины не
+повторялись.
+
+Для каждого пользователя хранится битовая маска по id вопросов
+(SeenQuestions.bits): бит id установлен, если на вопрос отвечали.
+Маски живут в LRU-кэше процесса на SEEN_QUESTIONS_CACHE_SIZE
+пользователей. Ответ только выставляет бит в памяти; изменённые маски
+пишутся в БД пачкой раз в SEEN_QUESTIONS_FLUSH_INTERVAL секунд и при
+остановке бота.
+
+Викторина выбирает вопросы темы равномерно среди невиденных: маска
+проверяется для всех вопросов темы сразу средствами numpy, без запросов
+к истории ответов. Когда невиденных вопросов темы не хватает, биты этой
+темы сбрасываются и тема начинается заново.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from django.conf import settings
+from telegram.ext import CallbackContext
+
+from bot.models import SeenQuestions
+from bot.services.db_executor import database_sync_to_async
+
+logger = logging.getLogger(__name__)
+
+rng = np.random.default_rng()
+
+# Telegram ID -> (маска, загружена ли она из БД целиком)
+PendingBits = Dict[int, Tuple[bytes, bool]]
+
+
+def set_bit(bits: bytearray, question_id: int) -> None:
+    """Отмечает вопрос в маске, расширяя её при необходимости."""
+
+    index = question_id >> 3
+    if index >= len(bits):
+        bits.extend(bytes(index + 1 - len(bits)))
+    bits[index] |= 1 << (question_id & 7)
+
+
+def seen_mask(bits: bytearray, question_ids: np.ndarray) -> np.ndarray:
+    """Для каждого id из question_ids — установлен ли его бит."""
+
+    data = np.frombuffer(bits, dtype=np.uint8)
+    index = question_ids >> 3
+    inside = index < len(data)
+    mask = np.zeros(len(question_ids), dtype=bool)
+    mask[inside] = (data[index[inside]] >> (question_ids[inside] & 7)) & 1
+    return mask
+
+
+def clear_bits(bits: bytearray, question_ids: np.ndarray) -> None:
+    """Снимает биты вопросов question_ids."""
+
+    data = np.frombuffer(bits, dtype=np.uint8)
+    question_ids = question_ids[(question_ids >> 3) < len(data)]
+    np.bitwise_and.at(
+        data,
+        question_ids >> 3,
+        ~(1 << (question_ids & 7)).astype(np.uint8),
+    )
+
+
+def merge_bits(left: bytes, right: bytes) -> bytes:
+    """Побитовое ИЛИ двух масок разной длины."""
+
+    if len(left) < len(right):
+        left, right = right, left
+    merged = np.frombuffer(left, dtype=np.uint8).copy()
+    merged[: len(right)] |= np.frombuffer(right, dtype=np.uint8)
+    return merged.tobytes()
+
+
+def load_bits(user_id: int) -> bytes:
+    """Маска пользователя из БД (пустая, если её нет)."""
+
+    bits = (
+        SeenQuestions.objects.filter(user_id=user_id)
+        .values_list('bits', flat=True)
+        .first()
+    )
+    return bytes(bits) if bits is not None else b''
+
+
+def save_bits(pending: PendingBits) -> int:
+    """
+    Сохраняет маски. Маски, не загруженные из БД (ответы после
+    перезапуска без старта викторины), объединяются с сохранёнными.
+    """
+
+    partial = [
+        user_id for user_id, (_, loaded) in pending.items() if not loaded
+    ]
+    stored = dict(
+        SeenQuestions.objects.filter(user_id__in=partial).values_list(
+            'user_id', 'bits'
+        )
+    )
+    rows = [
+        SeenQuestions(
+            user_id=user_id,
+            bits=merge_bits(bits, bytes(stored.get(user_id, b'')))
+            if not loaded
+            else bits,
+        )
+        for user_id, (bits, loaded) in pending.items()
+    ]
+    SeenQuestions.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['user_id'],
+        update_fields=['bits', 'updated_at'],
+    )
+    return len(rows)
+
+
+class SeenQuestionsCache:
+    """LRU-кэш масок показанных вопросов с отложенной записью."""
+
+    def __init__(self, max_users: int) -> None:
+        self.max_users = max_users
+        self._bits: OrderedDict[int, bytearray] = OrderedDict()
+        self._loaded: Set[int] = set()
+        self._dirty: Set[int] = set()
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._bits)
+
+    async def aget(self, user_id: int) -> bytearray:
+        """Маска пользователя; из БД — только при первом обращении."""
+
+        if user_id in self._loaded:
+            self._bits.move_to_end(user_id)
+            return self._bits[user_id]
+
+        stored = await database_sync_to_async(load_bits)(user_id)
+        if user_id not in self._loaded:
+            # Биты, отмеченные до загрузки, объединяются с сохранёнными
+            marked = self._bits.get(user_id)
+            self._bits[user_id] = bytearray(
+                merge_bits(stored, marked) if marked else stored
+            )
+            self._loaded.add(user_id)
+        self._bits.move_to_end(user_id)
+        self._evict()
+        return self._bits[user_id]
+
+    def mark(self, user_id: int, question_id: int) -> None:
+        """Отмечает вопрос показанным. Без обращений к БД."""
+
+        bits = self._bits.get(user_id)
+        if bits is None:
+            bits = self._bits[user_id] = bytearray()
+        else:
+            self._bits.move_to_end(user_id)
+        set_bit(bits, question_id)
+        self._dirty.add(user_id)
+        self._evict()
+
+    async def sample(
+        self,
+        user_id: int,
+        question_ids: Iterable[int],
+        count: int,
+        exclude: Iterable[int] = (),
+    ) -> List[int]:
+        """
+        Выбирает до count случайных id из question_ids (вопросы темы),
+        которые пользователь ещё не видел. Если их не хватает, биты
+        темы сбрасываются и недостающие вопросы берутся из остальных.
+        """
+
+        bits = await self.aget(user_id)
+        candidates = np.asarray(question_ids, dtype=np.int64)
+        exclude = list(exclude)
+        if exclude:
+            candidates = candidates[np.isin(candidates, exclude, invert=True)]
+        if count <= 0 or not len(candidates):
+            return []
+
+        seen = seen_mask(bits, candidates)
+        unseen = candidates[~seen]
+        if len(unseen) >= count:
+            return rng.choice(unseen, size=count, replace=False).tolist()
+
+        logger.info(
+            f'Пользователь {user_id} видел почти все вопросы темы, '
+            'маска темы сброшена.'
+        )
+        clear_bits(bits, candidates[seen])
+        self._dirty.add(user_id)
+        rest = candidates[seen]
+        extra = rng.choice(
+            rest, size=min(count - len(unseen), len(rest)), replace=False
+        )
+        return rng.permutation(np.concatenate([unseen, extra])).tolist()
+
+    def _evict(self) -> None:
+        # Несохранённые маски и последняя использованная остаются в кэше
+        if len(self._bits) <= self.max_users:
+            return
+        for user_id in list(self._bits)[:-1]:
+            if len(self._bits) <= self.max_users:
+                return
+            if user_id not in self._dirty:
+                del self._bits[user_id]
+                self._loaded.discard(user_id)
+
+    async def flush(self) -> int:
+        """Пишет изменённые маски в БД, возвращает их число."""
+
+        async with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            pending: PendingBits = {
+                user_id: (bytes(self._bits[user_id]), user_id in self._loaded)
+                for user_id in dirty
+                if user_id in self._bits
+            }
+            if not pending:
+                return 0
+            try:
+                saved = await database_sync_to_async(save_bits)(pending)
+            except Exception as e:
+                logger.error(f'Не удалось сохранить показанные вопросы: {e}')
+                self._dirty |= dirty
+                return 0
+        logger.debug(f'Сохранены показанные вопросы {saved} пользователей.')
+        return saved
+
+
+seen_questions: Optional[SeenQuestionsCache] = None
+
+
+def get_seen_questions() -> SeenQuestionsCache:
+    """Возвращает кэш показанных вопросов текущего процесса."""
+
+    global seen_questions
+    if seen_questions is None:
+        seen_questions = SeenQuestionsCache(settings.SEEN_QUESTIONS_CACHE_SIZE)
+    return seen_questions
+
+
+async def flush_seen_questions(context: CallbackContext) -> None:
+    """Задача job_queue: периодическая запись показанных вопросов."""
+
+    await get_seen_questions().flush()
@@ -0,0 +1,52 @@
+"""
+Распределение обновлений между процессами-воркерами бота.
+
+Обновление направляется воркеру по id пользователя, поэтому все
+обновления одного пользователя (и его user_data) остаются в одном
+процессе. Решение принимается по сырому JSON, без сборки Update.
+"""
+
+import zlib
+from typing import Any, Dict, Optional
+
+# Поля объектов Telegram, в которых лежит автор обновления
+USER_FIELDS = ('from', 'user')
+
+
+def shard_for(key: int, workers: int) -> int:
+    """
+    Номер воркера для пользователя (или чата) key. id хешируется:
+    остатки самих id по небольшому модулю распределены неравномерно,
+    а id групп отрицательные. crc32 не зависит от процесса и версии
+    Python, в отличие от hash().
+    """
+
+    return zlib.crc32(key.to_bytes(8, 'little', signed=True)) % workers
+
+
+def extract_user_id(data: Dict[str, Any]) -> Optional[int]:
+    """
+    Возвращает id пользователя из JSON обновления Telegram, а если
+    пользователя нет (например, пост в канале) — id чата.
+    """
+
+    for key, value in data.items():
+        if key == 'update_id' or not isinstance(value, dict):
+            continue
+        for field in USER_FIELDS:
+            user = value.get(field)
+            if isinstance(user, dict) and 'id' in user:
+                return user['id']
+        chat = value.get('chat')
+        if chat is None and isinstance(value.get('message'), dict):
+            chat = value['message'].get('chat')
+        if isinstance(chat, dict) and 'id' in chat:
+            return chat['id']
+    return None
+
+
+def shard_for_update(data: Dict[str, Any], workers: int) -> int:
+    """Номер воркера для обновления; обновления без автора — нулевому."""
+
+    key = extract_user_id(data)
+    return 0 if key is None else shard_for(key, workers)
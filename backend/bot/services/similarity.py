@@ -0,0 +1,316 @@
+"""
+Таблицы ближайших соседей для подбора правдоподобных дистракторов.
+
+Тексты вопросов (name, description, syntax) векторизуются символьными
+n-граммами с TF-IDF (хеширование n-грамм в вектор фиксированной длины),
+похожесть считается косинусной мерой. Для каждого вопроса сохраняются
+top-k ближайших соседей в компактный .npz файл, который бот читает при
+загрузке каталога и использует без вычислений.
+"""
+
+import hashlib
+import logging
+import os
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZES = (3, 4)
+DEFAULT_DIM = 4096
+DEFAULT_TOP_K = 10
+# Сколько строк матрицы похожести считать за раз (ограничивает память)
+CHUNK_SIZE = 512
+
+
+class QuestionText(NamedTuple):
+    """Текстовые поля вопроса, участвующие в векторизации."""
+
+    id: int
+    name: str
+    description: str
+    syntax: str
+
+
+class BuildStats(NamedTuple):
+    """Итоги построения таблицы соседей."""
+
+    total: int
+    changed: int
+    removed: int
+    recomputed: int
+    full: bool
+
+
+def content_hash(question: QuestionText) -> int:
+    """Стабильный 64-битный хеш текста вопроса."""
+
+    digest = hashlib.blake2b(
+        '\x1f'.join(
+            (question.name, question.description, question.syntax)
+        ).encode('utf-8'),
+        digest_size=8,
+    ).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def ngram_indices(text: str, dim: int) -> np.ndarray:
+    """Индексы хешированных символьных n-грамм текста."""
+
+    text = ' ' + ' '.join(text.lower().split()) + ' '
+    indices = [
+        zlib.crc32(text[start : start + size].encode('utf-8')) % dim
+        for size in NGRAM_SIZES
+        for start in range(len(text) - size + 1)
+    ]
+    return np.asarray(indices, dtype=np.int64)
+
+
+def term_frequencies(
+    questions: Sequence[QuestionText], dim: int
+) -> np.ndarray:
+    """Матрица частот n-грамм (сублинейный TF)."""
+
+    tf = np.zeros((len(questions), dim), dtype=np.float32)
+    for row, question in enumerate(questions):
+        indices = ngram_indices(
+            f'{question.name} {question.description} {question.syntax}', dim
+        )
+        if indices.size:
+            tf[row] = np.bincount(indices, minlength=dim)
+    np.log1p(tf, out=tf)
+    return tf
+
+
+def fit_idf(tf: np.ndarray) -> np.ndarray:
+    """Сглаженные обратные документные частоты."""
+
+    documents = tf.shape[0]
+    df = np.count_nonzero(tf, axis=0)
+    return (np.log((1 + documents) / (1 + df)) + 1).astype(np.float32)
+
+
+def tfidf_vectors(tf: np.ndarray, idf: np.ndarray) -> np.ndarray:
+    """Нормированные по L2 векторы TF-IDF."""
+
+    vectors = tf * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    vectors /= norms
+    return vectors
+
+
+def top_k(
+    similarities: np.ndarray, row_ids: np.ndarray, ids: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Выбирает k самых похожих столбцов для каждой строки,
+    исключая сам вопрос. Недостающие места заполняются -1.
+    """
+
+    similarities = similarities.copy()
+    similarities[ids[np.newaxis, :] == row_ids[:, np.newaxis]] = -np.inf
+
+    neighbours = np.full((len(row_ids), k), -1, dtype=np.int64)
+    scores = np.full((len(row_ids), k), -np.inf, dtype=np.float32)
+    take = min(k, similarities.shape[1])
+    if take == 0:
+        return neighbours, scores
+
+    if take < similarities.shape[1]:
+        columns = np.argpartition(-similarities, take - 1, axis=1)[:, :take]
+    else:
+        columns = np.tile(np.arange(take), (len(row_ids), 1))
+    picked = np.take_along_axis(similarities, columns, axis=1)
+    order = np.argsort(-picked, axis=1)
+    columns = np.take_along_axis(columns, order, axis=1)
+    picked = np.take_along_axis(picked, order, axis=1)
+
+    valid = np.isfinite(picked)
+    neighbours[:, :take] = np.where(valid, ids[columns], -1)
+    scores[:, :take] = np.where(valid, picked, -np.inf)
+    return neighbours, scores
+
+
+class NeighbourTable:
+    """Таблица top-k соседей: строка на вопрос."""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        hashes: np.ndarray,
+        neighbours: np.ndarray,
+        scores: np.ndarray,
+        idf: np.ndarray,
+    ) -> None:
+        self.ids = ids
+        self.hashes = hashes
+        self.neighbours = neighbours
+        self.scores = scores
+        self.idf = idf
+        self._rows: Dict[int, int] = {
+            int(question_id): row for row, question_id in enumerate(ids)
+        }
+
+    @property
+    def top_k(self) -> int:
+        return self.neighbours.shape[1]
+
+    def neighbours_of(self, question_id: int) -> List[int]:
+        """Соседи вопроса по убыванию похожести (пустой список, если нет)."""
+
+        row = self._rows.get(question_id)
+        if row is None:
+            return []
+        return [int(n) for n in self.neighbours[row] if n >= 0]
+
+    def save(self, path: str) -> None:
+        """Атомарно сохраняет таблицу в .npz файл."""
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as file:
+            np.savez_compressed(
+                file,
+                ids=self.ids,
+                hashes=self.hashes,
+                neighbours=self.neighbours,
+                scores=self.scores,
+                idf=self.idf,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional['NeighbourTable']:
+        """Загружает таблицу из файла; None, если файла нет или он битый."""
+
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return cls(
+                    data['ids'],
+                    data['hashes'],
+                    data['neighbours'],
+                    data['scores'],
+                    data['idf'],
+                )
+        except (OSError, KeyError, ValueError) as e:
+            logger.error(f'Не удалось загрузить таблицу соседей {path}: {e}')
+            return None
+
+
+def build_neighbour_table(
+    questions: Sequence[QuestionText],
+    previous: Optional[NeighbourTable] = None,
+    k: int = DEFAULT_TOP_K,
+    dim: int = DEFAULT_DIM,
+    full: bool = False,
+) -> Tuple[NeighbourTable, BuildStats]:
+    """
+    Строит таблицу соседей.
+
+    Если передана предыдущая таблица с теми же параметрами, пересчитываются
+    только изменённые вопросы и вопросы, в соседях которых были изменённые
+    или удалённые. Остальные строки лишь дополняются похожестью на
+    изменённые вопросы. IDF при инкрементальной сборке берётся из
+    предыдущей таблицы; полная пересборка (full=True) обучает его заново.
+    """
+
+    questions = sorted(questions, key=lambda question: question.id)
+    ids = np.array([q.id for q in questions], dtype=np.int64)
+    hashes = np.array([content_hash(q) for q in questions], dtype=np.uint64)
+    tf = term_frequencies(questions, dim)
+
+    incremental = (
+        not full
+        and previous is not None
+        and previous.idf.shape == (dim,)
+        and previous.top_k == k
+    )
+
+    if incremental:
+        idf = previous.idf
+        old_hashes = dict(zip(previous.ids.tolist(), previous.hashes.tolist()))
+        changed_mask = np.array(
+            [
+                old_hashes.get(question_id) != question_hash
+                for question_id, question_hash in zip(
+                    ids.tolist(), hashes.tolist()
+                )
+            ],
+            dtype=bool,
+        )
+        removed = set(previous.ids.tolist()) - set(ids.tolist())
+        changed_ids = set(ids[changed_mask].tolist())
+        stale = changed_ids | removed
+
+        neighbours = np.full((len(ids), k), -1, dtype=np.int64)
+        scores = np.full((len(ids), k), -np.inf, dtype=np.float32)
+        dirty_mask = changed_mask.copy()
+        for row, question_id in enumerate(ids.tolist()):
+            if changed_mask[row]:
+                continue
+            old_row = previous._rows[question_id]
+            old_neighbours = previous.neighbours[old_row]
+            if any(n in stale for n in old_neighbours.tolist() if n >= 0):
+                dirty_mask[row] = True
+            else:
+                neighbours[row] = old_neighbours
+                scores[row] = previous.scores[old_row]
+    else:
+        idf = fit_idf(tf)
+        changed_mask = np.ones(len(ids), dtype=bool)
+        dirty_mask = changed_mask
+        removed = set()
+        neighbours = np.full((len(ids), k), -1, dtype=np.int64)
+        scores = np.full((len(ids), k), -np.inf, dtype=np.float32)
+
+    vectors = tfidf_vectors(tf, idf)
+
+    # Полный пересчёт строк: похожесть со всеми вопросами
+    dirty_rows = np.flatnonzero(dirty_mask)
+    for start in range(0, len(dirty_rows), CHUNK_SIZE):
+        rows = dirty_rows[start : start + CHUNK_SIZE]
+        similarities = vectors[rows] @ vectors.T
+        neighbours[rows], scores[rows] = top_k(similarities, ids[rows], ids, k)
+
+    # Чистые строки: слияние старых соседей с изменёнными вопросами
+    changed_rows = np.flatnonzero(changed_mask)
+    clean_rows = np.flatnonzero(~dirty_mask)
+    if len(changed_rows) and len(clean_rows):
+        for start in range(0, len(clean_rows), CHUNK_SIZE):
+            rows = clean_rows[start : start + CHUNK_SIZE]
+            similarities = np.concatenate(
+                (scores[rows], vectors[rows] @ vectors[changed_rows].T),
+                axis=1,
+            )
+            candidates = np.concatenate(
+                (
+                    neighbours[rows],
+                    np.tile(ids[changed_rows], (len(rows), 1)),
+                ),
+                axis=1,
+            )
+            similarities[candidates < 0] = -np.inf
+            order = np.argsort(-similarities, axis=1)[:, :k]
+            picked = np.take_along_axis(similarities, order, axis=1)
+            valid = np.isfinite(picked)
+            neighbours[rows] = np.where(
+                valid, np.take_along_axis(candidates, order, axis=1), -1
+            )
+            scores[rows] = np.where(valid, picked, -np.inf)
+
+    table = NeighbourTable(ids, hashes, neighbours, scores, idf)
+    stats = BuildStats(
+        total=len(ids),
+        changed=int(changed_mask.sum()),
+        removed=len(removed),
+        recomputed=len(dirty_rows),
+        full=not incremental,
+    )
+    return table, stats
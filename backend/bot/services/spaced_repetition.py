@@ -0,0 +1,82 @@
+"""
+Интервальное повторение вопросов (алгоритм SM-2).
+
+После каждого ответа в UserQuestionStatistic пересчитываются
+коэффициент лёгкости (ease_factor), интервал в днях и число успешных
+повторений подряд, а due_at — время, когда вопрос пора повторить.
+
+Викторина в режиме spaced (QUIZ_SELECTION_MODE) сначала берёт вопросы
+темы, срок повторения которых наступил, в порядке due_at — это один
+запрос по индексу (user, due_at) с join тегов. Оставшиеся места
+занимают невиденные вопросы (bot.services.seen_questions).
+"""
+
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Tuple
+
+from django.utils import timezone
+
+from bot.models import UserQuestionStatistic
+
+MIN_EASE_FACTOR = 1.3
+DEFAULT_EASE_FACTOR = 2.5
+
+# Оценки SM-2 (0–5) для ответов в викторине
+CORRECT_QUALITY = 4
+WRONG_QUALITY = 1
+
+
+class ReviewState(NamedTuple):
+    """Состояние повторения вопроса пользователем."""
+
+    ease_factor: float = DEFAULT_EASE_FACTOR
+    interval: int = 0
+    repetitions: int = 0
+
+
+def review(state: ReviewState, quality: int) -> ReviewState:
+    """Шаг SM-2: новое состояние после ответа с оценкой quality (0–5)."""
+
+    ease_factor = max(
+        MIN_EASE_FACTOR,
+        state.ease_factor
+        + 0.1
+        - (5 - quality) * (0.08 + (5 - quality) * 0.02),
+    )
+    if quality < 3:
+        return ReviewState(ease_factor, 1, 0)
+
+    repetitions = state.repetitions + 1
+    if repetitions == 1:
+        interval = 1
+    elif repetitions == 2:
+        interval = 6
+    else:
+        interval = round(state.interval * state.ease_factor)
+    return ReviewState(ease_factor, interval, repetitions)
+
+
+def review_answer(
+    state: ReviewState, is_correct: bool, answered_at: datetime
+) -> Tuple[ReviewState, datetime]:
+    """Возвращает новое состояние и время следующего повторения."""
+
+    state = review(state, CORRECT_QUALITY if is_correct else WRONG_QUALITY)
+    return state, answered_at + timedelta(days=state.interval)
+
+
+def due_question_ids(user_pk: int, tag_slug: str, count: int) -> List[int]:
+    """
+    Возвращает до count id вопросов темы, которые пользователю
+    (pk CustomUser) пора повторить, в порядке due_at.
+    """
+
+    return list(
+        UserQuestionStatistic.objects.filter(
+            user_id=user_pk,
+            due_at__lte=timezone.now(),
+            question__tags__slug=tag_slug,
+        )
+        .order_by('due_at')
+        .values_list('question_id', flat=True)[:count]
+    )
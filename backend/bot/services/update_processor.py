@@ -0,0 +1,94 @@
+"""
+Параллельная обработка обновлений с сохранением порядка для пользователя.
+
+Обновления разных пользователей обрабатываются одновременно (не больше
+BOT_CONCURRENT_UPDATES), а обновления одного пользователя — строго
+по очереди. Так медленный запрос одного пользователя не задерживает
+остальных, а user_data (викторина, счётчики ответов) не меняется
+двумя обработчиками сразу.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+# Сколько обновлений может ждать своей очереди одновременно
+MAX_PENDING_UPDATES = 1024
+
+
+class UserLock:
+    """Блокировка пользователя и число ожидающих её обновлений."""
+
+    __slots__ = ('lock', 'waiters')
+
+    def __init__(self) -> None:
+        self.lock = asyncio.Lock()
+        self.waiters = 0
+
+
+def get_update_key(update: object) -> Optional[int]:
+    """Ключ очереди обновления: id пользователя, иначе id чата."""
+
+    if not isinstance(update, Update):
+        return None
+    if update.effective_user is not None:
+        return update.effective_user.id
+    if update.effective_chat is not None:
+        return update.effective_chat.id
+    return None
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Обрабатывает обновления параллельно, но последовательно для каждого
+    пользователя.
+
+    Общий лимит проверяется уже после захвата блокировки пользователя:
+    иначе пользователь, отправивший много обновлений подряд, занимал бы
+    слоты обработки, пока его обновления ждут друг друга.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_updates: int,
+        max_pending_updates: int = MAX_PENDING_UPDATES,
+    ) -> None:
+        super().__init__(max(max_pending_updates, max_concurrent_updates))
+        self.concurrency = max_concurrent_updates
+        self._slots = asyncio.BoundedSemaphore(max_concurrent_updates)
+        self._locks: Dict[int, UserLock] = {}
+
+    async def do_process_update(
+        self, update: object, coroutine: Awaitable[Any]
+    ) -> None:
+        key = get_update_key(update)
+        if key is None:
+            async with self._slots:
+                await coroutine
+            return
+
+        user_lock = self._locks.get(key)
+        if user_lock is None:
+            user_lock = self._locks[key] = UserLock()
+        user_lock.waiters += 1
+        try:
+            async with user_lock.lock, self._slots:
+                await coroutine
+        finally:
+            user_lock.waiters -= 1
+            if not user_lock.waiters:
+                del self._locks[key]
+
+    async def initialize(self) -> None:
+        logger.info(
+            'Параллельная обработка обновлений: '
+            f'до {self.concurrency} одновременно.'
+        )
+
+    async def shutdown(self) -> None:
+        pass
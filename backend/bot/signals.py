@@ -0,0 +1,43 @@
+"""
+Сигналы моделей: инвалидация кэша каталога вопросов
+при изменении вопросов и тегов.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from bot.models import Question, Tag
+from bot.services.catalog import bump_catalog_version, bumps_suppressed
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_catalog_bump(**kwargs) -> None:
+    """Увеличивает версию каталога после фиксации транзакции."""
+
+    if kwargs.get('raw') or bumps_suppressed.get():
+        return
+
+    logger.info('Каталог вопросов изменён, версия будет увеличена.')
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def handle_catalog_change(sender, **kwargs) -> None:
+    """Реагирует на изменение вопроса или тега."""
+
+    schedule_catalog_bump(**kwargs)
+
+
+@receiver(m2m_changed, sender=Question.tags.through)
+def handle_question_tags_change(sender, action, **kwargs) -> None:
+    """Реагирует на изменение тегов вопроса."""
+
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        schedule_catalog_bump(**kwargs)
@@ -0,0 +1,284 @@
+"""
+Режим нескольких процессов-воркеров бота (start_bot --workers N).
+
+Родительский процесс принимает обновления (webhook или polling) и по id
+пользователя раскладывает их JSON по очередям воркеров
+(multiprocessing.Queue). Родитель только разбирает JSON и выбирает
+воркера: объекты Update собирают воркеры. Каждый воркер — отдельный
+процесс со своим Application: обработчики, user_data и викторины его
+пользователей живут только в нём, а общая пропускная способность
+растёт с числом ядер. Очередь уведомлений заполняет нулевой воркер,
+а отправляют из неё все, деля между собой NOTIFICATION_RATE_LIMIT.
+
+Упавший воркер перезапускается с новой очередью: процесс мог умереть,
+держа блокировку чтения старой или прочитав сообщение наполовину, и
+читать из неё дальше небезопасно. Обновления, оставшиеся в старой
+очереди, теряются (число пишется в лог).
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import multiprocessing
+import signal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from telegram import Bot, Update
+
+from bot.services.sharding import shard_for_update
+
+logger = logging.getLogger(__name__)
+
+# Процессы запускаются через spawn: fork после инициализации Django
+# унаследовал бы открытые соединения с БД
+mp_context = multiprocessing.get_context('spawn')
+
+WATCHDOG_INTERVAL = 5
+STOP_TIMEOUT = 30
+
+API_URL = 'https://api.telegram.org/bot{token}/{method}'
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+# Long polling: сколько Telegram держит запрос getUpdates и пауза
+# после ошибки сети
+POLL_TIMEOUT = 30
+POLL_RETRY_DELAY = 5
+WEBHOOK_PORT = 8443
+
+
+def run_worker(index: int, workers: int, queue) -> None:
+    """Точка входа процесса-воркера."""
+
+    import django
+
+    django.setup()
+    logging.basicConfig(
+        level=logging.WARNING,
+        format=(
+            f'%(asctime)s - worker {index} - %(name)s - '
+            '%(levelname)s - %(message)s'
+        ),
+    )
+    # Остановкой воркеров управляет родитель через очередь
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(serve_worker(index, workers, queue))
+
+
+async def serve_worker(index: int, workers: int, queue) -> None:
+    """Передаёт обновления из очереди в Application воркера."""
+
+    from django.conf import settings
+
+    from bot.init import build_application, flush_on_shutdown
+    from bot.services.catalog import get_catalog
+    from bot.services.leaderboard import get_leaderboards
+    from bot.services.metrics import start_metrics_server
+
+    application = build_application(shard=(index, workers))
+    await get_catalog().aensure_loaded()
+    await get_leaderboards().aensure_loaded()
+    if settings.BOT_METRICS_PORT:
+        await start_metrics_server(
+            settings.BOT_METRICS_PORT + index, settings.BOT_METRICS_HOST
+        )
+    loop = asyncio.get_running_loop()
+
+    async with application:
+        await application.start()
+        logger.info(f'Воркер {index} из {workers} запущен.')
+        while True:
+            data = await loop.run_in_executor(None, queue.get)
+            if data is None:
+                break
+            try:
+                update = Update.de_json(data, application.bot)
+            except Exception as e:
+                logger.error(f'Некорректное обновление в воркере: {e}')
+                continue
+            await application.update_queue.put(update)
+        await application.stop()
+    await flush_on_shutdown(application)
+    logger.info(f'Воркер {index} остановлен.')
+
+
+class Supervisor:
+    """Запускает воркеры и раскладывает по ним обновления."""
+
+    def __init__(
+        self,
+        workers: int,
+        target: Callable = run_worker,
+        args: Tuple = (),
+    ) -> None:
+        self.workers = workers
+        # Точка входа воркера: target(номер, число воркеров, очередь, *args)
+        self.target = target
+        self.args = args
+        self.queues = [mp_context.Queue() for _ in range(workers)]
+        self.processes: List[Any] = [None] * workers
+
+    def start(self) -> None:
+        for index in range(self.workers):
+            self._start_worker(index)
+
+    def _start_worker(self, index: int) -> None:
+        process = mp_context.Process(
+            target=self.target,
+            args=(index, self.workers, self.queues[index], *self.args),
+            name=f'bot-worker-{index}',
+            daemon=True,
+        )
+        process.start()
+        self.processes[index] = process
+
+    def dispatch(self, data: Dict[str, Any]) -> None:
+        """Кладёт JSON обновления в очередь воркера его пользователя."""
+
+        self.queues[shard_for_update(data, self.workers)].put_nowait(data)
+
+    def feed(self, body: bytes) -> bool:
+        """
+        Принимает тело запроса webhook (JSON одного обновления).
+        Возвращает False, если это не обновление.
+        """
+
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return False
+        if not isinstance(data, dict) or 'update_id' not in data:
+            return False
+        self.dispatch(data)
+        return True
+
+    def restart_dead(self) -> None:
+        for index, process in enumerate(self.processes):
+            if process is not None and not process.is_alive():
+                logger.error(
+                    f'Воркер {index} завершился с кодом '
+                    f'{process.exitcode}, перезапуск.'
+                )
+                self._replace_queue(index)
+                self._start_worker(index)
+
+    def _replace_queue(self, index: int) -> None:
+        old_queue = self.queues[index]
+        self.queues[index] = mp_context.Queue()
+        try:
+            lost = old_queue.qsize()
+        except NotImplementedError:
+            lost = None
+        if lost:
+            logger.warning(
+                f'Обновления из очереди воркера {index} потеряны: {lost}.'
+            )
+        old_queue.close()
+        old_queue.cancel_join_thread()
+
+    def stop(self) -> None:
+        """Останавливает воркеры, дав им дообработать очередь."""
+
+        for queue in self.queues:
+            queue.put(None)
+        for index, process in enumerate(self.processes):
+            process.join(STOP_TIMEOUT)
+            if process.is_alive():
+                logger.error(f'Воркер {index} не остановился, завершаем.')
+                process.terminate()
+
+    async def watchdog(self) -> None:
+        while True:
+            await asyncio.sleep(WATCHDOG_INTERVAL)
+            self.restart_dead()
+
+    async def poll(self, token: str) -> None:
+        """
+        Long polling. Ответ getUpdates разбирается как JSON, без сборки
+        Update: обновления сразу уходят воркерам.
+        """
+
+        async with Bot(token) as bot:
+            await bot.delete_webhook()
+        url = API_URL.format(token=token, method='getUpdates')
+        offset = 0
+        async with httpx.AsyncClient(timeout=POLL_TIMEOUT + 10) as client:
+            while True:
+                try:
+                    response = await client.post(
+                        url, json={'offset': offset, 'timeout': POLL_TIMEOUT}
+                    )
+                    payload = response.json()
+                except (httpx.HTTPError, ValueError) as e:
+                    logger.warning(f'Ошибка getUpdates: {e}')
+                    await asyncio.sleep(POLL_RETRY_DELAY)
+                    continue
+                if not payload.get('ok'):
+                    logger.error(
+                        f'getUpdates отклонён: {payload.get("description")}'
+                    )
+                    await asyncio.sleep(POLL_RETRY_DELAY)
+                    continue
+                for data in payload['result']:
+                    offset = data['update_id'] + 1
+                    self.dispatch(data)
+
+    async def serve_webhook(
+        self, token: str, url: Optional[str], secret: str
+    ) -> None:
+        """
+        Webhook на порту WEBHOOK_PORT: тело запроса передаётся в feed
+        как есть.
+        """
+
+        from tornado.web import Application as WebApplication
+        from tornado.web import RequestHandler
+
+        feed = self.feed
+
+        class WebhookHandler(RequestHandler):
+            def post(self) -> None:
+                received = self.request.headers.get(SECRET_TOKEN_HEADER, '')
+                if secret and not hmac.compare_digest(
+                    received.encode(), secret.encode()
+                ):
+                    self.set_status(403)
+                elif not feed(self.request.body):
+                    self.set_status(400)
+
+        if url:
+            async with Bot(token) as bot:
+                await bot.set_webhook(url, secret_token=secret or None)
+            logger.info(f'Webhook успешно установлен: {url}')
+        else:
+            logger.error('Ошибка: WEBHOOK_URL не установлен!')
+        server = WebApplication([(r'/.*', WebhookHandler)]).listen(
+            WEBHOOK_PORT
+        )
+        try:
+            await asyncio.Event().wait()
+        finally:
+            server.stop()
+
+    async def serve(
+        self,
+        mode: str,
+        token: str,
+        webhook_url: Optional[str] = None,
+        secret: str = '',
+    ) -> None:
+        """Запускает воркеры и принимает обновления до остановки."""
+
+        self.start()
+        loop = asyncio.get_running_loop()
+        main = asyncio.current_task()
+        loop.add_signal_handler(signal.SIGTERM, main.cancel)
+        watchdog = asyncio.create_task(self.watchdog())
+        try:
+            if mode == 'polling':
+                await self.poll(token)
+            else:
+                await self.serve_webhook(token, webhook_url, secret)
+        finally:
+            watchdog.cancel()
+            self.stop()
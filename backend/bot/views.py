@@ -1 +1,65 @@
-# Create your views here.
+import hmac
+import json
+import logging
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from telegram import Update
+
+from bot.services import metrics as bot_metrics
+from bot.webhook import runner
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+@csrf_exempt
+@require_POST
+async def telegram_webhook(request: HttpRequest) -> HttpResponse:
+    """
+    Принимает обновление от Telegram, кладёт его в очередь бота и сразу
+    отвечает 200, не дожидаясь обработки.
+    """
+
+    if not settings.BOT_RUN_IN_ASGI:
+        return HttpResponse(status=404)
+
+    secret = settings.TELEGRAM_WEBHOOK_SECRET
+    received = request.headers.get(SECRET_TOKEN_HEADER, '')
+    if not secret or not hmac.compare_digest(
+        received.encode(), secret.encode()
+    ):
+        logger.warning('Запрос к webhook с неверным секретным токеном.')
+        return HttpResponse(status=403)
+
+    application = await runner.get_application()
+    try:
+        update = Update.de_json(json.loads(request.body), application.bot)
+    except (ValueError, TypeError, KeyError) as e:
+        logger.warning(f'Webhook получил некорректное обновление: {e}')
+        return HttpResponse(status=400)
+    if update is None:
+        return HttpResponse(status=400)
+    await application.update_queue.put(update)
+    return HttpResponse(status=200)
+
+
+@require_GET
+async def metrics(request: HttpRequest) -> HttpResponse:
+    """
+    Метрики процесса в текстовом формате Prometheus. Без METRICS_TOKEN
+    представление выключено.
+    """
+
+    token = settings.METRICS_TOKEN
+    if not token:
+        return HttpResponse(status=404)
+    received = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(received.encode(), f'Bearer {token}'.encode()):
+        return HttpResponse(status=403)
+    return HttpResponse(
+        bot_metrics.render(), content_type=bot_metrics.CONTENT_TYPE
+    )
@@ -0,0 +1,102 @@
+"""
+Бот внутри ASGI-приложения Django.
+
+Когда включён BOT_RUN_IN_ASGI, Application запускается в цикле событий
+ASGI-сервера (uvicorn): при старте сервера через lifespan или, если
+сервер не поддерживает lifespan, при первом запросе к webhook.
+Webhook-представление (bot.views.telegram_webhook) только кладёт
+обновление в update_queue, а обработкой занимается Application.
+
+Обновления одного пользователя должны попадать в один процесс
+(user_data хранится в памяти), поэтому сервер запускается с одним
+воркером.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+
+from django.conf import settings
+from telegram.ext import Application
+
+from bot.init import build_application, flush_on_shutdown
+from bot.services.catalog import get_catalog
+from bot.services.leaderboard import get_leaderboards
+
+logger = logging.getLogger(__name__)
+
+
+class BotRunner:
+    """Ленивый запуск и остановка Application в текущем цикле событий."""
+
+    def __init__(self) -> None:
+        self._application: Optional[Application] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._application is not None
+
+    async def get_application(self) -> Application:
+        """Возвращает запущенный Application, запуская его при надобности."""
+
+        if self._application is not None:
+            return self._application
+        async with self._lock:
+            if self._application is None:
+                application = build_application()
+                await get_catalog().aensure_loaded()
+                await get_leaderboards().aensure_loaded()
+                await application.initialize()
+                await application.start()
+                self._application = application
+                logger.info('Бот запущен внутри ASGI-приложения.')
+        return self._application
+
+    async def stop(self) -> None:
+        """Останавливает Application и сохраняет данные persistence."""
+
+        async with self._lock:
+            application, self._application = self._application, None
+            if application is None:
+                return
+            await application.stop()
+            await application.shutdown()
+            # post_shutdown вызывается только в run_polling/run_webhook
+            await flush_on_shutdown(application)
+            logger.info('Бот остановлен.')
+
+
+runner = BotRunner()
+
+
+class BotLifespanMiddleware:
+    """
+    ASGI-обёртка, обрабатывающая lifespan: запускает бота вместе
+    с сервером и останавливает его при остановке сервера.
+    Остальные запросы передаются приложению Django.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope['type'] != 'lifespan':
+            await self.app(scope, receive, send)
+            return
+
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if settings.BOT_RUN_IN_ASGI:
+                    try:
+                        await runner.get_application()
+                    except Exception as e:
+                        # Админка должна работать и без бота; запуск
+                        # повторится при первом запросе к webhook
+                        logger.error(f'Не удалось запустить бота: {e}')
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await runner.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
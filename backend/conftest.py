@@ -18,6 +18,20 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(autouse=True)
+def reset_db_executor():
+    """
+    Останавливает пул потоков БД после теста: соединения его потоков
+    не должны переходить в тесты без доступа к БД.
+    """
+    yield
+    from bot.services import db_executor
+
+    if db_executor.db_executor is not None:
+        db_executor.db_executor.shutdown()
+        db_executor.db_executor = None
+
+
 @pytest.fixture
 def mock_bot():
     """Мок Telegram бота."""
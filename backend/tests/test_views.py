@@ -0,0 +1,132 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from bot import views
+from django.test import AsyncClient
+from django.urls import reverse
+
+SECRET = 'test-webhook-secret'
+
+UPDATE = {
+    'update_id': 1,
+    'message': {
+        'message_id': 1,
+        'date': 0,
+        'chat': {'id': 42, 'type': 'private'},
+        'from': {'id': 42, 'is_bot': False, 'first_name': 'Тест'},
+        'text': 'Меню',
+    },
+}
+
+
+@pytest.fixture
+def webhook_settings(settings):
+    settings.BOT_RUN_IN_ASGI = True
+    settings.TELEGRAM_WEBHOOK_SECRET = SECRET
+    return settings
+
+
+@pytest.fixture
+def bot_application():
+    application = SimpleNamespace(update_queue=asyncio.Queue(), bot=None)
+    with patch.object(
+        views.runner,
+        'get_application',
+        AsyncMock(return_value=application),
+    ):
+        yield application
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestTelegramWebhook:
+    """Тесты приёма обновлений через webhook"""
+
+    async def test_update_put_on_queue(
+        self, webhook_settings, bot_application
+    ):
+        """Обновление с верным токеном попадает в очередь бота"""
+        response = await AsyncClient().post(
+            reverse('webhook'),
+            UPDATE,
+            content_type='application/json',
+            headers={'X-Telegram-Bot-Api-Secret-Token': SECRET},
+        )
+
+        assert response.status_code == 200
+        update = bot_application.update_queue.get_nowait()
+        assert update.effective_user.id == 42
+
+    async def test_wrong_secret_rejected(
+        self, webhook_settings, bot_application
+    ):
+        """Запрос без верного секретного токена отклоняется"""
+        response = await AsyncClient().post(
+            reverse('webhook'),
+            UPDATE,
+            content_type='application/json',
+            headers={'X-Telegram-Bot-Api-Secret-Token': 'wrong'},
+        )
+
+        assert response.status_code == 403
+        assert bot_application.update_queue.empty()
+
+    async def test_invalid_json(self, webhook_settings, bot_application):
+        """Некорректное тело запроса — ошибка 400"""
+        response = await AsyncClient().post(
+            reverse('webhook'),
+            'not json',
+            content_type='application/json',
+            headers={'X-Telegram-Bot-Api-Secret-Token': SECRET},
+        )
+
+        assert response.status_code == 400
+
+    async def test_disabled_without_asgi_bot(self, settings):
+        """Без BOT_RUN_IN_ASGI webhook недоступен"""
+        settings.BOT_RUN_IN_ASGI = False
+
+        response = await AsyncClient().post(reverse('webhook'), {})
+
+        assert response.status_code == 404
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestMetrics:
+    """Тесты представления метрик"""
+
+    async def test_metrics_rendered(self, settings):
+        """Метрики отдаются в текстовом формате Prometheus"""
+        settings.METRICS_TOKEN = 'token'
+
+        response = await AsyncClient().get(
+            reverse('metrics'), headers={'Authorization': 'Bearer token'}
+        )
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        assert b'# TYPE bot_handler_duration_seconds histogram' in (
+            response.content
+        )
+
+    async def test_token_required(self, settings):
+        """С METRICS_TOKEN метрики доступны только с токеном"""
+        settings.METRICS_TOKEN = 'token'
+        client = AsyncClient()
+
+        assert (await client.get(reverse('metrics'))).status_code == 403
+        response = await client.get(
+            reverse('metrics'), headers={'Authorization': 'Bearer token'}
+        )
+        assert response.status_code == 200
+
+    async def test_disabled_without_token(self, settings):
+        """Без METRICS_TOKEN метрики не отдаются"""
+        settings.METRICS_TOKEN = ''
+
+        response = await AsyncClient().get(reverse('metrics'))
+
+        assert response.status_code == 404
@@ -0,0 +1,165 @@
+from unittest.mock import patch
+
+import pytest
+from bot.handlers import context_helpers, db_helpers
+from bot.models import CustomUser, Question, Tag, UserSettings
+from bot.services.catalog import get_catalog
+from bot.services.quiz_sessions import SESSION_KEY, QuizSession
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestUserContext:
+    """Тесты загрузки пользователя и настроек в user_data"""
+
+    async def test_settings_loaded_once_per_session(
+        self, mock_telegram_context
+    ):
+        """Повторные обращения берут настройки из user_data"""
+        user = await CustomUser.objects.acreate(user_id=12345)
+        tag = await Tag.objects.acreate(name='Функции', slug='func')
+        await UserSettings.objects.acreate(
+            user=user, tag=tag, difficulty='hard'
+        )
+
+        with patch.object(
+            db_helpers,
+            'load_user_context',
+            wraps=db_helpers.load_user_context,
+        ) as load_user_context:
+            user_context = await context_helpers.get_user_context(
+                mock_telegram_context, 12345, refresh=True
+            )
+            for _ in range(10):
+                cached = await context_helpers.get_user_context(
+                    mock_telegram_context, 12345
+                )
+
+        load_user_context.assert_called_once_with(12345)
+        assert cached is user_context
+        assert user_context.difficulty == 'hard'
+        assert user_context.tag_slug == 'func'
+
+    async def test_unregistered_user(self, mock_telegram_context):
+        """Для незарегистрированного пользователя — настройки по умолчанию"""
+        user_context = await context_helpers.get_user_context(
+            mock_telegram_context, 54321
+        )
+
+        assert not user_context.is_registered
+        assert not user_context.has_settings
+        assert user_context.tag_slug == db_helpers.DEFAULT_SETTINGS_USER['tag']
+
+    async def test_created_settings_written_through(
+        self, mock_telegram_context
+    ):
+        """Созданные настройки сразу попадают в кэш user_data"""
+        await CustomUser.objects.acreate(user_id=777)
+        await Tag.objects.acreate(id=1, name='Функции', slug='func')
+        user_context = await context_helpers.get_user_context(
+            mock_telegram_context, 777
+        )
+
+        await db_helpers.update_user_topic(user_context, 'Функции')
+
+        cached = await context_helpers.get_user_context(
+            mock_telegram_context, 777
+        )
+        assert cached is user_context
+        assert cached.has_settings
+        assert cached.tag_name == 'Функции'
+        settings = await UserSettings.objects.aget(pk=777)
+        assert settings.tag_id == 1
+
+    async def test_cache_expires(self, mock_telegram_context, settings):
+        """Контекст старше USER_CONTEXT_TTL перечитывается из БД"""
+        settings.USER_CONTEXT_TTL = 60
+        await CustomUser.objects.acreate(user_id=888)
+        user_context = await context_helpers.get_user_context(
+            mock_telegram_context, 888
+        )
+
+        user_context.loaded_at -= 61
+        reloaded = await context_helpers.get_user_context(
+            mock_telegram_context, 888
+        )
+
+        assert reloaded is not user_context
+        assert reloaded.is_registered
+
+    async def test_cache_kept_during_quiz(
+        self, mock_telegram_context, settings
+    ):
+        """Во время викторины настройки не перечитываются по сроку"""
+        settings.USER_CONTEXT_TTL = 60
+        await CustomUser.objects.acreate(user_id=999)
+        user_context = await context_helpers.get_user_context(
+            mock_telegram_context, 999, refresh=True
+        )
+        questions = [
+            await Question.objects.acreate(name=f'Вопрос {i}')
+            for i in range(3)
+        ]
+        catalog = get_catalog()
+        catalog.invalidate()
+        await catalog.aensure_loaded()
+        session = QuizSession((q.id for q in questions), 'func')
+        mock_telegram_context.user_data[SESSION_KEY] = session
+        user_context.loaded_at -= 61
+
+        with patch.object(db_helpers, 'load_user_context') as load:
+            while session.advance() is not None:
+                cached = await context_helpers.get_user_context(
+                    mock_telegram_context, 999
+                )
+                assert cached is user_context
+                session.record_answer(True)
+
+            load.assert_not_called()
+
+            # Викторина закончилась — срок снова проверяется
+            await context_helpers.get_user_context(mock_telegram_context, 999)
+
+        assert session.correct == 3
+        load.assert_called_once_with(999)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestFetchUserContext:
+    """Тесты загрузки пользователя и настроек по Telegram ID"""
+
+    def test_one_query_with_settings(self, django_assert_num_queries):
+        """Пользователь, настройки и тема читаются одним запросом"""
+        user = CustomUser.objects.create(user_id=12345)
+        tag = Tag.objects.create(name='Функции', slug='func')
+        UserSettings.objects.create(user=user, tag=tag, difficulty='hard')
+
+        with django_assert_num_queries(1):
+            user_context = db_helpers.fetch_user_context(12345)
+            assert user_context.tag_slug == 'func'
+
+        assert user_context.user_pk == user.pk
+        assert user_context.difficulty == 'hard'
+        assert user_context.tag_name == 'Функции'
+
+    def test_one_query_without_settings(self, django_assert_num_queries):
+        """Без настроек запрос тот же, настройки по умолчанию"""
+        CustomUser.objects.create(user_id=12345)
+
+        with django_assert_num_queries(1):
+            user_context = db_helpers.fetch_user_context(12345)
+
+        assert user_context.is_registered
+        assert not user_context.has_settings
+
+    def test_settings_created_once(self):
+        """Настройки создаются по Telegram ID, повторно — не дублируются"""
+        CustomUser.objects.create(user_id=12345)
+
+        UserSettings.objects.get_or_create(user_id=12345)
+        UserSettings.objects.get_or_create(user_id=12345)
+
+        assert UserSettings.objects.filter(user_id=12345).count() == 1
+        assert UserSettings.objects.get(pk=12345).tag is None
@@ -0,0 +1,69 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bot.handlers.router import (
+    UNKNOWN_CALLBACK_TEXT,
+    CallbackRouter,
+    get_payload,
+    make_callback_data,
+)
+from bot.init import build_callback_router
+
+
+def make_update(data):
+    update = MagicMock()
+    update.callback_query.data = data
+    update.callback_query.answer = AsyncMock()
+    return update
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestCallbackRouter:
+    """Тесты маршрутизации callback-запросов"""
+
+    async def test_exact_and_prefix_routes(self):
+        """Точный ключ и префикс выбирают свои обработчики"""
+        router = CallbackRouter()
+        menu = AsyncMock()
+        answer = AsyncMock()
+        router.add('conf', menu)
+        router.add_prefix('a', answer)
+
+        await router.dispatch(make_update('conf'), None)
+        await router.dispatch(make_update('a:СУММ'), None)
+
+        menu.assert_awaited_once()
+        answer.assert_awaited_once()
+
+    async def test_unknown_payload_rejected(self):
+        """Неизвестные данные не попадают в обработчик ответов"""
+        router = CallbackRouter()
+        answer = AsyncMock()
+        router.add_prefix('a', answer)
+        update = make_update('СУММ')
+
+        await router.dispatch(update, None)
+
+        answer.assert_not_awaited()
+        update.callback_query.answer.assert_awaited_once_with(
+            UNKNOWN_CALLBACK_TEXT
+        )
+
+    async def test_duplicate_route(self):
+        """Повторная регистрация маршрута — ошибка"""
+        router = CallbackRouter()
+        router.add('conf', AsyncMock())
+
+        with pytest.raises(ValueError):
+            router.add('conf', AsyncMock())
+
+    async def test_bot_routes(self):
+        """Все кнопки бота находят обработчик"""
+        router = build_callback_router()
+        answer = make_callback_data('a', 'СУММ')
+
+        assert get_payload(answer) == 'СУММ'
+        for data in ('conf', 'end', 'quiz_mode_hard', answer):
+            assert router.resolve(data) is not None
+        assert router.resolve('quiz_mode_unknown') is None
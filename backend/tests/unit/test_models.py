@@ -122,5 +122,5 @@ class TestDatabaseBasicOperations:
         )
 
         # Проверяем обратные связи
-        assert settings in user.settings.all()
+        assert user.settings == settings
         assert tag == settings.tag
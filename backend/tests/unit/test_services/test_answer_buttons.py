@@ -0,0 +1,49 @@
+import pytest
+from bot.services.answer_buttons import (
+    AnswerButton,
+    decode_answer,
+    encode_answer,
+)
+from bot.services.quiz_sessions import QuizSession
+
+BUTTON = AnswerButton(session_id=2**32 - 1, question_id=123456, option=3)
+
+
+@pytest.mark.unit
+class TestAnswerButtons:
+    """Тесты callback_data кнопок с вариантами ответа"""
+
+    def test_round_trip(self):
+        """Кнопка укладывается в предел Telegram и распаковывается"""
+        payload = encode_answer(BUTTON)
+
+        assert len(payload.encode()) <= 62
+        assert decode_answer(payload) == BUTTON
+
+    def test_tampered_payload_rejected(self):
+        """Изменённые или чужие данные не распаковываются"""
+        payload = encode_answer(BUTTON)
+        forged = encode_answer(BUTTON._replace(option=0))
+        tampered = forged[:-8] + payload[-8:]
+
+        assert decode_answer(tampered) is None
+        assert decode_answer('СУММЕСЛИ') is None
+        assert decode_answer(payload[:-1]) is None
+
+    def test_other_secret_rejected(self, settings):
+        """Кнопка, подписанная другим ключом, не принимается"""
+        payload = encode_answer(BUTTON)
+        settings.SECRET_KEY = 'другой ключ'
+
+        assert decode_answer(payload) is None
+
+    def test_stale_buttons(self):
+        """Кнопки другой викторины и прошлого вопроса не текущие"""
+        session = QuizSession([5, 3, 9], 'func', cursor=1, session_id=1)
+        old_question = session.answer_button(0)
+        session.cursor = 2
+        other = QuizSession([5, 3, 9], 'func', cursor=2, session_id=2)
+
+        assert session.is_current(session.answer_button(1))
+        assert not session.is_current(old_question)
+        assert not other.is_current(session.answer_button(1))
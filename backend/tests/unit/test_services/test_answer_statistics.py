@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from bot.models import CustomUser, Question, UserQuestionStatistic
+from bot.services import answer_statistics
+from bot.services.answer_statistics import AnswerStatisticsBuffer
+from bot.services.catalog import get_catalog
+
+NOW = datetime(2025, 1, 1, 7, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestAnswerStatisticsBuffer:
+    """Тесты накопления статистики ответов"""
+
+    async def test_answers_aggregated(self):
+        """Ответы на один вопрос собираются в одну запись по порядку"""
+        buffer = AnswerStatisticsBuffer(max_events=100)
+        with patch.object(answer_statistics, 'save_statistics') as save:
+            save.return_value = 2
+            buffer.record(1, 10, True, NOW)
+            buffer.record(1, 10, False, NOW)
+            buffer.record(2, 10, True, NOW)
+
+            assert await buffer.flush() == 2
+
+        save.assert_called_once_with(
+            {(1, 10): [(NOW, True), (NOW, False)], (2, 10): [(NOW, True)]}
+        )
+        assert len(buffer) == 0
+
+    async def test_flush_after_max_events(self):
+        """Накопив max_events ответов, буфер пишет их сам"""
+        buffer = AnswerStatisticsBuffer(max_events=2)
+        with patch.object(answer_statistics, 'save_statistics') as save:
+            buffer.record(1, 10, True, NOW)
+            await asyncio.sleep(0)
+            assert not save.called
+
+            buffer.record(1, 11, True, NOW)
+            await buffer._flush_task
+
+        save.assert_called_once()
+
+    async def test_failed_flush_kept(self):
+        """Если запись не удалась, ответы остаются в буфере по порядку"""
+        buffer = AnswerStatisticsBuffer(max_events=100)
+        buffer.record(1, 10, True, NOW)
+        with patch.object(
+            answer_statistics, 'save_statistics', side_effect=Exception
+        ):
+            assert await buffer.flush() == 0
+        buffer.record(1, 10, False, NOW)
+
+        assert buffer._pending == {(1, 10): [(NOW, True), (NOW, False)]}
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestSaveStatistics:
+    """Тесты записи статистики в БД"""
+
+    def test_counters_added_to_saved(self):
+        """Повторная запись прибавляет счётчики к сохранённым"""
+        user = CustomUser.objects.create(user_id=1)
+        question = Question.objects.create(name='СУММ')
+        catalog = get_catalog()
+        catalog.invalidate()
+        catalog.ensure_loaded()
+        pending = {
+            (1, question.id): [(NOW, False), (NOW, True)],
+            # Незарегистрированный пользователь пропускается
+            (2, question.id): [(NOW, True)],
+        }
+
+        assert answer_statistics.save_statistics(pending) == 1
+        answer_statistics.save_statistics({(1, question.id): [(NOW, True)]})
+
+        statistic = UserQuestionStatistic.objects.get(user=user)
+        assert (statistic.attempts, statistic.correct_attempts) == (3, 2)
+        assert statistic.last_attempt == NOW
+        assert statistic.repetitions == 2
+        assert statistic.due_at == NOW + timedelta(days=6)
+
+    def test_every_answer_reviewed(self):
+        """Шаг SM-2 применяется к каждому накопленному ответу"""
+        user = CustomUser.objects.create(user_id=1)
+        question = Question.objects.create(name='СУММ')
+        catalog = get_catalog()
+        catalog.invalidate()
+        catalog.ensure_loaded()
+        later = NOW + timedelta(minutes=1)
+
+        answer_statistics.save_statistics(
+            {(1, question.id): [(NOW, True), (NOW, True), (later, True)]}
+        )
+
+        statistic = UserQuestionStatistic.objects.get(user=user)
+        assert statistic.attempts == 3
+        assert statistic.repetitions == 3
+        assert statistic.last_attempt == later
+        assert statistic.due_at == later + timedelta(days=statistic.interval)
+        assert statistic.interval > 6
@@ -0,0 +1,80 @@
+import pytest
+from bot.models import Question, Tag
+from bot.services.catalog import QuestionCatalog, bump_catalog_version
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def func_tag(db):
+    return Tag.objects.create(name='Функции', slug='func')
+
+
+@pytest.fixture
+def questions(func_tag):
+    created = []
+    for index in range(5):
+        question = Question.objects.create(
+            name=f'func_{index}', description=f'Описание {index}'
+        )
+        question.tags.add(func_tag)
+        created.append(question)
+    return created
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestQuestionCatalog:
+    """Тесты кэша каталога вопросов"""
+
+    def test_sample_by_tag_without_queries(self, questions):
+        """После загрузки выборка вопросов не обращается к БД"""
+        catalog = QuestionCatalog()
+        catalog.ensure_loaded()
+
+        with CaptureQueriesContext(connection) as queries:
+            sample = catalog.sample('func', 3)
+            catalog.ensure_loaded()
+
+        assert len(queries) == 0
+        assert len(sample) == 3
+        assert len({question.id for question in sample}) == 3
+        assert {question.id for question in sample} <= {
+            question.id for question in questions
+        }
+
+    def test_unknown_tag_returns_empty_list(self, questions):
+        """Для тега без вопросов возвращается пустой список"""
+        catalog = QuestionCatalog()
+        catalog.ensure_loaded()
+
+        assert catalog.sample('expressions', 10) == []
+
+    def test_invalidate_reloads_changes(self, questions, func_tag):
+        """После инвалидации каталог подхватывает новые вопросы"""
+        catalog = QuestionCatalog()
+        catalog.ensure_loaded()
+        new_question = Question.objects.create(
+            name='new_func', description='Новый вопрос'
+        )
+        new_question.tags.add(func_tag)
+
+        assert new_question.id not in catalog.question_ids('func')
+
+        catalog.invalidate()
+        catalog.ensure_loaded()
+
+        assert new_question.id in catalog.question_ids('func')
+        assert catalog.get(new_question.id).name == 'new_func'
+
+    def test_stored_version_invalidates_other_processes(self, questions):
+        """Изменение версии в БД помечает каталог устаревшим"""
+        catalog = QuestionCatalog()
+        catalog.ensure_loaded()
+
+        catalog.check_stored_version()
+        assert catalog.is_fresh
+
+        bump_catalog_version()
+        catalog.check_stored_version()
+        assert not catalog.is_fresh
@@ -0,0 +1,64 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from bot.services import db_executor
+from bot.services.db_executor import DatabaseExecutor
+from django.db.backends.signals import connection_created
+
+
+@pytest.mark.unit
+class TestDatabaseExecutor:
+    """Тесты пула потоков БД"""
+
+    def test_queue_depth_counted(self):
+        """Задачи сверх числа потоков ждут в очереди и учитываются"""
+        executor = DatabaseExecutor(max_workers=2)
+        release = threading.Event()
+        try:
+            futures = [executor.submit(release.wait) for _ in range(5)]
+            while executor.stats().active < 2:
+                time.sleep(0.001)
+
+            stats = executor.stats()
+            assert stats.threads == 2
+            assert stats.queued == 3
+            assert stats.peak_queued >= 3
+
+            release.set()
+            for future in futures:
+                future.result()
+        finally:
+            release.set()
+            executor.shutdown()
+
+        stats = executor.stats()
+        assert (stats.active, stats.queued, stats.completed) == (0, 0, 5)
+
+    @pytest.mark.asyncio
+    async def test_calls_run_in_parallel(self, settings):
+        """database_sync_to_async выполняет вызовы параллельно"""
+        settings.BOT_DB_THREADS = 3
+        barrier = threading.Barrier(3, timeout=5)
+        results = await asyncio.gather(
+            *(
+                db_executor.database_sync_to_async(barrier.wait)()
+                for _ in range(3)
+            )
+        )
+
+        # С одним общим потоком Barrier не дождался бы остальных
+        assert sorted(results) == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_connections_counted(self):
+        """Считаются только соединения, открытые потоками пула"""
+        open_connection = db_executor.database_sync_to_async(
+            connection_created.send
+        )
+        await open_connection(sender=None, connection=None)
+        await open_connection(sender=None, connection=None)
+        connection_created.send(sender=None, connection=None)
+
+        assert db_executor.get_db_executor().stats().connections == 2
@@ -0,0 +1,39 @@
+import pytest
+from bot.services.distractors import DistractorIndex
+
+
+@pytest.fixture
+def index():
+    names = {index: f'func_{index}' for index in range(1, 21)}
+    names.update({21: 'expr_1', 22: 'expr_2'})
+    return DistractorIndex.build(
+        names, {'func': list(range(1, 21)), 'expressions': [21, 22]}
+    )
+
+
+@pytest.mark.unit
+class TestDistractorIndex:
+    """Тесты индекса неправильных вариантов ответа"""
+
+    def test_sample_from_same_tag(self, index):
+        """Варианты берутся из темы вопроса и не содержат правильный ответ"""
+        for _ in range(50):
+            distractors = index.sample('func', 'func_1', 3)
+
+            assert len(distractors) == 3
+            assert len(set(distractors)) == 3
+            assert 'func_1' not in distractors
+            assert all(name.startswith('func_') for name in distractors)
+
+    def test_small_tag_falls_back_to_all_questions(self, index):
+        """Если в теме мало вопросов, варианты добираются из общего пула"""
+        distractors = index.sample('expressions', 'expr_1', 3)
+
+        assert len(distractors) == 3
+        assert len(set(distractors)) == 3
+        assert 'expr_1' not in distractors
+        assert 'expr_2' in distractors
+
+    def test_empty_index(self):
+        """Пустой индекс не падает"""
+        assert DistractorIndex({}).sample('func', 'func_1', 3) == []
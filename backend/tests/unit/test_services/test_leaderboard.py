@@ -0,0 +1,97 @@
+import random
+from datetime import datetime, timezone
+
+import pytest
+from bot.models import LeaderboardScore
+from bot.services.leaderboard import (
+    GLOBAL_BOARD,
+    FenwickTree,
+    Leaderboard,
+    Leaderboards,
+    tag_board,
+    week_board,
+)
+
+NOW = datetime(2025, 1, 1, 7, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.unit
+class TestLeaderboard:
+    """Тесты рейтинга в памяти"""
+
+    def test_fenwick_grows(self):
+        """Дерево расширяется, сохраняя накопленные суммы"""
+        tree = FenwickTree(size=4)
+        tree.add(3, 2)
+        tree.add(100, 1)
+
+        assert tree.prefix_sum(2) == 0
+        assert tree.prefix_sum(3) == 2
+        assert tree.prefix_sum(99) == 2
+        assert tree.prefix_sum(1000) == 3
+
+    def test_rank_and_top_match_sorting(self):
+        """Места и первые места совпадают с полной сортировкой"""
+        rng = random.Random(1)
+        leaderboard = Leaderboard(size=5)
+        scores = {}
+        for _ in range(500):
+            user_id = rng.randrange(50)
+            scores[user_id] = scores.get(user_id, 0) + rng.randint(1, 3)
+            leaderboard.update(user_id, scores[user_id])
+
+        ordered = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        assert leaderboard.top() == ordered[:5]
+        for user_id, score in scores.items():
+            higher = sum(1 for other in scores.values() if other > score)
+            assert leaderboard.rank(user_id) == higher + 1
+        assert leaderboard.rank(999) is None
+
+    def test_scores_never_decrease(self):
+        """Устаревшее значение не понижает очки"""
+        leaderboard = Leaderboard(size=5)
+        leaderboard.update(1, 5)
+
+        assert not leaderboard.update(1, 3)
+        assert leaderboard.score(1) == 5
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestLeaderboards:
+    """Тесты сохранения рейтингов"""
+
+    async def test_checkpoint_and_reload(self):
+        """Очки сохраняются в БД и восстанавливаются другим процессом"""
+        leaderboards = Leaderboards(size=10)
+        await leaderboards.aensure_loaded()
+        leaderboards.record_correct(1, 'anna', 'func', NOW)
+        leaderboards.record_correct(1, 'anna', 'func', NOW)
+        leaderboards.record_correct(2, 'boris', 'func', NOW)
+
+        assert await leaderboards.checkpoint() == 6
+        assert await leaderboards.checkpoint() == 0
+        assert await LeaderboardScore.objects.acount() == 6
+
+        restored = Leaderboards(size=10)
+        await restored.aensure_loaded()
+        assert restored.get(GLOBAL_BOARD).top() == [(1, 2), (2, 1)]
+        assert restored.get(tag_board('func')).rank(2) == 2
+        assert restored.name(1) == 'anna'
+        # Прошлые недели в память не загружаются
+        assert restored.get(week_board(NOW)).top() == []
+
+    async def test_points_before_load_kept(self):
+        """Очки, начисленные до загрузки рейтингов, добавляются к БД"""
+        await LeaderboardScore.objects.acreate(
+            board=GLOBAL_BOARD, user_id=1, name='anna', score=5
+        )
+        leaderboards = Leaderboards(size=10)
+        leaderboards.record_correct(1, 'anna', 'func', NOW)
+        leaderboards.record_correct(2, 'boris', 'func', NOW)
+
+        await leaderboards.aensure_loaded()
+
+        assert leaderboards.get(GLOBAL_BOARD).top() == [(1, 6), (2, 1)]
+        assert await leaderboards.checkpoint() == 6
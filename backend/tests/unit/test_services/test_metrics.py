@@ -0,0 +1,77 @@
+import pytest
+from bot.models import Tag
+from bot.services import metrics
+from bot.services.db_executor import database_sync_to_async
+from bot.services.metrics import Counter, Histogram, instrument_handler
+
+
+def count_tags():
+    return Tag.objects.count()
+
+
+@pytest.fixture
+def isolated_registry(monkeypatch):
+    monkeypatch.setattr(metrics, 'registry', [])
+    return metrics.registry
+
+
+@pytest.mark.unit
+class TestRender:
+    """Тесты текстового формата Prometheus"""
+
+    def test_counter_and_histogram(self, isolated_registry):
+        """Счётчики с метками и накопительные корзины гистограмм"""
+        counter = Counter('requests_total', 'Запросы.', ('method',))
+        histogram = Histogram(
+            'latency_seconds', 'Время.', ('handler',), buckets=(0.1, 1)
+        )
+        counter.inc('send"Message')
+        counter.inc('send"Message', amount=2)
+        for value in (0.05, 0.5, 3):
+            histogram.observe(value, 'start')
+
+        lines = metrics.render().splitlines()
+
+        assert '# TYPE requests_total counter' in lines
+        assert 'requests_total{method="send\\"Message"} 3' in lines
+        assert 'latency_seconds_bucket{handler="start",le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{handler="start",le="1"} 2' in lines
+        assert 'latency_seconds_bucket{handler="start",le="+Inf"} 3' in lines
+        assert 'latency_seconds_sum{handler="start"} 3.55' in lines
+        assert 'latency_seconds_count{handler="start"} 3' in lines
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+class TestInstrumentHandler:
+    """Тесты сбора метрик обработчиков"""
+
+    async def test_db_queries_attributed_to_handler(self):
+        """Запросы из потоков БД учитываются за обработчиком"""
+
+        async def handle_tags(update, context):
+            await database_sync_to_async(count_tags)()
+            await database_sync_to_async(count_tags)()
+
+        queries = metrics.DB_QUERIES.value('handle_tags')
+        updates = metrics.UPDATE_DB_QUERIES.count('handle_tags')
+
+        await instrument_handler(handle_tags)(None, None)
+
+        assert metrics.DB_QUERIES.value('handle_tags') == queries + 2
+        assert metrics.UPDATE_DB_QUERIES.count('handle_tags') == updates + 1
+        assert metrics.HANDLER_DURATION.count('handle_tags') >= 1
+
+    async def test_errors_counted(self):
+        """Исключение обработчика считается и пробрасывается дальше"""
+
+        async def handle_broken(update, context):
+            raise RuntimeError('сбой')
+
+        errors = metrics.HANDLER_ERRORS.value('handle_broken')
+
+        with pytest.raises(RuntimeError):
+            await instrument_handler(handle_broken)(None, None)
+
+        assert metrics.HANDLER_ERRORS.value('handle_broken') == errors + 1
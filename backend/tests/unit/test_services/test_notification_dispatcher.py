@@ -0,0 +1,78 @@
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bot.services.notification_dispatcher import (
+    NotificationDispatcher,
+    TokenBucket,
+)
+from telegram.error import Forbidden, RetryAfter
+
+
+def make_dispatcher(send_message, max_retries=3):
+    bot = MagicMock()
+    bot.send_message = send_message
+    return NotificationDispatcher(
+        bot,
+        concurrency=4,
+        rate_limit=1000,
+        chat_interval=0,
+        max_retries=max_retries,
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestNotificationDispatcher:
+    """Тесты параллельной рассылки уведомлений"""
+
+    async def test_sends_to_all_chats(self):
+        """Все сообщения отправлены, метрики посчитаны"""
+        send_message = AsyncMock()
+        dispatcher = make_dispatcher(send_message)
+
+        report = await dispatcher.send_many(range(1, 21), 'Текст')
+
+        assert report.sent == 20
+        assert report.failed == report.throttled == 0
+        assert send_message.await_count == 20
+
+    async def test_retry_after_reschedules_message(self):
+        """После RetryAfter сообщение отправляется повторно"""
+        calls = []
+
+        async def send_message(chat_id, text):
+            calls.append(chat_id)
+            if chat_id == 1 and calls.count(1) == 1:
+                raise RetryAfter(0)
+            if chat_id == 2:
+                raise Forbidden('bot was blocked by the user')
+
+        dispatcher = make_dispatcher(send_message)
+
+        report = await dispatcher.send_many([1, 2, 3], 'Текст')
+
+        assert report.sent == 2
+        assert report.failed == 1
+        assert report.throttled == 1
+        assert calls.count(1) == 2
+
+    async def test_gives_up_after_max_retries(self):
+        """Постоянный RetryAfter считается ошибкой после лимита повторов"""
+        send_message = AsyncMock(side_effect=RetryAfter(0))
+        dispatcher = make_dispatcher(send_message, max_retries=2)
+
+        report = await dispatcher.send_many([1], 'Текст')
+
+        assert report.failed == 1
+        assert report.throttled == 3
+
+    async def test_token_bucket_limits_rate(self):
+        """Token bucket не выдаёт токены быстрее заданной частоты"""
+        bucket = TokenBucket(rate=100, capacity=1)
+
+        started = time.monotonic()
+        for _ in range(11):
+            await bucket.acquire()
+
+        assert time.monotonic() - started >= 0.09
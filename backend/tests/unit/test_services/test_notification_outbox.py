@@ -0,0 +1,113 @@
+from datetime import datetime, time, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from bot.models import (
+    CustomUser,
+    NotificationOutbox,
+    NotificationScheduleState,
+    UserSettings,
+)
+from bot.services import notification_outbox as outbox
+from bot.services.notification_dispatcher import DispatchReport
+from django.test import override_settings
+
+NOW = datetime(2025, 1, 1, 7, 0, 20, tzinfo=timezone.utc)
+
+
+def create_recipient(user_id, notification_time):
+    user = CustomUser.objects.create(user_id=user_id)
+    UserSettings.objects.create(
+        user=user,
+        tag=None,
+        notification=True,
+        notification_time=notification_time,
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestNotificationOutbox:
+    """Тесты очереди уведомлений"""
+
+    def test_schedule_is_idempotent(self):
+        """Повторный запуск в ту же минуту не дублирует уведомления"""
+        create_recipient(1, time(7, 0))
+        create_recipient(2, time(7, 0))
+
+        assert outbox.schedule_due_notifications(NOW) == 2
+        assert outbox.schedule_due_notifications(NOW) == 0
+        assert NotificationOutbox.objects.count() == 2
+
+    def test_missed_minutes_caught_up(self, settings):
+        """После простоя досылаются пропущенные минуты в пределах окна"""
+        settings.NOTIFICATION_CATCHUP_MINUTES = 15
+        create_recipient(1, time(6, 50))
+        create_recipient(2, time(6, 30))
+        NotificationScheduleState.objects.create(
+            pk=1, last_minute=NOW.replace(hour=6, minute=0, second=0)
+        )
+
+        outbox.schedule_due_notifications(NOW)
+
+        assert list(
+            NotificationOutbox.objects.values_list('chat_id', flat=True)
+        ) == [1]
+
+    def test_claimed_rows_skipped_until_lease_expires(self, settings):
+        """Захваченная строка не выдаётся повторно до конца аренды"""
+        settings.NOTIFICATION_LEASE_SECONDS = 60
+        create_recipient(1, time(7, 0))
+        outbox.schedule_due_notifications(NOW)
+
+        claimed = outbox.claim_notifications(10, NOW)
+
+        assert [row.chat_id for row in claimed] == [1]
+        assert claimed[0].attempts == 1
+        assert outbox.claim_notifications(10, NOW) == []
+        later = NOW + timedelta(seconds=61)
+        assert len(outbox.claim_notifications(10, later)) == 1
+
+    def test_complete_marks_delivered_and_retries(self, settings):
+        """Доставленные отмечаются, временные ошибки откладываются"""
+        settings.NOTIFICATION_MAX_ATTEMPTS = 5
+        for user_id in (1, 2, 3):
+            create_recipient(user_id, time(7, 0))
+        outbox.schedule_due_notifications(NOW)
+        claimed = outbox.claim_notifications(10, NOW)
+        report = DispatchReport(
+            delivered=[1],
+            rejected={2: 'Forbidden'},
+            postponed={3: 'Timed out'},
+        )
+
+        outbox.complete_notifications(claimed, report, NOW)
+
+        statuses = dict(
+            NotificationOutbox.objects.values_list('chat_id', 'status')
+        )
+        assert statuses == {
+            1: NotificationOutbox.Status.DELIVERED,
+            2: NotificationOutbox.Status.FAILED,
+            3: NotificationOutbox.Status.PENDING,
+        }
+        retry = NotificationOutbox.objects.get(chat_id=3)
+        assert retry.next_attempt_at > NOW
+        assert outbox.claim_notifications(10, NOW) == []
+
+    def test_dispatcher_shared_between_runs(self):
+        """Все запуски отправки используют одну рассылку и один лимит"""
+        bot_data = {}
+        first = SimpleNamespace(bot=object(), bot_data=bot_data)
+        second = SimpleNamespace(bot=first.bot, bot_data=bot_data)
+
+        assert outbox.get_dispatcher(first) is outbox.get_dispatcher(second)
+
+    @override_settings(NOTIFICATION_RATE_LIMIT=24)
+    def test_dispatcher_rate_split_between_workers(self):
+        """Воркеры делят общий лимит частоты отправки поровну"""
+        context = SimpleNamespace(
+            bot=object(), bot_data={outbox.WORKERS_KEY: 4}
+        )
+
+        assert outbox.get_dispatcher(context).bucket.rate == 6
@@ -0,0 +1,131 @@
+import io
+
+import pytest
+from bot.models import Question, Tag
+from bot.services import question_sync
+from bot.services.catalog import get_stored_version
+from bot.services.question_sync import QuestionSync
+
+CSV = (
+    'name,description,syntax,tags\n'
+    'int,Целое число,int(x),"Функции, Числа"\n'
+    'str,Строка,str(x),Функции\n'
+    ',Без имени,,Функции\n'
+    'len,Длина,len(s),Неизвестный\n'
+)
+
+
+def run(text, **kwargs):
+    return QuestionSync(**kwargs).run(io.StringIO(text))
+
+
+@pytest.fixture
+def tags(db):
+    return (
+        Tag.objects.create(name='Функции', slug='func'),
+        Tag.objects.create(name='Числа', slug='numbers'),
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestQuestionSync:
+    """Тесты синхронизации вопросов с файлом"""
+
+    def test_initial_import(self, tags):
+        """Новые вопросы создаются вместе с тегами"""
+        report = run(CSV, batch_size=2)
+
+        assert report.created == ['int', 'str', 'len']
+        assert len(report.invalid) == 1
+        assert report.missing_tags == {'Неизвестный'}
+        assert Question.objects.get(name='int').tags.count() == 2
+
+    def test_only_changed_rows_updated(
+        self, tags, django_capture_on_commit_callbacks
+    ):
+        """Обновляются только изменившиеся вопросы, теги заменяются"""
+        run(CSV)
+        changed = CSV.replace('"Функции, Числа"', 'Числа').replace(
+            'Строка', 'Строка!'
+        )
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            report = run(changed)
+
+        assert report.created == []
+        assert sorted(report.updated) == ['int', 'str']
+        assert report.unchanged == 1
+        assert list(
+            Question.objects.get(name='int').tags.values_list(
+                'slug', flat=True
+            )
+        ) == ['numbers']
+        assert Question.objects.get(name='str').description == 'Строка!'
+        assert callbacks == [question_sync.bump_catalog_version]
+
+    def test_no_changes_no_bump(
+        self, tags, django_capture_on_commit_callbacks
+    ):
+        """Повторная синхронизация без изменений не трогает каталог"""
+        run(CSV)
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            report = run(CSV)
+
+        assert not report.changed
+        assert report.unchanged == 3
+        assert callbacks == []
+
+    def test_prune_and_dry_run(self, tags):
+        """prune удаляет отсутствующие в файле, dry_run всё откатывает"""
+        run(CSV)
+        without_len = CSV.replace('len,Длина,len(s),Неизвестный\n', '')
+
+        report = run(without_len, prune=True, dry_run=True)
+        assert report.deleted == ['len']
+        assert Question.objects.filter(name='len').exists()
+
+        run(without_len, prune=True)
+        assert not Question.objects.filter(name='len').exists()
+
+    def test_tag_created_later_linked(self, tags):
+        """Тег, созданный после синхронизации, связывается при повторной"""
+        run(CSV)
+        Tag.objects.create(name='Неизвестный', slug='unknown')
+
+        report = run(CSV)
+
+        assert report.updated == ['len']
+        assert list(
+            Question.objects.get(name='len').tags.values_list(
+                'slug', flat=True
+            )
+        ) == ['unknown']
+        assert run(CSV).unchanged == 3
+
+    def test_prune_bumps_version_once(
+        self, tags, django_capture_on_commit_callbacks
+    ):
+        """Удаление нескольких вопросов увеличивает версию каталога на 1"""
+        run(CSV)
+        version = get_stored_version()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            report = run('name,description,syntax,tags\n', prune=True)
+
+        assert sorted(report.deleted) == ['int', 'len', 'str']
+        assert not Question.objects.exists()
+        assert not Question.tags.through.objects.exists()
+        assert get_stored_version() == version + 1
+
+    def test_queries_per_batch(self, tags, django_assert_max_num_queries):
+        """Число запросов зависит от числа пачек, а не строк"""
+        rows = ''.join(
+            f'func_{index},Описание,,Функции\n' for index in range(300)
+        )
+
+        with django_assert_max_num_queries(20):
+            run('name,description,syntax,tags\n' + rows, batch_size=100)
+
+        assert Question.objects.count() == 300
@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+from bot.models import Question, Tag
+from bot.services import quiz_sessions
+from bot.services.catalog import get_catalog
+from bot.services.quiz_sessions import (
+    DatabaseSessionStore,
+    QuizSession,
+    QuizSessionPersistence,
+    QuizSessionRecord,
+    SQLiteSessionStore,
+)
+
+RECORD = QuizSessionRecord(
+    (5, 3, 9), position=1, correct=1, answers=1, tag_slug='func'
+)
+
+
+class MemoryStore:
+    """Хранилище в памяти, запоминающее каждую пачку записи."""
+
+    def __init__(self):
+        self.records = {}
+        self.batches = []
+
+    def load_all(self):
+        return dict(self.records)
+
+    def save_many(self, records):
+        self.batches.append(dict(records))
+        for user_id, record in records.items():
+            if record is None:
+                self.records.pop(user_id, None)
+            else:
+                self.records[user_id] = record
+
+
+@pytest.mark.unit
+class TestQuizSession:
+    """Тесты объекта викторины"""
+
+    def test_answer_counted_once(self):
+        """Повторный ответ на тот же вопрос не засчитывается"""
+        session = QuizSession([5, 3, 9], 'func')
+        session.cursor = 1
+
+        assert session.record_answer(True)
+        assert not session.record_answer(True)
+        assert session.correct == 1
+        assert session.answers == 0b1
+
+    def test_no_answer_before_start(self):
+        """До первого вопроса ответ не засчитывается"""
+        session = QuizSession([5, 3, 9], 'func')
+
+        assert session.current_id is None
+        assert not session.record_answer(True)
+
+    def test_compact_state(self):
+        """Викторина хранит только id вопросов и счётчики"""
+        session = QuizSession(range(10), 'func')
+
+        assert not hasattr(session, '__dict__')
+        assert session.question_ids.itemsize * len(session) == 80
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestQuizSessionRecord:
+    """Тесты компактной записи викторины"""
+
+    def test_user_data_round_trip(self):
+        """Викторина восстанавливается из записи, вопросы — из каталога"""
+        tag = Tag.objects.create(name='Функции', slug='func')
+        questions = []
+        for index in range(3):
+            question = Question.objects.create(name=f'func_{index}')
+            question.tags.add(tag)
+            questions.append(question)
+        catalog = get_catalog()
+        catalog.invalidate()
+        catalog.ensure_loaded()
+        session = QuizSession((q.id for q in questions), 'func')
+        session.advance()
+        session.record_answer(True)
+
+        record = quiz_sessions.record_from_user_data({'quiz_session': session})
+        restored = quiz_sessions.user_data_from_record(record)['quiz_session']
+
+        assert record.position == 1
+        assert restored.current_question().id == questions[0].id
+        assert restored.remaining == 2
+        assert restored.correct == 1
+        assert restored.is_answered
+
+    def test_no_quiz_no_record(self):
+        """Без викторины в user_data записи нет"""
+        assert (
+            quiz_sessions.record_from_user_data({'difficulty': 'hard'}) is None
+        )
+
+    def test_database_store_upsert(self):
+        """Повторное сохранение обновляет запись, None удаляет её"""
+        store = DatabaseSessionStore()
+
+        store.save_many({1: RECORD})
+        store.save_many({1: RECORD._replace(position=2), 2: RECORD})
+        store.save_many({2: None})
+
+        assert store.load_all() == {1: RECORD._replace(position=2)}
+
+    def test_sqlite_store_round_trip(self, tmp_path):
+        """Локальное хранилище SQLite сохраняет и удаляет записи"""
+        path = str(tmp_path / 'sessions' / 'quiz.sqlite3')
+        SQLiteSessionStore(path).save_many({1: RECORD, 2: RECORD})
+        SQLiteSessionStore(path).save_many({2: None})
+
+        assert SQLiteSessionStore(path).load_all() == {1: RECORD}
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestQuizSessionPersistence:
+    """Тесты пакетной записи викторин"""
+
+    async def test_updates_written_in_one_batch(self):
+        """Изменения нескольких пользователей уходят одной записью"""
+        store = MemoryStore()
+        persistence = QuizSessionPersistence(store, update_interval=1)
+        user_data = {'quiz_session': QuizSession.from_record(RECORD)}
+
+        await asyncio.gather(
+            *(
+                persistence.update_user_data(user_id, user_data)
+                for user_id in (1, 2, 3)
+            )
+        )
+
+        assert store.batches == [{1: RECORD, 2: RECORD, 3: RECORD}]
+
+    async def test_unchanged_records_not_written(self):
+        """Неизменившаяся викторина повторно не записывается"""
+        store = MemoryStore()
+        persistence = QuizSessionPersistence(store, update_interval=1)
+        user_data = {'quiz_session': QuizSession([5, 3, 9], 'func')}
+
+        await persistence.update_user_data(1, user_data)
+        await persistence.update_user_data(1, user_data)
+        await persistence.update_user_data(1, {})
+        await persistence.drop_user_data(1)
+        await persistence.flush()
+
+        assert len(store.batches) == 2
+        assert store.batches[1] == {1: None}
@@ -0,0 +1,56 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from bot.models import QuizResult, UserStatsRollup
+from bot.services.quiz_stats import (
+    current_streak,
+    rebuild_rollups,
+    record_quiz_result,
+)
+
+DAY = datetime(2025, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestQuizStats:
+    """Тесты сводной статистики пользователя"""
+
+    def record_days(self):
+        record_quiz_result(1, 'func', 10, 7, DAY)
+        record_quiz_result(1, 'func', 10, 9, DAY + timedelta(hours=1))
+        record_quiz_result(1, 'expressions', 5, 5, DAY + timedelta(days=1))
+        record_quiz_result(1, 'func', 10, 4, DAY + timedelta(days=3))
+
+    def test_rollup_updated_on_finish(self):
+        """Сводка накапливает счётчики, темы и серию дней"""
+        self.record_days()
+
+        rollup = UserStatsRollup.objects.get(pk=1)
+        assert (rollup.quizzes, rollup.questions, rollup.correct) == (
+            4,
+            35,
+            25,
+        )
+        assert rollup.by_tag == {
+            'func': [3, 30, 20],
+            'expressions': [1, 5, 5],
+        }
+        assert (rollup.streak, rollup.best_streak) == (1, 2)
+        assert QuizResult.objects.count() == 4
+
+    def test_streak_expires(self):
+        """Серия обнуляется, если пропущен день"""
+        rollup = UserStatsRollup(streak=3, last_quiz_date=date(2025, 1, 1))
+
+        assert current_streak(rollup, date(2025, 1, 2)) == 3
+        assert current_streak(rollup, date(2025, 1, 3)) == 0
+
+    def test_rebuild_matches_incremental(self):
+        """Пересчёт из истории даёт ту же сводку"""
+        self.record_days()
+        expected = UserStatsRollup.objects.values().get(pk=1)
+        UserStatsRollup.objects.filter(pk=1).update(quizzes=0, by_tag={})
+
+        assert rebuild_rollups() == 1
+        assert UserStatsRollup.objects.values().get(pk=1) == expected
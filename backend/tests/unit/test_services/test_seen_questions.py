@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from bot.models import SeenQuestions
+from bot.services import seen_questions
+from bot.services.seen_questions import (
+    SeenQuestionsCache,
+    clear_bits,
+    seen_mask,
+    set_bit,
+)
+
+
+@pytest.mark.unit
+class TestBits:
+    """Тесты операций с битовой маской"""
+
+    def test_set_check_clear(self):
+        """Биты выставляются, проверяются и снимаются по id вопроса"""
+        bits = bytearray()
+        for question_id in (3, 9, 100):
+            set_bit(bits, question_id)
+        ids = np.array([3, 4, 9, 100, 5000], dtype=np.int64)
+
+        assert len(bits) == 13
+        assert seen_mask(bits, ids).tolist() == [
+            True,
+            False,
+            True,
+            True,
+            False,
+        ]
+
+        clear_bits(bits, np.array([9, 5000], dtype=np.int64))
+        assert seen_mask(bits, ids).tolist() == [
+            True,
+            False,
+            False,
+            True,
+            False,
+        ]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestSeenQuestionsCache:
+    """Тесты выбора невиденных вопросов"""
+
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        monkeypatch.setattr(seen_questions, 'load_bits', lambda user_id: b'')
+        return SeenQuestionsCache(max_users=10)
+
+    async def test_unseen_questions_first(self, cache):
+        """Отмеченные вопросы не выбираются, пока есть другие"""
+        for question_id in range(1, 8):
+            cache.mark(1, question_id)
+
+        selected = await cache.sample(1, range(1, 11), 3)
+
+        assert sorted(selected) == [8, 9, 10]
+
+    async def test_exhausted_tag_reset(self, cache):
+        """Когда невиденных не хватает, маска темы сбрасывается"""
+        for question_id in range(1, 10):
+            cache.mark(1, question_id)
+
+        selected = await cache.sample(1, range(1, 11), 4, exclude=[1])
+
+        assert len(set(selected)) == 4
+        assert 10 in selected and 1 not in selected
+        bits = await cache.aget(1)
+        assert seen_mask(bits, np.arange(2, 10)).sum() == 0
+        assert seen_mask(bits, np.array([1])).all()
+
+    async def test_dirty_users_not_evicted(self, cache):
+        """Несохранённые маски остаются в кэше сверх лимита"""
+        cache.max_users = 2
+        for user_id in range(3):
+            cache.mark(user_id, 1)
+        await cache.aget(100)
+
+        assert len(cache) == 4
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(seen_questions, 'save_bits', len)
+            assert await cache.flush() == 3
+        await cache.aget(101)
+        assert len(cache) == 2
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestSaveBits:
+    """Тесты сохранения масок"""
+
+    def test_partial_bits_merged(self):
+        """Маска, не загруженная из БД, объединяется с сохранённой"""
+        SeenQuestions.objects.create(user_id=1, bits=b'\x01\x00')
+
+        seen_questions.save_bits({1: (b'\x02\x00\x04', False)})
+        assert bytes(SeenQuestions.objects.get(user_id=1).bits) == (
+            b'\x03\x00\x04'
+        )
+
+        seen_questions.save_bits({1: (b'\x08', True)})
+        assert bytes(SeenQuestions.objects.get(user_id=1).bits) == b'\x08'
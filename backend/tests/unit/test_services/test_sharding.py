@@ -0,0 +1,59 @@
+import pytest
+from bot.services.sharding import (
+    extract_user_id,
+    shard_for,
+    shard_for_update,
+)
+
+
+@pytest.mark.unit
+class TestSharding:
+    """Тесты распределения обновлений по воркерам"""
+
+    def test_user_from_message_and_callback(self):
+        """id пользователя берётся из сообщения и callback запроса"""
+        message = {
+            'update_id': 1,
+            'message': {'from': {'id': 42}, 'chat': {'id': 42}},
+        }
+        callback = {
+            'update_id': 2,
+            'callback_query': {
+                'from': {'id': 42},
+                'message': {'chat': {'id': 42}},
+            },
+        }
+
+        assert extract_user_id(message) == extract_user_id(callback) == 42
+        assert shard_for_update(message, 4) == shard_for_update(callback, 4)
+
+    def test_channel_post_routed_by_chat(self):
+        """Обновление без пользователя распределяется по id чата"""
+        post = {'update_id': 3, 'channel_post': {'chat': {'id': -1005}}}
+
+        assert extract_user_id(post) == -1005
+
+    def test_unknown_update_goes_to_first_worker(self):
+        """Обновление без автора уходит нулевому воркеру"""
+        assert shard_for_update({'update_id': 4}, 4) == 0
+
+    def test_users_spread_over_workers(self):
+        """Пользователи распределяются по всем воркерам"""
+        shards = {
+            shard_for_update(
+                {'update_id': 1, 'message': {'from': {'id': user_id}}}, 4
+            )
+            for user_id in range(100)
+        }
+
+        assert shards == {0, 1, 2, 3}
+
+    def test_negative_chat_ids(self):
+        """Отрицательные id групп распределяются по всем воркерам"""
+        shards = [
+            shard_for(-1001000000000 - chat_id, 4) for chat_id in range(400)
+        ]
+
+        assert set(shards) == {0, 1, 2, 3}
+        assert min(shards.count(shard) for shard in range(4)) > 50
+        assert shard_for(-1005, 4) == shard_for(-1005, 4)
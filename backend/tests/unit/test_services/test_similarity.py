@@ -0,0 +1,63 @@
+import pytest
+from bot.services.similarity import (
+    NeighbourTable,
+    QuestionText,
+    build_neighbour_table,
+)
+
+
+@pytest.fixture
+def questions():
+    return [
+        QuestionText(1, 'append', 'Добавляет элемент в конец списка', ''),
+        QuestionText(2, 'extend', 'Добавляет элементы в конец списка', ''),
+        QuestionText(3, 'insert', 'Вставляет элемент в список', ''),
+        QuestionText(4, 'keys', 'Возвращает ключи словаря', 'd.keys()'),
+        QuestionText(5, 'values', 'Возвращает значения словаря', ''),
+    ]
+
+
+@pytest.mark.unit
+class TestNeighbourTable:
+    """Тесты построения таблицы похожих вопросов"""
+
+    def test_full_build(self, questions):
+        """Соседи не содержат сам вопрос и упорядочены по похожести"""
+        table, stats = build_neighbour_table(questions, k=2, dim=256)
+
+        assert stats.full and stats.total == 5
+        for question in questions:
+            neighbours = table.neighbours_of(question.id)
+            assert len(neighbours) == 2
+            assert question.id not in neighbours
+        assert table.neighbours_of(1)[0] == 2
+        assert table.neighbours_of(4)[0] == 5
+
+    def test_incremental_build_recomputes_only_changes(self, questions):
+        """Повторная сборка пересчитывает только изменённые вопросы"""
+        table, _ = build_neighbour_table(questions, k=2, dim=256)
+
+        _, stats = build_neighbour_table(
+            questions, previous=table, k=2, dim=256
+        )
+        assert not stats.full
+        assert stats.changed == stats.recomputed == 0
+
+        questions[2] = QuestionText(3, 'items', 'Пары словаря', '')
+        _, stats = build_neighbour_table(
+            questions, previous=table, k=2, dim=256
+        )
+        assert stats.changed == 1
+        assert stats.recomputed < stats.total
+
+    def test_save_and_load(self, questions, tmp_path):
+        """Таблица сохраняется и загружается из файла"""
+        table, _ = build_neighbour_table(questions, k=2, dim=256)
+        path = str(tmp_path / 'neighbours.npz')
+
+        table.save(path)
+        loaded = NeighbourTable.load(path)
+
+        assert loaded is not None
+        assert loaded.neighbours_of(1) == table.neighbours_of(1)
+        assert NeighbourTable.load(str(tmp_path / 'missing.npz')) is None
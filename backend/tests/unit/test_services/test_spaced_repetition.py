@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+import pytest
+from bot.models import CustomUser, Question, Tag, UserQuestionStatistic
+from bot.services.spaced_repetition import (
+    MIN_EASE_FACTOR,
+    ReviewState,
+    due_question_ids,
+    review,
+)
+from django.utils import timezone
+
+
+@pytest.mark.unit
+class TestReview:
+    """Тесты шага SM-2"""
+
+    def test_intervals_grow(self):
+        """Интервал растёт 1 → 6 → 6 * EF при правильных ответах"""
+        state = ReviewState()
+        intervals = []
+        for _ in range(3):
+            state = review(state, 5)
+            intervals.append(state.interval)
+
+        assert intervals == [1, 6, round(6 * 2.7)]
+
+    def test_wrong_answer_resets(self):
+        """Неправильный ответ сбрасывает повторения и снижает EF"""
+        state = review(ReviewState(1.4, 15, 3), 1)
+
+        assert state == ReviewState(MIN_EASE_FACTOR, 1, 0)
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestDueQuestionIds:
+    """Тесты выбора вопросов для повторения"""
+
+    def test_due_in_order_of_due_at(self):
+        """Только просроченные вопросы темы, по порядку due_at"""
+        user = CustomUser.objects.create(user_id=1)
+        tag = Tag.objects.create(name='Функции', slug='func')
+        questions = []
+        for index in range(4):
+            question = Question.objects.create(name=f'func_{index}')
+            question.tags.add(tag)
+            questions.append(question)
+        other = Question.objects.create(name='other')
+        now = timezone.now()
+        for question, due_in in zip([*questions, other], (-1, -3, 5, -2, -4)):
+            UserQuestionStatistic.objects.create(
+                user=user,
+                question=question,
+                attempts=1,
+                due_at=now + timedelta(days=due_in),
+            )
+
+        assert due_question_ids(user.pk, 'func', 10) == [
+            questions[1].id,
+            questions[3].id,
+            questions[0].id,
+        ]
+        assert due_question_ids(user.pk, 'func', 1) == [questions[1].id]
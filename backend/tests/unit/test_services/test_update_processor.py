@@ -0,0 +1,89 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from bot.services.update_processor import PerUserUpdateProcessor
+from telegram import Update
+
+
+def make_update(user_id):
+    update = MagicMock(spec=Update)
+    update.effective_user.id = user_id
+    return update
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+class TestPerUserUpdateProcessor:
+    """Тесты параллельной обработки обновлений"""
+
+    async def test_same_user_processed_in_order(self):
+        """Обновления одного пользователя не пересекаются"""
+        processor = PerUserUpdateProcessor(8)
+        events = []
+
+        async def handle(name):
+            events.append(f'{name}:start')
+            await asyncio.sleep(0.01)
+            events.append(f'{name}:end')
+
+        await asyncio.gather(
+            *(
+                processor.process_update(make_update(1), handle(name))
+                for name in ('a', 'b', 'c')
+            )
+        )
+
+        assert events == [
+            'a:start',
+            'a:end',
+            'b:start',
+            'b:end',
+            'c:start',
+            'c:end',
+        ]
+        assert processor._locks == {}
+
+    async def test_different_users_processed_concurrently(self):
+        """Обновления разных пользователей обрабатываются одновременно"""
+        processor = PerUserUpdateProcessor(8)
+        running = 0
+        peak = 0
+
+        async def handle():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await asyncio.gather(
+            *(
+                processor.process_update(make_update(user_id), handle())
+                for user_id in range(5)
+            )
+        )
+
+        assert peak == 5
+
+    async def test_concurrency_limit(self):
+        """Одновременно обрабатывается не больше заданного числа"""
+        processor = PerUserUpdateProcessor(2)
+        running = 0
+        peak = 0
+
+        async def handle():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        await asyncio.gather(
+            *(
+                processor.process_update(make_update(user_id), handle())
+                for user_id in range(6)
+            )
+        )
+
+        assert peak == 2
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import pytest
+from bot.supervisor import Supervisor
+
+
+@pytest.mark.unit
+class TestSupervisor:
+    """Тесты перезапуска воркеров"""
+
+    def test_dead_worker_gets_new_queue(self, monkeypatch):
+        """Упавший воркер перезапускается с новой очередью"""
+        supervisor = Supervisor(2)
+        started = []
+        monkeypatch.setattr(supervisor, '_start_worker', started.append)
+        alive = SimpleNamespace(is_alive=lambda: True, exitcode=None)
+        dead = SimpleNamespace(is_alive=lambda: False, exitcode=1)
+        supervisor.processes = [alive, dead]
+        queues = list(supervisor.queues)
+
+        supervisor.restart_dead()
+
+        assert started == [1]
+        assert supervisor.queues[0] is queues[0]
+        assert supervisor.queues[1] is not queues[1]
+        for queue in supervisor.queues:
+            queue.close()
+
+    def test_feed_routes_raw_json(self, monkeypatch):
+        """Тело webhook разбирается как JSON и уходит воркеру пользователя"""
+        supervisor = Supervisor(2)
+        routed = []
+        monkeypatch.setattr(supervisor, 'dispatch', routed.append)
+        body = (
+            b'{"update_id": 1, "message": {"message_id": 1, "date": 0,'
+            b' "chat": {"id": 7, "type": "private"},'
+            b' "from": {"id": 7, "is_bot": false, "first_name": "A"}}}'
+        )
+
+        assert supervisor.feed(body)
+        assert supervisor.feed(b'not json') is False
+        assert supervisor.feed(b'[1, 2]') is False
+        assert supervisor.feed(b'{"ok": true}') is False
+        assert len(routed) == 1
+        assert isinstance(routed[0], dict)
+        assert routed[0]['message']['from']['id'] == 7
+        for queue in supervisor.queues:
+            queue.close()
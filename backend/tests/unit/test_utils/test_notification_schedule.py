@@ -0,0 +1,47 @@
+from datetime import datetime, time, timezone
+
+import pytest
+from bot.handlers import utils
+from bot.models import CustomUser, UserSettings
+from bot.services import notification_outbox as outbox
+
+
+@pytest.mark.unit
+@pytest.mark.django_db
+class TestDueNotifications:
+    """Тесты выборки получателей уведомлений за минуту"""
+
+    def test_only_current_minute_recipients(self):
+        """Выбираются только включённые уведомления текущей минуты"""
+        for user_id, notification, notification_time in (
+            (1, True, time(7, 0)),
+            (2, True, time(7, 0, 30)),
+            (3, True, time(7, 1)),
+            (4, False, time(7, 0)),
+        ):
+            user = CustomUser.objects.create(user_id=user_id)
+            UserSettings.objects.create(
+                user=user,
+                tag=None,
+                notification=notification,
+                notification_time=notification_time,
+            )
+
+        moment = datetime(2025, 1, 1, 7, 0, 42, tzinfo=timezone.utc)
+
+        assert sorted(outbox.get_due_chat_ids_queryset(moment)) == [1, 2]
+
+    def test_last_minute_of_day(self):
+        """Последняя минута суток не пересекается со следующими сутками"""
+        moment = datetime(2025, 1, 1, 23, 59, 5, tzinfo=timezone.utc)
+
+        start, end = outbox.get_minute_bounds(moment)
+
+        assert start == time(23, 59)
+        assert end == time(23, 59, 59, 999999)
+
+    def test_seconds_to_next_minute(self):
+        """Первый запуск задачи выравнивается по началу минуты"""
+        moment = datetime(2025, 1, 1, 7, 0, 45, tzinfo=timezone.utc)
+
+        assert utils.seconds_to_next_minute(moment) == 15